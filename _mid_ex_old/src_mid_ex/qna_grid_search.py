@@ -177,6 +177,7 @@ def run_single(
     metrics: List[str],
     model_name: str,
     temperature: float,
+    embedding_cache_path: Optional[pathlib.Path] = None,
 ) -> Dict[str, Any]:
     """Run one configuration and return scores + params."""
 
@@ -194,6 +195,7 @@ def run_single(
         llm_model=model_name,
         temperature=temperature,
         return_sources=False,
+        embedding_cache_path=embedding_cache_path,
     )
 
     retriever = tool.retriever
@@ -233,6 +235,8 @@ def main():
     ap.add_argument("--temperature", type=float, default=0.0)
     ap.add_argument("--metrics", default="context_precision,context_recall,faithfulness, answer_correctness")
     ap.add_argument("--max-runs", type=int, default=None, help="Limit number of configs (debug)")
+    ap.add_argument("--embedding-cache", type=pathlib.Path, default=None,
+                    help="SQLite embedding cache shared by all runs (chunks repeat across configs)")
     args = ap.parse_args()
 
     full_text = read_any(args.doc)
@@ -250,7 +254,8 @@ def main():
     for i, cfg in enumerate(grid, 1):
         try:
             print(f"[{i}/{len(grid)}] running {cfg}")
-            res = run_single(cfg, full_text, questions, gts, metrics, args.model, args.temperature)
+            res = run_single(cfg, full_text, questions, gts, metrics, args.model, args.temperature,
+                             embedding_cache_path=args.embedding_cache)
             results.append(res)
             pd.DataFrame(results).to_csv(args.out, index=False)
         except KeyboardInterrupt:
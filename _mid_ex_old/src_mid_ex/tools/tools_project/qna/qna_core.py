@@ -5,14 +5,17 @@ Includes: MMR, MultiQuery, FAISS distance threshold filter, return_sources.
 from __future__ import annotations
 
 import sys
-# sys.path.append("../../../../")
-sys.path.append("./")
-
-
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional, Sequence
 
+# The legacy scripts run from src_mid_ex (or tools_project); the shared core/ and
+# retrieval/ packages live at the repository root
+_LEGACY_ROOT = Path(__file__).resolve().parents[3]
+for _path in (_LEGACY_ROOT, _LEGACY_ROOT.parents[1]):
+    if str(_path) not in sys.path:
+        sys.path.append(str(_path))
+
 from langchain.schema import BaseRetriever, Document
 from langchain.chains import RetrievalQA
 from langchain_community.vectorstores import FAISS
@@ -22,7 +25,9 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 # Multi‑query
 from langchain.retrievers.multi_query import MultiQueryRetriever
 
-from src.tools.tools_project.qna.qna_prompts import qa_prompt, multiquery_prompt
+from tools.tools_project.qna.qna_prompts import qa_prompt, multiquery_prompt
+from core.embedding_cache import CachedEmbeddings
+from retrieval.threshold_retriever import ThresholdRetriever
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -109,6 +114,7 @@ def build_qna_tool(
     # Embeddings / Vector store
     embedding_model: str = "text-embedding-3-large",
     persist_path: Optional[Path] = None,
+    embedding_cache_path: Optional[Path] = None,
     # Retrieval params
     top_k: int = 12,
     fetch_k: int = 50,
@@ -125,6 +131,9 @@ def build_qna_tool(
     """Create a fully configured QnATool (no Parent/Child)."""
 
     embeddings = OpenAIEmbeddings(model=embedding_model)
+    if embedding_cache_path is not None:
+        # Re-runs over the same chunks (grid search, evaluation) only embed new text
+        embeddings = CachedEmbeddings(embeddings, embedding_cache_path, model=embedding_model)
 
     # Child docs only
     child_docs = split_into_docs(
@@ -143,33 +152,17 @@ def build_qna_tool(
         if persist_path:
             vectorstore.save_local(str(persist_path))
 
-    # Base retriever (MMR)
-    base_retriever = vectorstore.as_retriever(
+    # Base retriever (MMR), with an optional distance threshold (distance <= thr) applied to
+    # the same candidates first, so each query costs one embedding call and one index search
+    retriever: BaseRetriever = ThresholdRetriever(
+        vectorstore=vectorstore,
+        k=top_k,
+        fetch_k=fetch_k,
+        score_threshold=score_threshold,
         search_type="mmr",
-        search_kwargs={"k": top_k, "fetch_k": fetch_k, "lambda_mult": lambda_mult},
+        lambda_mult=lambda_mult,
     )
 
-    # Threshold filter (distance <= thr)
-    if score_threshold is not None:
-        class ThresholdRetriever(BaseRetriever):
-            def __init__(self, vs: FAISS, inner: BaseRetriever, thr: float):
-                self.vs = vs
-                self.inner = inner
-                self.thr = thr
-
-            def _get_relevant_documents(self, query: str) -> List[Document]:
-                docs_scores = self.vs.similarity_search_with_score(query, k=fetch_k)
-                keep = {id(d) for d, s in docs_scores if s <= self.thr}
-                ordered = self.inner.get_relevant_documents(query)
-                return [d for d in ordered if id(d) in keep]
-
-            async def _aget_relevant_documents(self, query: str) -> List[Document]:
-                return self._get_relevant_documents(query)
-
-        retriever: BaseRetriever = ThresholdRetriever(vectorstore, base_retriever, score_threshold)
-    else:
-        retriever = base_retriever
-
     # MultiQuery expansion
     if use_multiquery:
         mq_llm = ChatOpenAI(model_name=llm_model, temperature=0)
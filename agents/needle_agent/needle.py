@@ -3,13 +3,15 @@ from typing import List
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.documents import Document
 from agents.needle_agent.needle_prompts import generation_prompt_template
+from agents.needle_agent.semantic_cache import SemanticAnswerCache
 
 
 class NeedleAgent():
     
-    def __init__(self, faiss_indexer:FAISSIndexer, llm:BaseChatModel) -> None:
+    def __init__(self, faiss_indexer:FAISSIndexer, llm:BaseChatModel, semantic_cache:SemanticAnswerCache=None) -> None:
         self.faiss_indexer = faiss_indexer
         self.llm = llm
+        self.semantic_cache = semantic_cache
         
     async def handle(self, query: str) -> str:
         """
@@ -21,6 +23,9 @@ class NeedleAgent():
 
 
     def answer(self, query:str)->dict:
+        if self.semantic_cache is not None:
+            return self._answer_with_semantic_cache(query)
+
         context,chunks = self._retrieve_context(query)
         answer = self._generate(context, query)
 
@@ -31,6 +36,25 @@ class NeedleAgent():
             "chunks":chunks_debug_info
         }
 
+    def _answer_with_semantic_cache(self, query:str)->dict:
+        # The query is embedded once, for both the cache lookup and the retrieval
+        query_embedding = self.faiss_indexer.embed_query(query)
+        chunks = self.faiss_indexer.retrieve_by_vector(query_embedding)
+        chunk_ids = [chunk.id for chunk in chunks]
+
+        cached = self.semantic_cache.lookup(query_embedding,chunk_ids)
+
+        if cached is not None:
+            answer = cached.answer
+        else:
+            answer = self._generate(self._concat_chunks(chunks), query)
+            self.semantic_cache.put(query,query_embedding,chunk_ids,answer)
+
+        return {
+            "answer":answer,
+            "chunks":self._get_chunks_debug_info(chunks)
+        }
+
     def _retrieve_context(self, query:str)->tuple[str,List[Document]]:
         chunks = self.faiss_indexer.retrieve(query)
         context = self._concat_chunks(chunks)
@@ -3,16 +3,25 @@ sys.path.append("./")
 
 from core.user_interface import ConsoleChat
 from agents.needle_agent.needle import NeedleAgent
+from agents.needle_agent.semantic_cache import SemanticAnswerCache
 from indexer.indexer import FAISSIndexer
 from core.config_utils import load_config
+from core.query_cache import QueryResultCache
 from core.api_utils import get_llm_langchain_openai
 
 def main():
     config = load_config("agents/needle_agent/config.yaml")
     faiss_config = config["faiss_indexer"]
-    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_config["directory"])
+    query_cache = QueryResultCache.from_config(config.get("query_cache"))
+    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_config["directory"],mmap=faiss_config.get("mmap",False),
+                                                      query_cache=query_cache)
     llm = get_llm_langchain_openai(model=config["llm"]["model"])
-    needle_agent = NeedleAgent(faiss_indexer,llm)
+    semantic_cache_config = config.get("semantic_cache",{})
+    semantic_cache = None
+    if semantic_cache_config.get("enabled",False):
+        semantic_cache = SemanticAnswerCache(threshold=semantic_cache_config.get("threshold",0.95),
+                                             max_entries=semantic_cache_config.get("max_entries",512))
+    needle_agent = NeedleAgent(faiss_indexer,llm,semantic_cache=semantic_cache)
     chat = ConsoleChat(needle_agent.answer)
     chat.start()
 
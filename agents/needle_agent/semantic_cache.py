@@ -0,0 +1,135 @@
+import faiss
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class CachedAnswer():
+    query: str
+    answer: str
+    chunk_ids: frozenset
+    created_at: float
+
+
+class SemanticAnswerCache():
+    """
+    Reuses NeedleAgent answers across paraphrased questions.
+
+    Query embeddings are L2-normalized and kept in a small inner-product FAISS index. A new
+    question hits when its cosine similarity to a cached question reaches ``threshold`` and
+    retrieval returned the same chunks that answer was generated from, so answers are never
+    reused across a changed index. The least recently hit entries are evicted beyond
+    ``max_entries``; entries older than ``ttl_seconds`` are dropped when found.
+    """
+
+    def __init__(self,threshold:float=0.95,max_entries:int=512,ttl_seconds:float=None,num_candidates:int=4):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.num_candidates = num_candidates
+
+        self.hits = 0
+        self.misses = 0
+        self.chunk_mismatches = 0
+        self.evictions = 0
+
+        self._index = None
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(self,query_embedding:List[float],chunk_ids:List[str])->Optional[CachedAnswer]:
+        with self._lock:
+            entry = self._find(self._normalize(query_embedding),frozenset(chunk_ids))
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            return entry
+
+    def put(self,query:str,query_embedding:List[float],chunk_ids:List[str],answer:str):
+        vector = self._normalize(query_embedding)
+
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self._index.add_with_ids(vector,np.array([entry_id],dtype=np.int64))
+            self._entries[entry_id] = CachedAnswer(query,answer,frozenset(chunk_ids),time.monotonic())
+
+            while len(self._entries) > self.max_entries:
+                evicted_id,_ = self._entries.popitem(last=False)
+                self._remove(evicted_id)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+            self._entries.clear()
+
+    def stats(self)->dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "chunk_mismatches": self.chunk_mismatches,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+    def _find(self,vector:np.ndarray,chunk_ids:frozenset)->Optional[CachedAnswer]:
+        if self._index is None or self._index.ntotal == 0:
+            return None
+
+        similarities,entry_ids = self._index.search(vector,min(self.num_candidates,self._index.ntotal))
+        similar_found = False
+
+        for similarity,entry_id in zip(similarities[0],entry_ids[0]):
+            if entry_id < 0 or similarity < self.threshold:
+                break
+
+            entry = self._entries[entry_id]
+
+            if self.ttl_seconds is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+                del self._entries[entry_id]
+                self._remove(entry_id)
+                continue
+
+            similar_found = True
+
+            if entry.chunk_ids == chunk_ids:
+                self._entries.move_to_end(entry_id)
+                return entry
+
+        if similar_found:
+            self.chunk_mismatches += 1
+
+        return None
+
+    def _remove(self,entry_id:int):
+        self._index.remove_ids(np.array([entry_id],dtype=np.int64))
+
+    @staticmethod
+    def _normalize(embedding:List[float])->np.ndarray:
+        vector = np.array([embedding],dtype=np.float32)
+        faiss.normalize_L2(vector)
+
+        return vector
@@ -7,6 +7,7 @@ from agents.tableQA_agent.tableQA import TableQAgent
 from retrieval.hybrid_retriever import HybridRetriever
 from langchain_core.prompts import ChatPromptTemplate
 from core.api_utils import get_llm_langchain_openai
+from core.table_store import TableStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from indexer.faiss_indexer import FAISSIndexer
 
@@ -47,6 +48,7 @@ class RouterAgent:
         model_name: str = "gpt-4o-mini",
         retriever: HybridRetriever = None,
         faiss_indexer: FAISSIndexer = None,
+        table_store: TableStore = None,
     ):
         # Simple rule-based routing; initialize only what's needed
         try:
@@ -57,7 +59,7 @@ class RouterAgent:
         self.summary_agent = None
         # Needle agent requires an indexer; only construct if both are available
         self.needle_agent = NeedleAgent(faiss_indexer, llm) if (faiss_indexer is not None and llm is not None) else None
-        self.table_agent = TableQAgent(retriever=retriever)
+        self.table_agent = TableQAgent(retriever=retriever, table_store=table_store)
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a router that classifies user questions and decides which specialized agent should answer."),
@@ -10,6 +10,8 @@ from agents.router_agent.router import RouterAgent
 from retrieval import DenseRetriever, SparseRetriever, HybridRetriever
 from indexer.faiss_indexer import FAISSIndexer
 from core.config_utils import load_config
+from core.query_cache import QueryResultCache
+from core.table_store import TableStore
 from core.api_utils import get_llm_langchain_openai
 from core.pdf_reader import read_pdf  # assuming you already have this utility
 
@@ -45,21 +47,28 @@ def build_router():
     # Build FAISS index for dense retrieval
     faiss_config = config.get("faiss_indexer", {})
     faiss_dir = faiss_config.get("directory", "vector_db")
-    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_dir)
+    # Repeated questions skip the embedding call and the FAISS scan
+    query_cache = QueryResultCache.from_config(config.get("query_cache"))
+    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_dir,mmap=faiss_config.get("mmap", False),
+                                                      query_cache=query_cache)
 
-    dense = DenseRetriever(faiss_indexer.vector_store)
+    dense = DenseRetriever(faiss_indexer, query_cache=query_cache)
 
-    # Load docs for sparse retriever (configurable path or default)
-    docs_path = config.get("data", {}).get("insurance_path", "data/insurance")
-    docs = load_docs_from_path(docs_path)
-    sparse = SparseRetriever(docs)
+    # Sparse side covers the same chunks as the dense side, read from the local docstore
+    sparse = SparseRetriever.from_faiss_indexer(faiss_indexer)
+    if not sparse.corpus:
+        # No index yet: load docs for sparse retriever (configurable path or default)
+        docs_path = config.get("data", {}).get("insurance_path", "data/insurance")
+        sparse = SparseRetriever(load_docs_from_path(docs_path))
 
     # Hybrid retriever
     hybrid = HybridRetriever(dense, sparse)
 
     # RouterAgent connects all agents
     model_name = config.get("llm", {}).get("model", "gpt-4o-mini")
-    return RouterAgent(retriever=hybrid, faiss_indexer=faiss_indexer, model_name=model_name)
+    # Tables written next to the index by indexer_cli.py, loaded only when TableQA needs them
+    table_store = TableStore(faiss_dir)
+    return RouterAgent(retriever=hybrid, faiss_indexer=faiss_indexer, model_name=model_name, table_store=table_store)
 
 
 def main():
@@ -1,5 +1,7 @@
 import pathlib
-from core.pdf_reader import read_pdf
+from typing import Iterable, Iterator
+from langchain_core.documents import Document
+from core.pdf_reader import iter_pdf_pages, read_pdf
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from agents.summary_agent.prompts import MAP_SUMMARY_PROMPT_CHAT_TEMPLATE,REDUCE_SUMMARY_PROMPT_CHAT_TEMPLATE
 from agents.summary_agent.prompts import ITERATIVE_REFINEMENT_PROMPT_CHAT_TEMPLATE,ITERATIVE_REFINEMENT_INITIAL_SUMMARY_PROMPT_CHAT_TEMPLATE
@@ -19,25 +21,62 @@ class SummaryAgent:
         result = self.summarize(query)
         return result["answer"]
 
-    def summarize_single_pdf(self,pdf_path:pathlib.Path, method:str):
-        text = read_pdf(pdf_path,format="text")
-        return self.summarize(text,method)
+    def summarize_single_pdf(self,pdf_path:pathlib.Path, method:str, page_window:int=None):
+        """
+        With page_window set, pages are parsed in windows of this size while the first chunks
+        are already summarized. With LlamaParse each window is a separate parse job, so leave
+        it unset to parse the whole PDF in one job first.
+        """
+        if page_window is None:
+            return self.summarize(read_pdf(pdf_path,format="text"),method)
+
+        pages = iter_pdf_pages(pdf_path,format="text",window=page_window)
+        return self.summarize_pages(pages,method)
 
     def summarize(self,text:str,method:str):
+        return self._summarize_chunks(iter(self.text_splitter.split_text(text)),method)
+
+    def summarize_pages(self,pages:Iterable[Document],method:str):
+        return self._summarize_chunks(self._iter_chunks(pages),method)
+
+    def _summarize_chunks(self,chunks:Iterator[str],method:str):
         if method == "map_reduce":
-            return self._summarize_map_reduce(text)
+            return self._summarize_map_reduce(chunks)
         elif method == "iterative":
-            return self._summarize_iterative_refinement(text)
+            return self._summarize_iterative_refinement(chunks)
         else:
             raise ValueError(f"Invalid summary method: {method}")
 
-    def _summarize_map_reduce(self,text:str):
-        chunks = self.text_splitter.split_text(text)
+    def _iter_chunks(self,pages:Iterable[Document])->Iterator[str]:
+        """
+        Split the pages joined with blank lines without waiting for the last page.
+        The last chunk of what has been read so far may continue on the next page, so the
+        raw text from that chunk on, whitespace included, is split again with that page.
+        Chunks are pieces of the joined text in order and respect the splitter's chunk size,
+        but near page ends they can break differently from splitting the joined text, mostly
+        where a paragraph is longer than a chunk.
+        """
+        buffer = None
+
+        for page in pages:
+            buffer = page.page_content if buffer is None else f"{buffer}\n\n{page.page_content}"
+            chunks = self.text_splitter.split_text(buffer)
+
+            if chunks:
+                yield from chunks[:-1]
+                # Keep the whitespace before the last chunk, the splitter counts it
+                head = buffer[:buffer.rfind(chunks[-1])]
+                buffer = buffer[len(head.rstrip()):]
+
+        if buffer is not None:
+            yield from self.text_splitter.split_text(buffer)
+
+    def _summarize_map_reduce(self,chunks:Iterator[str]):
         partial_summaries = self._summarize_map(chunks)
         summary = self._summarize_reduce(partial_summaries)
         return summary
 
-    def _summarize_map(self,chunks:list[str]):
+    def _summarize_map(self,chunks:Iterable[str]):
         map_chain = MAP_SUMMARY_PROMPT_CHAT_TEMPLATE | self.llm
 
         partial_summaries = []
@@ -54,13 +93,16 @@ class SummaryAgent:
         response = reduce_chain.invoke({"text":combined_text})
         return response.content
     
-    def _summarize_iterative_refinement(self,text:str):
-        chunks = self.text_splitter.split_text(text)
+    def _summarize_iterative_refinement(self,chunks:Iterator[str]):
+        first_chunk = next(chunks,None)
+        if first_chunk is None:
+            raise ValueError("No text to summarize")
+
         initial_summary_chain = ITERATIVE_REFINEMENT_INITIAL_SUMMARY_PROMPT_CHAT_TEMPLATE | self.llm
-        initial_summary = initial_summary_chain.invoke({"text":chunks[0]})
+        initial_summary = initial_summary_chain.invoke({"text":first_chunk})
         refinement_chain = ITERATIVE_REFINEMENT_PROMPT_CHAT_TEMPLATE | self.llm
 
-        for chunk in chunks[1:]:
+        for chunk in chunks:
             response = refinement_chain.invoke({"summary":initial_summary,"text":chunk})
             initial_summary = response.content
         
@@ -12,12 +12,13 @@ def main():
     parser.add_argument("pdf_path", type=str, help="The path to the PDF file")
     parser.add_argument("--method", type=str, help="The method to use for summarization")
     parser.add_argument("--model", type=str, help="The model to use for summarization", default="gpt-4o-mini")
+    parser.add_argument("--page-window", type=int, help="Parse the PDF this many pages at a time and start summarizing before it is fully parsed", default=None)
     args = parser.parse_args()
 
     text_splitter = get_text_splitter()
     llm = get_llm_langchain_openai(model=args.model)
     summary_agent = SummaryAgent(text_splitter,llm)
-    summary = summary_agent.summarize_single_pdf(Path(args.pdf_path), args.method)
+    summary = summary_agent.summarize_single_pdf(Path(args.pdf_path), args.method, page_window=args.page_window)
     print(summary)
 
 if __name__ == "__main__":
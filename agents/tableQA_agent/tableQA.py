@@ -2,6 +2,7 @@ from typing import Any, Optional
 import inspect
 from langchain.prompts import PromptTemplate
 from langchain_core.documents import Document
+from core.table_store import TableStore
 from retrieval.hybrid_retriever import HybridRetriever
 
 # Provide a lightweight local LLMChain fallback to avoid external API usage in tests
@@ -23,12 +24,16 @@ class TableQAgent:
         retriever: HybridRetriever,
         model_name: str = "gpt-4o-mini",
         llm_chain: Optional[Any] = None,
+        table_store: Optional[TableStore] = None,
     ):
         """
         Agent specialized in answering questions on tabular data.
         Handles its own retrieval to keep Router simple.
+        With a ``table_store``, the tables referenced by a retrieved chunk's
+        ``table_ids`` are loaded from it on demand.
         """
         self.retriever = retriever
+        self.table_store = table_store
 
         self.prompt = PromptTemplate(
             input_variables=["query", "table"],
@@ -59,8 +64,16 @@ class TableQAgent:
     def _extract_table(self, docs: list[Document]) -> str | None:
         """
         Find a document that looks like a table.
-        Naive: checks for <table> or markdown style '|'.
+        Chunks referencing stored tables come first; otherwise a naive check
+        for <table> or markdown style '|'.
         """
+        if self.table_store is not None:
+            for d in docs:
+                table_ids = [t for t in d.metadata.get("table_ids", []) if self.table_store.exists(t)]
+                if table_ids:
+                    tables = self.table_store.get_many(table_ids)
+                    return "\n\n".join(table.to_string(index=False) for table in tables)
+
         for d in docs:
             if "<table>" in d.page_content or "|" in d.page_content:
                 return d.page_content
@@ -1,6 +1,7 @@
 import os
 import getpass
 from langchain_openai import OpenAIEmbeddings,ChatOpenAI
+from core.embedding_cache import CachedEmbeddings
 
 def _update_environment_variable(name,val):
     os.environ[name] = val
@@ -20,9 +21,14 @@ def verify_openai_api_key():
     _verify_environment_variable("OPENAI_API_KEY")
 
 
-def get_openai_embeddings(model:str,**kwargs):
+def get_openai_embeddings(model:str,cache_path:str=None,**kwargs):
     verify_openai_api_key()
-    return OpenAIEmbeddings(model=model,**kwargs)
+    embeddings = OpenAIEmbeddings(model=model,**kwargs)
+
+    if cache_path is not None:
+        return CachedEmbeddings(embeddings,cache_path,model=model,dimensions=kwargs.get("dimensions"))
+
+    return embeddings
 
 
 def get_llm_langchain_openai( **chat_settings):
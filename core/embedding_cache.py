@@ -0,0 +1,144 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import numpy as np
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+from core.hashing import text_sha256
+
+DEFAULT_EMBEDDING_CACHE_PATH = pathlib.Path(".cache","embeddings.sqlite")
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that persists vectors in a local SQLite file.
+
+    Vectors are keyed by (model, dimensions, SHA-256 of the text) and stored as raw
+    float32 blobs. Only the cache misses of a call are sent to the wrapped backend,
+    in a single ``embed_documents`` batch.
+    """
+
+    def __init__(self,embeddings:Embeddings,cache_path:pathlib.Path=None,model:str=None,dimensions:int=None):
+        if cache_path is None:
+            cache_path = DEFAULT_EMBEDDING_CACHE_PATH
+
+        self.embeddings = embeddings
+        self.cache_path = pathlib.Path(cache_path)
+        self.model = model if model is not None else getattr(embeddings,"model",embeddings.__class__.__name__)
+        self.dimensions = dimensions if dimensions is not None else getattr(embeddings,"dimensions",None)
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_path.parent,exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.cache_path),check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, dimensions, text_hash))"
+        )
+        self._connection.commit()
+
+    def embed_documents(self,texts:List[str])->List[List[float]]:
+        text_hashes = [text_sha256(text) for text in texts]
+        cached = self._lookup(set(text_hashes))
+
+        # Embed each distinct missing text once, even if it repeats within the batch
+        missing = {}
+        for text,text_hash in zip(texts,text_hashes):
+            if text_hash not in cached:
+                missing.setdefault(text_hash,text)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(),vectors))
+            self._store(computed)
+            cached.update(computed)
+
+        return [list(cached[text_hash]) for text_hash in text_hashes]
+
+    def embed_query(self,text:str)->List[float]:
+        text_hash = text_sha256(text)
+        cached = self._lookup({text_hash})
+
+        if text_hash in cached:
+            with self._lock:
+                self.hits += 1
+
+            return list(cached[text_hash])
+
+        with self._lock:
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(text)
+        self._store({text_hash:vector})
+
+        return vector
+
+    def cache_info(self)->dict:
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+            "entries": self._count_entries(),
+        }
+
+    def reset_counters(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _dimensions_key(self)->int:
+        # 0 stands for "the model's native dimension" when none was requested
+        return self.dimensions if self.dimensions is not None else 0
+
+    def _lookup(self,text_hashes:set)->dict:
+        text_hashes = list(text_hashes)
+        found = {}
+
+        with self._lock:
+            for start in range(0,len(text_hashes),_LOOKUP_BATCH_SIZE):
+                batch = text_hashes[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    [self.model,self._dimensions_key(),*batch],
+                ).fetchall()
+
+                for text_hash,vector in rows:
+                    found[text_hash] = np.frombuffer(vector,dtype=np.float32).tolist()
+
+        return found
+
+    def _store(self,vectors:dict):
+        rows = [
+            (self.model,self._dimensions_key(),text_hash,np.asarray(vector,dtype=np.float32).tobytes())
+            for text_hash,vector in vectors.items()
+        ]
+
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",rows)
+            self._connection.commit()
+
+    def _count_entries(self)->int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ? AND dimensions = ?",
+                [self.model,self._dimensions_key()],
+            ).fetchone()[0]
+
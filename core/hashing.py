@@ -0,0 +1,23 @@
+import hashlib
+import json
+import pathlib
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path:pathlib.Path)->str:
+    digest = hashlib.sha256()
+
+    with open(str(path),"rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def text_sha256(text:str)->str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def options_sha256(options:dict)->str:
+    return text_sha256(json.dumps(options,sort_keys=True,default=str))
@@ -0,0 +1,230 @@
+import json
+import os
+import time
+import pathlib
+import pandas as pd
+from io import StringIO
+from typing import Iterable, Iterator, List, Optional
+
+from core.hashing import options_sha256
+
+DEFAULT_CACHE_DIRECTORY = pathlib.Path(".cache","parsed_pdfs")
+DEFAULT_MAX_SIZE_BYTES = 512 * 1024 * 1024
+
+# Bump when the layout of a cache entry changes, so old entries are never read back
+_CACHE_SCHEMA_VERSION = 1
+
+
+class ParseCache():
+    """
+    Content-addressed on-disk cache of parsed PDF pages.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the parser options and
+    output format, so renaming or moving a file still hits the cache while any change
+    to its content or to the parser settings misses it. Each entry is a single JSON
+    file; its modification time is refreshed on every read and the least recently
+    used entries are evicted once the cache grows past ``max_size_bytes``.
+    """
+
+    def __init__(self,directory:pathlib.Path=None,max_size_bytes:int=None):
+        if directory is None:
+            directory = os.environ.get("REPORTS_PARSE_CACHE_DIR",DEFAULT_CACHE_DIRECTORY)
+
+        if max_size_bytes is None:
+            max_size_bytes = int(os.environ.get("REPORTS_PARSE_CACHE_MAX_BYTES",DEFAULT_MAX_SIZE_BYTES))
+
+        self.directory = pathlib.Path(directory)
+        self.max_size_bytes = max_size_bytes
+
+    @staticmethod
+    def make_key(file_digest:str,parser_options:dict,format:str)->str:
+        return options_sha256({
+            "schema_version": _CACHE_SCHEMA_VERSION,
+            "file_sha256": file_digest,
+            "parser_options": parser_options,
+            "format": format,
+        })
+
+    def get(self,key:str)->Optional[List[dict]]:
+        entry_path = self._entry_path(key)
+
+        try:
+            with open(entry_path,"r",encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Reads count as use for the LRU eviction policy
+        os.utime(entry_path)
+
+        return [_page_from_json(page) for page in entry["pages"]]
+
+    def iter_pages(self,key:str)->Optional[Iterator[dict]]:
+        """
+        Like ``get``, but the tables of each page are only rebuilt when the page is consumed.
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            with open(entry_path,"r",encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        os.utime(entry_path)
+
+        return (_page_from_json(page) for page in entry["pages"])
+
+    def put(self,key:str,pages:List[dict],source_name:str=None,format:str=None):
+        for _ in self.write_through(key,pages,source_name=source_name,format=format):
+            pass
+
+    def write_through(self,key:str,pages:Iterable[dict],source_name:str=None,format:str=None)->Iterator[dict]:
+        """
+        Yield ``pages`` unchanged while writing them to the entry of ``key``, one page at a time.
+        The entry is only stored once every page went through; an abandoned or failed stream
+        leaves the cache untouched.
+        """
+        os.makedirs(self.directory,exist_ok=True)
+
+        header = json.dumps({
+            "source_name": source_name,
+            "format": format,
+            "created_at": time.time(),
+        })
+
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.{id(pages)}.tmp")
+        completed = False
+
+        try:
+            with open(tmp_path,"w",encoding="utf-8") as f:
+                f.write(header[:-1] + ', "pages": [')
+
+                for page_index,page in enumerate(pages):
+                    if page_index > 0:
+                        f.write(", ")
+                    json.dump(_page_to_json(page),f)
+
+                    yield page
+
+                f.write("]}")
+
+            os.replace(tmp_path,entry_path)
+            completed = True
+        finally:
+            if not completed:
+                tmp_path.unlink(missing_ok=True)
+
+        self.prune()
+
+    def entries(self)->List[dict]:
+        if not self.directory.exists():
+            return []
+
+        entries = []
+
+        for entry_path in self.directory.glob("*.json"):
+            stat = entry_path.stat()
+            entries.append({
+                "key": entry_path.stem,
+                "path": entry_path,
+                "size_bytes": stat.st_size,
+                "last_access": stat.st_mtime,
+            })
+
+        entries.sort(key=lambda entry: entry["last_access"])
+
+        return entries
+
+    def describe(self,key:str)->dict:
+        with open(self._entry_path(key),"r",encoding="utf-8") as f:
+            entry = json.load(f)
+
+        return {
+            "source_name": entry.get("source_name"),
+            "format": entry.get("format"),
+            "created_at": entry.get("created_at"),
+            "num_pages": len(entry.get("pages",[])),
+        }
+
+    def total_size_bytes(self)->int:
+        return sum(entry["size_bytes"] for entry in self.entries())
+
+    def prune(self,max_size_bytes:int=None,older_than_seconds:float=None)->List[str]:
+        """
+        Evict least recently used entries until the cache fits in ``max_size_bytes``
+        (defaults to the cache's own bound), and drop entries unused for longer
+        than ``older_than_seconds``. Returns the evicted keys.
+        """
+        if max_size_bytes is None:
+            max_size_bytes = self.max_size_bytes
+
+        entries = self.entries()
+        total_size = sum(entry["size_bytes"] for entry in entries)
+        now = time.time()
+        evicted = []
+
+        for entry in entries:
+            is_expired = older_than_seconds is not None and now - entry["last_access"] > older_than_seconds
+
+            if total_size <= max_size_bytes and not is_expired:
+                continue
+
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+
+            total_size -= entry["size_bytes"]
+            evicted.append(entry["key"])
+
+        return evicted
+
+    def clear(self)->int:
+        return len(self.prune(max_size_bytes=0))
+
+    def _entry_path(self,key:str)->pathlib.Path:
+        return self.directory / f"{key}.json"
+
+
+_default_parse_cache = None
+
+
+def get_default_parse_cache()->ParseCache:
+    global _default_parse_cache
+
+    if _default_parse_cache is None:
+        _default_parse_cache = ParseCache()
+
+    return _default_parse_cache
+
+
+def _page_to_json(page:dict)->dict:
+    return {
+        "text": page["text"],
+        "tables": [_table_to_json(table) for table in page.get("tables",[])],
+    }
+
+
+def _page_from_json(page:dict)->dict:
+    return {
+        "text": page["text"],
+        "tables": [_table_from_json(table) for table in page.get("tables",[])],
+    }
+
+
+def _table_to_json(table:pd.DataFrame)->str:
+    return table.to_json(orient="split")
+
+
+def _table_from_json(table_json:str)->pd.DataFrame:
+    table = pd.read_json(StringIO(table_json),orient="split")
+
+    # read_html produces MultiIndex headers for tables with grouped header rows,
+    # which JSON flattens into lists
+    if len(table.columns) > 0 and all(isinstance(column,(list,tuple)) for column in table.columns):
+        table.columns = pd.MultiIndex.from_tuples([tuple(column) for column in table.columns])
+
+    return table
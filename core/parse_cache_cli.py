@@ -0,0 +1,64 @@
+import argparse
+import os
+import time
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.parse_cache import ParseCache
+
+
+def _format_size(size_bytes:int)->str:
+    return f"{size_bytes / (1024 * 1024):.2f} MB"
+
+
+def _format_time(timestamp:float)->str:
+    return time.strftime("%Y-%m-%d %H:%M:%S",time.localtime(timestamp))
+
+
+def print_stats(cache:ParseCache):
+    entries = cache.entries()
+    total_size = sum(entry["size_bytes"] for entry in entries)
+
+    print(f"Cache directory: {cache.directory}")
+    print(f"Entries: {len(entries)}")
+    print(f"Total size: {_format_size(total_size)} (limit {_format_size(cache.max_size_bytes)})")
+
+
+def print_entries(cache:ParseCache):
+    # Most recently used first
+    for entry in reversed(cache.entries()):
+        description = cache.describe(entry["key"])
+        print(f"{entry['key'][:16]}  {_format_size(entry['size_bytes']):>10}  {_format_time(entry['last_access'])}  "
+              f"{description['format']:<9}  {description['num_pages']:>4} pages  {description['source_name']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and prune the parsed PDF cache")
+    parser.add_argument("--cache-directory", type=str, default=None, help="Path to the cache directory. Example: '.cache/parsed_pdfs'")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show number of entries and total size")
+    subparsers.add_parser("list", help="List cache entries, most recently used first")
+
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used entries")
+    prune_parser.add_argument("--max-size-mb", type=float, default=None, help="Evict until the cache is below this size. Defaults to the configured limit")
+    prune_parser.add_argument("--older-than-days", type=float, default=None, help="Also evict entries not used for this many days")
+
+    subparsers.add_parser("clear", help="Remove all cache entries")
+
+    args = parser.parse_args()
+    cache = ParseCache(directory=args.cache_directory)
+
+    if args.command == "stats":
+        print_stats(cache)
+    elif args.command == "list":
+        print_entries(cache)
+    elif args.command == "prune":
+        max_size_bytes = None if args.max_size_mb is None else int(args.max_size_mb * 1024 * 1024)
+        older_than_seconds = None if args.older_than_days is None else args.older_than_days * 24 * 60 * 60
+        evicted = cache.prune(max_size_bytes=max_size_bytes,older_than_seconds=older_than_seconds)
+        print(f"Evicted {len(evicted)} entries")
+        print_stats(cache)
+    elif args.command == "clear":
+        print(f"Removed {cache.clear()} entries")
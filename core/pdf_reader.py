@@ -1,29 +1,156 @@
+import os
+import re
+import queue
 import pathlib
+import threading
 from langchain_community.document_loaders import PyPDFLoader
 from llama_parse import LlamaParse
+from pypdf import PdfReader
 from core.api_utils import verify_llama_parse_api_key
+from core.hashing import file_sha256
+from core.parse_cache import ParseCache, get_default_parse_cache
 import pandas as pd
 from io import StringIO
-from typing import List
+from typing import Callable, Iterator, List
 from langchain_core.documents import Document
 
+PDF_PARSERS = ["llama_parse","hybrid"]
+DEFAULT_PAGE_WINDOW = 8
 
-def read_pdf(path:pathlib.Path, format="documents"):
+
+_LLAMA_PARSE_OPTIONS = {
+    "extract_charts": True,
+    "auto_mode": True,
+    "auto_mode_trigger_on_image_in_page": True,
+    "auto_mode_trigger_on_table_in_page": True,
+    "split_by_page": True,
+    "output_tables_as_HTML": True,
+}
+
+# A table cell line as pypdf extracts it: only amounts, dates, percentages or codes
+_NUMERIC_LINE_PATTERN = re.compile(r"[\s\d,.%$€₪()\-–/:+]*\d[\s\d,.%$€₪()\-–/:+]*")
+# Cells separated by pipes, tabs or runs of spaces
+_CELL_SEPARATOR_PATTERN = re.compile(r"\s*\|\s*|\t+| {2,}")
+_MIN_TABLE_LINES = 3
+
+
+def read_pdf(path:pathlib.Path, format="documents", use_cache:bool=True, cache:ParseCache=None, parser:str=None,
+             remote_parser:Callable=None):
+    """
+    Parse a PDF into page Documents (with the page tables in metadata["tables"]) or into text.
+
+    ``parser`` "llama_parse" sends the whole file to LlamaParse. "hybrid" extracts every page
+    locally with pypdf and only sends the pages that look like they hold tables or images to
+    ``remote_parser(path, page_indices)`` (LlamaParse on those pages by default). It defaults
+    to the REPORTS_PDF_PARSER environment variable, else "llama_parse".
+    """
+    path,parser,result_type = _resolve_options(path,format,parser)
+
+    if use_cache and cache is None:
+        cache = get_default_parse_cache()
+
+    pages = None
+
+    if use_cache:
+        cache_key = _cache_key(path,parser,result_type,format)
+        pages = cache.get(cache_key)
+
+    if pages is None:
+        if parser == "hybrid":
+            pages = _parse_pages_hybrid(path,result_type,extract_tables=format == "documents",remote_parser=remote_parser)
+        else:
+            pages = _parse_pages(path,result_type,extract_tables=format == "documents")
+
+        if use_cache:
+            cache.put(cache_key,pages,source_name=path.name,format=format)
+
+    if format=="text":
+        return "\n\n".join([page["text"] for page in pages])
+
+    return [_page_document(path,page_index,page) for page_index,page in enumerate(pages)]
+
+
+def iter_pdf_pages(path:pathlib.Path, format="documents", use_cache:bool=True, cache:ParseCache=None, parser:str=None,
+                   remote_parser:Callable=None, window:int=DEFAULT_PAGE_WINDOW)->Iterator[Document]:
+    """
+    Yield the page Documents of a PDF as soon as they are parsed, so splitting, embedding or
+    summarizing can start before the whole document is.
+
+    The file is parsed ``window`` pages at a time (one LlamaParse job per window, or one remote
+    call for the escalated pages of the window with the hybrid parser) in a background thread
+    that stays at most ``window`` pages ahead of the consumer. Pages go through the same cache
+    entries as ``read_pdf``; a parse is only cached once every page was consumed. With
+    ``format="text"`` the pages carry no tables, and joining their text with blank lines gives
+    ``read_pdf(format="text")``.
+    """
+    path,parser,result_type = _resolve_options(path,format,parser)
+
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    if use_cache and cache is None:
+        cache = get_default_parse_cache()
+
+    pages = None
+
+    if use_cache:
+        cache_key = _cache_key(path,parser,result_type,format)
+        pages = cache.iter_pages(cache_key)
+
+    if pages is None:
+        pages = _iter_parsed_pages(path,result_type,format == "documents",parser,remote_parser,window)
+
+        if use_cache:
+            pages = cache.write_through(cache_key,pages,source_name=path.name,format=format)
+
+        pages = _prefetch(pages,window)
+
+    for page_index,page in enumerate(pages):
+        yield _page_document(path,page_index,page)
+
+
+def _resolve_options(path:pathlib.Path, format:str, parser:str)->tuple:
+    if format not in ("text","documents"):
+        raise ValueError(f"Format {format} not supported")
+
+    if parser is None:
+        parser = os.environ.get("REPORTS_PDF_PARSER","llama_parse")
+
+    if parser not in PDF_PARSERS:
+        raise ValueError(f"PDF parser {parser} not supported. Choose from {PDF_PARSERS}")
+
+    result_type = 'text' if format == "text" else 'markdown'
+
+    return pathlib.Path(path),parser,result_type
+
+
+def _cache_key(path:pathlib.Path, parser:str, result_type:str, format:str)->str:
+    parser_options = {"result_type":result_type,**_LLAMA_PARSE_OPTIONS}
+    if parser != "llama_parse":
+        # Entries parsed by LlamaParse alone keep their original keys
+        parser_options["parser"] = parser
+
+    return ParseCache.make_key(file_sha256(path),parser_options,format)
+
+
+def _page_document(path:pathlib.Path, page_index:int, page:dict)->Document:
+    metadata = {}
+    metadata["source"] = str(path)
+    metadata["page"] = page_index + 1
+    metadata["tables"] = page["tables"]
+
+    return Document(page_content=page["text"],metadata=metadata)
+
+
+def _parse_pages(path:pathlib.Path, result_type:str, extract_tables:bool, target_pages:List[int]=None)->List[dict]:
     verify_llama_parse_api_key()
-    result_type = 'markdown' 
 
-    if format == "text":
-        result_type = 'text'
+    options = dict(_LLAMA_PARSE_OPTIONS)
+    if target_pages is not None:
+        # 0-based page indices; split_by_page returns one document per target page, in order
+        options["target_pages"] = ",".join(str(page_index) for page_index in target_pages)
 
-    parser = LlamaParse(
-        result_type = result_type,
-        extract_charts = True,
-        auto_mode = True,
-        auto_mode_trigger_on_image_in_page = True,
-        auto_mode_trigger_on_table_in_page = True,
-        split_by_page= True,
-        output_tables_as_HTML=True
-    )
+    parser = LlamaParse(result_type = result_type, **options)
 
     llama_documents = []
     extra_info = {"file_name":path.name}
@@ -31,23 +158,153 @@ def read_pdf(path:pathlib.Path, format="documents"):
     with open(str(path),"rb") as f:
         llama_documents = parser.load_data(f,extra_info=extra_info)
 
-    if format=="text":
-        pages = [page.text for page in llama_documents]
-        return "\n\n".join(pages)
-    elif format == "documents":
-        langchain_documents = []
-
-        for page_index,doc in enumerate(llama_documents):
-            metadata = {}
-            metadata["source"] = str(path)
-            metadata["page"] = page_index + 1
-            metadata["tables"] = _extract_tables(doc.text)
-            
-            langchain_documents.append(Document(page_content=doc.text,metadata= metadata))
-
-        return langchain_documents
-    else:
-        raise ValueError(f"Format {format} not supported")
+    pages = []
+
+    for doc in llama_documents:
+        tables = _extract_tables(doc.text) if extract_tables else []
+        pages.append({"text":doc.text,"tables":tables})
+
+    return pages
+
+def _iter_parsed_pages(path:pathlib.Path, result_type:str, extract_tables:bool, parser:str, remote_parser:Callable,
+                       window:int)->Iterator[dict]:
+    reader = PdfReader(str(path))
+    num_pages = len(reader.pages)
+
+    for start in range(0,num_pages,window):
+        page_indices = list(range(start,min(start + window,num_pages)))
+
+        if parser == "hybrid":
+            pages = _parse_page_window_hybrid(reader,path,page_indices,result_type,extract_tables,remote_parser)
+        else:
+            pages = _parse_pages(path,result_type,extract_tables,target_pages=page_indices)
+
+            if len(pages) != len(page_indices):
+                raise ValueError(f"LlamaParse returned {len(pages)} pages for the {len(page_indices)} requested from {path}")
+
+        yield from pages
+
+
+_END_OF_PAGES = object()
+
+
+def _prefetch(pages:Iterator[dict], max_pending:int)->Iterator[dict]:
+    """
+    Consume ``pages`` in a background thread, at most ``max_pending`` pages ahead of the caller.
+    Errors are raised in the caller; closing the iterator early stops the thread after the
+    window it is parsing.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(item)->bool:
+        while not stop.is_set():
+            try:
+                pending.put(item,timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page,None)):
+                    return
+
+            put((_END_OF_PAGES,None))
+        except Exception as error:
+            put((_END_OF_PAGES,error))
+        finally:
+            # Runs the generator's cleanup (e.g. dropping a partial cache entry) in this thread
+            if hasattr(pages,"close"):
+                pages.close()
+
+    thread = threading.Thread(target=produce,name="pdf-page-prefetch",daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            page,error = pending.get()
+
+            if error is not None:
+                raise error
+
+            if page is _END_OF_PAGES:
+                return
+
+            yield page
+    finally:
+        stop.set()
+
+
+def _parse_pages_hybrid(path:pathlib.Path, result_type:str, extract_tables:bool, remote_parser:Callable=None)->List[dict]:
+    reader = PdfReader(str(path))
+
+    return _parse_page_window_hybrid(reader,path,range(len(reader.pages)),result_type,extract_tables,remote_parser)
+
+
+def _parse_page_window_hybrid(reader:PdfReader, path:pathlib.Path, page_indices, result_type:str, extract_tables:bool,
+                              remote_parser:Callable=None)->List[dict]:
+    pages = []
+    escalated = []
+
+    for position,page_index in enumerate(page_indices):
+        page = reader.pages[page_index]
+        text = page.extract_text() or ""
+        pages.append({"text":text,"tables":[]})
+
+        if _needs_remote_parse(page,text):
+            escalated.append((position,page_index))
+
+    if not escalated:
+        return pages
+
+    if remote_parser is None:
+        def remote_parser(path,page_indices):
+            return _parse_pages(path,result_type,extract_tables,target_pages=page_indices)
+
+    remote_pages = remote_parser(path,[page_index for _,page_index in escalated])
+
+    if len(remote_pages) != len(escalated):
+        raise ValueError(f"Remote parser returned {len(remote_pages)} pages for the {len(escalated)} requested from {path}")
+
+    for (position,_),remote_page in zip(escalated,remote_pages):
+        pages[position] = {"text":remote_page["text"],"tables":remote_page.get("tables",[]) if extract_tables else []}
+
+    return pages
+
+
+def _needs_remote_parse(page,text:str)->bool:
+    # Images (scans, charts) need OCR / layout analysis
+    if len(page.images) > 0:
+        return True
+
+    return _looks_like_table(text)
+
+
+def _looks_like_table(text:str)->bool:
+    """
+    pypdf puts every table cell on a line of its own, so a table shows up as several lines that
+    only hold numbers; text-based tables keep several cells per line.
+    """
+    numeric_lines = 0
+    multi_cell_lines = 0
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if _NUMERIC_LINE_PATTERN.fullmatch(line):
+            numeric_lines += 1
+        elif len([cell for cell in _CELL_SEPARATOR_PATTERN.split(line) if cell]) >= 3:
+            multi_cell_lines += 1
+
+    return numeric_lines >= _MIN_TABLE_LINES or multi_cell_lines >= _MIN_TABLE_LINES
+
 
 def _extract_tables(text:str,start_tag="<table>",end_tag="</table>")->List[pd.DataFrame]:
     if start_tag not in text:
@@ -0,0 +1,99 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class QueryResultCache():
+    """
+    In-process LRU cache of retrieval results with a time-to-live.
+
+    Keys combine the identity of the index that produced the result, the normalized query
+    text, k, any filters and the index version, so indexers can share one cache and bumping
+    the version makes older entries unreachable; they then age out through the LRU order or
+    the TTL.
+    """
+
+    def __init__(self,max_entries:int=1024,ttl_seconds:float=600):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls,config:dict)->"QueryResultCache":
+        """
+        Build a cache from a ``query_cache`` config section, or return None if it is absent or disabled.
+        """
+        if not config or not config.get("enabled",False):
+            return None
+
+        return cls(max_entries=config.get("max_entries",1024),ttl_seconds=config.get("ttl_seconds",600))
+
+    @staticmethod
+    def normalize_query(query:str)->str:
+        return re.sub(r"\s+"," ",query).strip().lower()
+
+    @classmethod
+    def make_key(cls,query:str,k:int,version:int,filters:dict=None,kind:str="documents",index_id:str=None)->tuple:
+        filters_key = json.dumps(filters,sort_keys=True,default=str) if filters else ""
+        return (index_id,kind,cls.normalize_query(query),k,filters_key,version)
+
+    def get(self,key:Hashable,default:Any=None)->Any:
+        with self._lock:
+            entry = self._entries.get(key,_MISSING)
+
+            if entry is not _MISSING and self._is_expired(entry):
+                del self._entries[key]
+                self.expirations += 1
+                entry = _MISSING
+
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def put(self,key:Hashable,value:Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(),value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self)->dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+            }
+
+    def _is_expired(self,entry:tuple)->bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry[0] > self.ttl_seconds
@@ -0,0 +1,104 @@
+import os
+import pathlib
+import pandas as pd
+import pyarrow as pa
+from typing import List
+
+from core.hashing import text_sha256
+
+TABLES_DIRECTORY_NAME = "tables"
+
+
+class TableStore():
+    """
+    Side-car store of the tables parsed from PDF pages, one Parquet file per table.
+
+    Tables are written once per (source, page) and chunks only carry their ids in
+    ``metadata["table_ids"]``, so DataFrames are neither copied into every chunk nor pickled
+    into the index. ``get`` reads a table back only when an agent needs it. Ids are derived
+    from the source path, page and position, so re-indexing a PDF overwrites its tables.
+    """
+
+    def __init__(self,directory:pathlib.Path):
+        self.directory = pathlib.Path(directory) / TABLES_DIRECTORY_NAME
+
+    @staticmethod
+    def make_table_id(source:str,page:int,position:int)->str:
+        return f"{_source_prefix(source)}-p{page}-t{position}"
+
+    def put_page_tables(self,source:str,page:int,tables:List[pd.DataFrame])->List[str]:
+        if not tables:
+            return []
+
+        os.makedirs(self.directory,exist_ok=True)
+        table_ids = []
+
+        for position,table in enumerate(tables):
+            table_id = self.make_table_id(source,page,position)
+            table_path = self._table_path(table_id)
+
+            # Write to a temporary file first so concurrent readers never see a partial table
+            tmp_path = table_path.with_suffix(f".{os.getpid()}.tmp")
+            _write_parquet(table,tmp_path)
+            os.replace(tmp_path,table_path)
+
+            table_ids.append(table_id)
+
+        return table_ids
+
+    def get(self,table_id:str)->pd.DataFrame:
+        table_path = self._table_path(table_id)
+
+        if not table_path.exists():
+            raise KeyError(f"Table {table_id} not found in {self.directory}")
+
+        return pd.read_parquet(table_path)
+
+    def get_many(self,table_ids:List[str])->List[pd.DataFrame]:
+        return [self.get(table_id) for table_id in table_ids]
+
+    def exists(self,table_id:str)->bool:
+        return self._table_path(table_id).exists()
+
+    def table_ids(self,source:str=None)->List[str]:
+        pattern = f"{_source_prefix(source)}-*.parquet" if source is not None else "*.parquet"
+
+        return sorted(path.stem for path in self.directory.glob(pattern))
+
+    def remove_source(self,source:str)->int:
+        # Tables written before sources were keyed by resolved path carry the path as given
+        table_ids = sorted(set(self.table_ids(source)) | set(self._legacy_table_ids(source)))
+
+        for table_id in table_ids:
+            self._table_path(table_id).unlink(missing_ok=True)
+
+        return len(table_ids)
+
+    def _legacy_table_ids(self,source:str)->List[str]:
+        return sorted(path.stem for path in self.directory.glob(f"{text_sha256(str(source))[:16]}-*.parquet"))
+
+    def _table_path(self,table_id:str)->pathlib.Path:
+        return self.directory / f"{table_id}.parquet"
+
+
+def _source_prefix(source:str)->str:
+    # The same file given as a relative or an absolute path shares its tables
+    return text_sha256(str(pathlib.Path(source).resolve()))[:16]
+
+
+def _write_parquet(table:pd.DataFrame,path:pathlib.Path):
+    table = table.copy()
+
+    # Parquet needs string column names; read_html numbers the columns of header-less tables
+    if isinstance(table.columns,pd.MultiIndex):
+        table.columns = pd.MultiIndex.from_tuples([tuple(str(level) for level in column) for column in table.columns])
+    else:
+        table.columns = [str(column) for column in table.columns]
+
+    try:
+        table.to_parquet(path)
+    except (pa.ArrowInvalid,pa.ArrowTypeError):
+        # Columns mixing numbers and text are stored as text
+        object_columns = table.select_dtypes(include="object").columns
+        table[object_columns] = table[object_columns].astype(str)
+        table.to_parquet(path)
@@ -1,7 +1,10 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from functools import lru_cache
+from typing import List
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+import numpy as np
 import tiktoken, re
 
-def get_text_splitter(**kwargs):
+def get_text_splitter(encode_once:bool=True,**kwargs):
     default_kwargs = {
         "chunk_size":300,
         "chunk_overlap":50,
@@ -9,13 +12,18 @@ def get_text_splitter(**kwargs):
         "separators": _SEPARATORS
     }
     default_kwargs.update(kwargs)
-    
+
+    if encode_once:
+        return EncodeOnceTextSplitter(**default_kwargs)
+
     return RecursiveCharacterTextSplitter(**default_kwargs)
 
-_enc = tiktoken.get_encoding("cl100k_base")
+@lru_cache(maxsize=None)
+def get_encoding():
+    return tiktoken.get_encoding("cl100k_base")
 
 def tiktoken_len(text):
-    return len(_enc.encode(text))
+    return len(get_encoding().encode(text))
 
 _SEPARATORS = [
     "\n## ",   # section headers
@@ -26,4 +34,153 @@ _SEPARATORS = [
     "\n",      # lines
     " ",       # words
     ""         # fallback: characters
-]
\ No newline at end of file
+]
+
+
+@lru_cache(maxsize=8)
+def _token_byte_lengths(encoding)->np.ndarray:
+    lengths = np.zeros(encoding.n_vocab,dtype=np.int64)
+
+    for token in range(encoding.n_vocab):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            # Unused ids between the regular and the special tokens
+            pass
+
+    return lengths
+
+def _token_offsets(encoding,text:str,tokens:List[int])->np.ndarray:
+    """
+    Character offset of each token, as decode_with_offsets gives it, computed with array ops.
+    A token starting inside a multi-byte character gets the offset of that character.
+    """
+    if len(tokens) == 0:
+        return np.zeros(0,dtype=np.int64)
+
+    data = np.frombuffer(text.encode("utf-8","surrogatepass"),dtype=np.uint8)
+    char_of_byte = np.cumsum((data & 0xC0) != 0x80) - 1
+    token_ends = np.cumsum(_token_byte_lengths(encoding)[np.asarray(tokens,dtype=np.int64)])
+
+    return char_of_byte[np.concatenate(([0],token_ends[:-1]))]
+
+
+class EncodeOnceTextSplitter(TextSplitter):
+    """
+    Token-aware recursive splitter that encodes each text once.
+
+    It splits on the same separators in the same priority as RecursiveCharacterTextSplitter with
+    ``tiktoken_len``, but measures every piece on the token offsets of that single encoding
+    instead of re-encoding it. The final "" separator cuts between tokens rather than characters.
+    Piece lengths can differ by a token or so from re-encoding the piece on its own, where BPE
+    merges across a piece boundary.
+
+    Chunk boundaries are not the recursive splitter's: chunks are packed closer to ``chunk_size``
+    (on data/report.pdf about 290-299 tokens against about 270, with 2 of 13 chunks identical).
+    A PDF indexed with the recursive splitter is re-chunked when it is re-indexed, while
+    unchanged PDFs keep their old chunks; ``get_text_splitter(encode_once=False)`` keeps the old
+    boundaries.
+    """
+
+    def __init__(self,separators:List[str]=None,encoding=None,length_function=tiktoken_len,**kwargs):
+        # The splitter keeps separators at the start of the next piece, like the recursive splitter
+        kwargs.pop("keep_separator",None)
+        super().__init__(length_function=length_function,keep_separator=True,**kwargs)
+        self._separators = separators or _SEPARATORS
+        self._encoding = encoding
+
+    def split_text(self,text:str)->List[str]:
+        encoding = self._encoding or get_encoding()
+        offsets = _token_offsets(encoding,text,encoding.encode(text))
+
+        chunks = []
+        for start,end in self._split(text,offsets,0,len(text),self._separators):
+            chunk = text[start:end].strip() if self._strip_whitespace else text[start:end]
+            if chunk:
+                chunks.append(chunk)
+
+        return chunks
+
+    def _split(self,text:str,offsets:np.ndarray,start:int,end:int,separators:List[str])->List[tuple]:
+        separator = separators[-1]
+        new_separators = []
+
+        for i,candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+
+            if text.find(candidate,start,end) != -1:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        pieces = self._pieces(text,offsets,start,end,separator)
+        lengths = self._lengths(offsets,pieces)
+
+        spans = []
+        good_pieces = []
+        good_lengths = []
+
+        for piece,length in zip(pieces,lengths):
+            if length < self._chunk_size:
+                good_pieces.append(piece)
+                good_lengths.append(length)
+                continue
+
+            if good_pieces:
+                spans.extend(self._merge(good_pieces,good_lengths))
+                good_pieces = []
+                good_lengths = []
+
+            if not new_separators:
+                spans.append(piece)
+            else:
+                spans.extend(self._split(text,offsets,piece[0],piece[1],new_separators))
+
+        if good_pieces:
+            spans.extend(self._merge(good_pieces,good_lengths))
+
+        return spans
+
+    @staticmethod
+    def _pieces(text:str,offsets:np.ndarray,start:int,end:int,separator:str)->List[tuple]:
+        if separator == "":
+            # Cut between tokens
+            first,last = np.searchsorted(offsets,[start,end])
+            bounds = [start] + [int(offset) for offset in offsets[first:last] if offset > start] + [end]
+        else:
+            pattern = re.compile(re.escape(separator))
+            bounds = [start] + [match.start() for match in pattern.finditer(text,start,end) if match.start() > start] + [end]
+
+        return [(a,b) for a,b in zip(bounds[:-1],bounds[1:]) if b > a]
+
+    @staticmethod
+    def _lengths(offsets:np.ndarray,pieces:List[tuple])->List[int]:
+        # Tokens starting inside each piece
+        bounds = np.asarray(pieces,dtype=np.int64).reshape(-1,2)
+        counts = np.searchsorted(offsets,bounds[:,1]) - np.searchsorted(offsets,bounds[:,0])
+
+        return counts.tolist()
+
+    def _merge(self,pieces:List[tuple],lengths:List[int])->List[tuple]:
+        # Same packing and overlap rules as TextSplitter._merge_splits, on contiguous spans
+        spans = []
+        current = []
+        total = 0
+
+        for piece,length in zip(pieces,lengths):
+            if total + length > self._chunk_size and current:
+                spans.append((current[0][0][0],current[-1][0][1]))
+
+                while total > self._chunk_overlap or (total + length > self._chunk_size and total > 0):
+                    total -= current[0][1]
+                    current = current[1:]
+
+            current.append((piece,length))
+            total += length
+
+        if current:
+            spans.append((current[0][0][0],current[-1][0][1]))
+
+        return spans
@@ -1,3 +1,4 @@
-from .indexer import TextChunker, FAISSIndexer
+from .faiss_indexer import FAISSIndexer
+from .indexer import TextChunker
 
 __all__ = ['TextChunker', 'FAISSIndexer']
@@ -0,0 +1,31 @@
+import argparse
+import os
+import time
+from pathlib import Path
+
+import sys
+# Insert the repository root first, so "indexer" resolves to the package rather than indexer/indexer.py
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.sqlite_docstore import convert_pickle_docstore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the pickled docstore (index.pkl) of a FAISS indexer directory into a SQLite docstore")
+    parser.add_argument("--faiss-indexer-directory", type=str, required=True, help="Path to the FAISS indexer directory. Example: 'vectordb_indexes/faiss_indexer_insurance'")
+    parser.add_argument("--target-directory", type=str, default=None, help="Write the converted index here instead of converting in place")
+    parser.add_argument("--remove-pickle", action="store_true", help="Delete index.pkl after an in-place conversion")
+
+    args = parser.parse_args()
+
+    directory_path = Path(args.faiss_indexer_directory)
+    if not (directory_path / "index.pkl").exists():
+        raise FileNotFoundError(f"No index.pkl found in {directory_path}")
+
+    start = time.perf_counter()
+    num_documents = convert_pickle_docstore(directory_path,args.target_directory)
+    print(f"Converted {num_documents} documents in {time.perf_counter() - start:.1f}s")
+
+    if args.remove_pickle and args.target_directory is None:
+        os.remove(directory_path / "index.pkl")
+        print(f"Removed {directory_path / 'index.pkl'}")
@@ -0,0 +1,137 @@
+import re
+import zlib
+import numpy as np
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# Mersenne prime larger than the 32-bit shingle hashes, as in the usual universal hashing scheme
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class ChunkDeduplicator():
+    """
+    Finds near-duplicate chunks with MinHash signatures and an LSH index.
+
+    Each text is normalized (lower case, collapsed whitespace) and cut into word shingles of
+    ``shingle_size`` words. ``num_perm`` MinHash values estimate the Jaccard similarity of two
+    shingle sets. The signature is split into ``bands`` bands, and texts that share a band
+    bucket are compared. A candidate counts as a duplicate when the estimated similarity
+    reaches ``threshold``.
+
+    Registered as a FAISSIndexer listener (see ``from_faiss_indexer``), it follows the chunks
+    the index gains and loses, so the LSH index always covers the whole corpus.
+    """
+
+    def __init__(self,threshold:float=0.9,num_perm:int=64,bands:int=16,shingle_size:int=5,seed:int=0):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1,1 << 31,size=num_perm,dtype=np.uint64)
+        self._b = rng.integers(0,1 << 31,size=num_perm,dtype=np.uint64)
+
+        self._signatures = {}
+        self._buckets = defaultdict(set)
+
+    @classmethod
+    def from_faiss_indexer(cls,faiss_indexer,**kwargs)->"ChunkDeduplicator":
+        deduplicator = cls(**kwargs)
+        deduplicator.add_documents(faiss_indexer.documents())
+        faiss_indexer.add_listener(deduplicator)
+
+        return deduplicator
+
+    def __len__(self)->int:
+        return len(self._signatures)
+
+    def __contains__(self,doc_id:str)->bool:
+        return doc_id in self._signatures
+
+    def signature(self,text:str)->np.ndarray:
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in self._shingles(text)],dtype=np.uint64)
+
+        # One row per permutation: (a * x + b) mod p, minimized over the shingles
+        permuted = (self._a[:,None] * hashes[None,:] + self._b[:,None]) % np.uint64(_MERSENNE_PRIME)
+
+        return permuted.min(axis=1)
+
+    def find(self,signature:np.ndarray)->Optional[str]:
+        """
+        The id of the most similar indexed chunk at or above the threshold, or None.
+        """
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key,()))
+
+        best_id = None
+        best_similarity = -1.0
+
+        # Sorted so ties resolve the same way on every run
+        for doc_id in sorted(candidates):
+            similarity = float(np.mean(self._signatures[doc_id] == signature))
+
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_id = doc_id
+                best_similarity = similarity
+
+        return best_id
+
+    def add(self,doc_id:str,signature:np.ndarray):
+        if doc_id in self._signatures:
+            return
+
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(doc_id)
+
+    def remove(self,doc_id:str):
+        signature = self._signatures.pop(doc_id,None)
+
+        if signature is None:
+            return
+
+        for key in self._band_keys(signature):
+            bucket = self._buckets[key]
+            bucket.discard(doc_id)
+
+            if not bucket:
+                del self._buckets[key]
+
+    def add_documents(self,documents:Iterable[Document]):
+        for document in documents:
+            if document.id not in self._signatures:
+                self.add(document.id,self.signature(document.page_content))
+
+    # FAISSIndexer listener interface
+    def documents_added(self,documents:List[Document]):
+        self.add_documents(documents)
+
+    def documents_removed(self,ids:List[str]):
+        for doc_id in ids:
+            self.remove(doc_id)
+
+    def _shingles(self,text:str)->List[str]:
+        words = _WHITESPACE_PATTERN.sub(" ",text.lower()).strip().split(" ")
+
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)]
+
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def _band_keys(self,signature:np.ndarray)->List[tuple]:
+        rows = self.num_perm // self.bands
+
+        return [(band,signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
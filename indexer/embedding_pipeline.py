@@ -0,0 +1,74 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, List
+
+from langchain_core.documents import Document
+
+from indexer.faiss_indexer import FAISSIndexer
+
+
+class EmbeddingPipeline():
+    """
+    Streams chunks into a FAISS index in fixed-size batches.
+
+    Batches are embedded by up to ``max_concurrency`` requests in flight while the
+    caller keeps producing chunks (e.g. splitting the next page). At most
+    ``max_concurrency`` batches are pending at any time, which bounds the memory
+    held by chunks and vectors, and each batch is appended to the index by the
+    calling thread as soon as its embeddings arrive.
+    """
+
+    def __init__(self,faiss_indexer:FAISSIndexer,batch_size:int=64,max_concurrency:int=4):
+        if batch_size < 1 or max_concurrency < 1:
+            raise ValueError("batch_size and max_concurrency must be positive")
+
+        self.faiss_indexer = faiss_indexer
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.num_batches = 0
+        self.num_chunks = 0
+
+    def run(self,chunks:Iterable[Document])->List[str]:
+        ids = []
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for batch in self._iter_batches(chunks):
+                if len(in_flight) >= self.max_concurrency:
+                    done,in_flight = wait(in_flight,return_when=FIRST_COMPLETED)
+                    ids.extend(self._append_completed(done))
+
+                in_flight.add(pool.submit(self._embed_batch,batch))
+
+            while in_flight:
+                done,in_flight = wait(in_flight,return_when=FIRST_COMPLETED)
+                ids.extend(self._append_completed(done))
+
+        return ids
+
+    def _iter_batches(self,chunks:Iterable[Document]):
+        batch = []
+
+        for chunk in chunks:
+            batch.append(chunk)
+
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _embed_batch(self,batch:List[Document])->tuple[List[Document],List[List[float]]]:
+        vectors = self.faiss_indexer.embed_documents([chunk.page_content for chunk in batch])
+        return batch,vectors
+
+    def _append_completed(self,futures:Iterable[Future])->List[str]:
+        ids = []
+
+        for future in futures:
+            batch,vectors = future.result()
+            ids.extend(self.faiss_indexer.add_embeddings(batch,vectors))
+            self.num_batches += 1
+            self.num_chunks += len(batch)
+
+        return ids
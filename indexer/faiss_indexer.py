@@ -0,0 +1,681 @@
+import faiss
+import os
+import time
+import pickle
+import uuid
+import warnings
+import numpy as np
+from pathlib import Path
+from typing import List
+from langchain_openai import OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.api_utils import get_openai_embeddings
+from core.query_cache import QueryResultCache
+from indexer.index_factory import IndexConfig, apply_search_parameters, build_index, compact_ids, search_subset, train_index
+from indexer.metadata_index import MetadataIndex, document_sources, source_key
+from indexer.sqlite_docstore import DOCSTORE_FILE_NAME, SQLiteDocstore, load_index_to_docstore_id, save_index_to_docstore_id
+import json
+
+# Native output dimension of known embedding models, so an empty index can be created without an API call
+EMBEDDING_MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Map the index file instead of reading it, so processes on one host share the page cache.
+# IO_FLAG_MMAP_IFC also maps flat / scalar-quantized codes (it is missing from older faiss
+# builds); IVF readers reject it, their inverted lists are mapped by IO_FLAG_MMAP alone
+_MMAP_IO_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+_MMAP_FLAT_CODES_IO_FLAGS = _MMAP_IO_FLAGS | getattr(faiss,"IO_FLAG_MMAP_IFC",0)
+
+
+def search_vector_store_ids(vector_store:FAISS,embeddings:List[List[float]],k:int)->tuple:
+    """
+    (distances, FAISS positions) matrices for many query vectors from one index.search call.
+    Missing results have position -1.
+    """
+    vectors = np.array(embeddings,dtype=np.float32)
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(vectors)
+
+    return vector_store.index.search(vectors,k)
+
+
+def documents_for_ids(vector_store:FAISS,distances:np.ndarray,labels:np.ndarray)->List[tuple]:
+    """
+    (document, distance) pairs for one row of search results, skipping missing positions.
+    """
+    index_to_docstore_id = vector_store.index_to_docstore_id
+
+    return [(vector_store.docstore.search(index_to_docstore_id[label]),float(distance))
+            for distance,label in zip(distances,labels) if label >= 0]
+
+
+def search_vector_store_many(vector_store:FAISS,embeddings:List[List[float]],k:int)->List[List[tuple]]:
+    """
+    Search a LangChain FAISS store for many query vectors with one index.search call. Returns
+    (document, score) lists in query order, with scores as similarity_search_with_score gives them.
+    """
+    if len(embeddings) == 0:
+        return []
+
+    distances,labels = search_vector_store_ids(vector_store,embeddings,k)
+
+    return [documents_for_ids(vector_store,row_distances,row_labels) for row_distances,row_labels in zip(distances,labels)]
+
+
+class FAISSIndexer():
+    """
+    A simple FAISS indexer using OpenAI embeddings.
+    Supports loading existing databases or creating new ones.
+    """
+    
+    @classmethod
+    def from_small_embedding(cls,embedding_model_name:str="text-embedding-3-small",directory_path:str=None, # type: ignore
+                             dimension:int=1536,embedding_cache_path:str=None,index_config:IndexConfig=None,
+                             docstore_backend:str=None,mmap:bool=False,query_cache:QueryResultCache=None):
+        embeddings = get_openai_embeddings(model=embedding_model_name,cache_path=embedding_cache_path,dimensions=dimension)
+
+        return cls(embeddings,directory_path,index_config=index_config,docstore_backend=docstore_backend,mmap=mmap,
+                   query_cache=query_cache)
+
+
+    def __init__(self,embedding_model: OpenAIEmbeddings,directory_path:str=None,index_config:IndexConfig=None,
+                 docstore_backend:str=None,mmap:bool=False,query_cache:QueryResultCache=None): 
+        """
+        Initialize the FAISS indexer.
+        
+        Args:
+            directory_path (str): Directory to store/load the vector database
+            embedding_model (OpenAIEmbeddings): OpenAI embeddings model
+            index_config (IndexConfig): Index type and search parameters for a new index. An existing
+                index keeps the config recorded in its metadata (flat if none)
+            docstore_backend (str): "memory" (pickled into index.pkl) or "sqlite" (docstore.sqlite, documents
+                fetched lazily per query) for a new index. An existing index keeps the backend it was saved with
+            mmap (bool): Load an existing index read-only, memory-mapping index.faiss (and opening docstore.sqlite
+                read-only) so several worker processes share one copy. Every write raises PermissionError
+            query_cache (QueryResultCache): Cache retrieve() results; entries are keyed by ``index_id``, unique
+                to this instance, and by the index version, which every add, removal and save bumps
+
+        IVF / PQ / SQ indexes are trained on a sample of the corpus: their first vectors are held back
+        until ``training_sample_size`` of them arrived, or until ``vector_store`` is next used (see flush).
+        """
+        start = time.perf_counter()
+
+        self.embedding_model = embedding_model
+        self.directory_path = directory_path
+        self.metadata = {}
+        self.timings = {}
+        self._vector_store = None
+        self._listeners = []
+        self.query_cache = query_cache
+        self.index_id = uuid.uuid4().hex
+        self.version = 0
+        self._metadata_index = None
+        # Documents and vectors held back until an untrained index has enough of them to train on
+        self._pending = {}
+
+        # Only the small JSON metadata is read eagerly; the index itself is loaded on first use
+        if self._has_existing_index():
+            self._load_metadata(os.path.join(Path(directory_path),"custom_metadata.json"))
+            index_config = IndexConfig.from_dict(self.metadata.get("index",{}))
+            docstore_backend = "sqlite" if (Path(directory_path) / DOCSTORE_FILE_NAME).exists() else "memory"
+        else:
+            index_config = index_config if index_config is not None else IndexConfig()
+            docstore_backend = docstore_backend if docstore_backend is not None else "memory"
+
+        if docstore_backend not in ("memory","sqlite"):
+            raise ValueError(f"Docstore backend {docstore_backend} not supported")
+
+        if mmap and not self._has_existing_index():
+            raise ValueError(f"mmap mode needs an existing index, none found at {directory_path}")
+
+        self.index_config = index_config
+        self.docstore_backend = docstore_backend
+        self.mmap = mmap
+
+        self.timings["construct_seconds"] = time.perf_counter() - start
+
+    @property
+    def vector_store(self)->FAISS:
+        # Callers always see every added document, so held-back vectors are added first
+        self.flush()
+        return self._loaded_vector_store()
+
+    def _loaded_vector_store(self)->FAISS:
+        if self._vector_store is None:
+            start = time.perf_counter()
+
+            if self._has_existing_index():
+                self._load_existing_index(self.directory_path)
+                self.timings["load_index_seconds"] = time.perf_counter() - start
+            else:
+                self._initialize_index()
+                self.timings["initialize_index_seconds"] = time.perf_counter() - start
+
+        return self._vector_store
+
+    @property
+    def is_loaded(self)->bool:
+        return self._vector_store is not None
+
+    @property
+    def mode(self)->str:
+        return "mmap (read-only)" if self.mmap else "read-write"
+
+    def __repr__(self)->str:
+        return (f"FAISSIndexer(directory_path={self.directory_path!r}, mode={self.mode!r}, "
+                f"index_type={self.index_config.index_type!r}, docstore={self.docstore_backend!r}, loaded={self.is_loaded})")
+
+    def add_listener(self,listener):
+        """
+        Keep a derived index in sync: ``listener.documents_added(documents)`` is called after
+        documents are added (with their docstore ids set) and ``listener.documents_removed(ids)``
+        after they are removed.
+        """
+        self._listeners.append(listener)
+
+    def _check_writable(self):
+        if self.mmap:
+            raise PermissionError(f"FAISSIndexer at {self.directory_path} is loaded in mmap (read-only) mode; "
+                                  f"reload it with mmap=False to modify the index")
+
+    def _has_existing_index(self)->bool:
+        return self.directory_path is not None and self._is_index_exists(self.directory_path)
+
+    def _is_index_exists(self,directory_path:str):
+        if not os.path.exists(directory_path):
+            return False
+        
+        for file in os.listdir(directory_path):
+            if file.endswith(".faiss"):
+                return True
+        
+        return False
+
+    def get_embedding_dimension(self)->int:
+        dimension = getattr(self.embedding_model,"dimensions",None)
+
+        if dimension is None:
+            dimension = EMBEDDING_MODEL_DIMENSIONS.get(getattr(self.embedding_model,"model",None))
+
+        if dimension is None:
+            # Unknown model - fall back to probing it, which costs one embedding call
+            dimension = len(self.embedding_model.embed_query("hello world"))
+
+        return dimension
+
+    def _initialize_index(self):
+        index = build_index(self.index_config,self.get_embedding_dimension())
+
+        self._vector_store = self._new_vector_store(FAISS,
+            embedding_function=self.embedding_model,
+            index=index,
+            docstore=SQLiteDocstore() if self.docstore_backend == "sqlite" else InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+
+    def _new_vector_store(self,factory,*args,**kwargs)->FAISS:
+        with warnings.catch_warnings():
+            # LangChain warns that normalize_L2 does not apply to inner product, yet it still normalizes
+            # added vectors and queries, which is what makes the inner product a cosine similarity
+            warnings.filterwarnings("ignore",message="Normalizing L2 is not applicable",category=UserWarning)
+            return factory(*args,**kwargs,**self._vector_store_options())
+
+    def _vector_store_options(self)->dict:
+        # Cosine similarity: LangChain normalizes added vectors and queries, the index scores by inner product
+        if self.index_config.normalize_vectors:
+            return {"normalize_L2": True,"distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT}
+
+        return {}
+
+    def _load_existing_index(self,directory_path:str):
+        if self.mmap:
+            self._load_existing_index_mmap(directory_path)
+        elif self.docstore_backend == "sqlite":
+            # Only the vectors and the id mapping are read; documents are fetched per query
+            self._vector_store = self._new_vector_store(FAISS,
+                embedding_function=self.embedding_model,
+                index=faiss.read_index(os.path.join(Path(directory_path),"index.faiss")),
+                docstore=SQLiteDocstore(Path(directory_path) / DOCSTORE_FILE_NAME),
+                index_to_docstore_id=load_index_to_docstore_id(directory_path),
+            )
+        else:
+            self._vector_store = self._new_vector_store(FAISS.load_local,directory_path,self.embedding_model,
+                                                        allow_dangerous_deserialization=True)
+
+        apply_search_parameters(self._vector_store.index,self.index_config)
+
+    def _load_existing_index_mmap(self,directory_path:str):
+        io_flags = _MMAP_IO_FLAGS if self.index_config.index_type in ("ivf_flat","ivf_pq") else _MMAP_FLAT_CODES_IO_FLAGS
+        index = faiss.read_index(os.path.join(Path(directory_path),"index.faiss"),io_flags)
+
+        if self.docstore_backend == "sqlite":
+            docstore = SQLiteDocstore(Path(directory_path) / DOCSTORE_FILE_NAME,read_only=True)
+            index_to_docstore_id = load_index_to_docstore_id(directory_path)
+        else:
+            # A pickled docstore cannot be shared between processes; convert_docstore_cli.py turns it into SQLite
+            warnings.warn(f"FAISSIndexer mmap mode: {directory_path} has a pickled docstore, which is still loaded per process")
+
+            with open(os.path.join(Path(directory_path),"index.pkl"),"rb") as f:
+                docstore,index_to_docstore_id = pickle.load(f)
+
+        self._vector_store = self._new_vector_store(FAISS,
+            embedding_function=self.embedding_model,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def set_search_parameters(self,nprobe:int=None,ef_search:int=None):
+        """
+        Trade recall for speed at search time (IVF: number of probed clusters, HNSW: candidate list size).
+        """
+        if nprobe is not None:
+            self.index_config.nprobe = nprobe
+
+        if ef_search is not None:
+            self.index_config.ef_search = ef_search
+
+        if self.is_loaded:
+            apply_search_parameters(self._vector_store.index,self.index_config)
+
+    def _load_metadata(self,file_path:Path):
+        if not os.path.exists(file_path):
+            return
+
+        with open(file_path,"r") as f:
+            self.metadata = json.load(f)
+
+        # Indexes saved before sources were keyed by resolved path recorded them as given
+        if "sources" in self.metadata:
+            self.metadata["sources"] = {source_key(source): entry for source,entry in self.metadata["sources"].items()}
+
+    def add_documents(self,documents:List[Document])->List[str]:
+        # Fail before paying for embeddings
+        self._check_writable()
+
+        if len(documents) == 0:
+            return []
+
+        embeddings = self.embed_documents([doc.page_content for doc in documents])
+
+        return self.add_embeddings(documents,embeddings)
+
+    def embed_documents(self,texts:List[str])->List[List[float]]:
+        return self.embedding_model.embed_documents(texts)
+
+    def add_embeddings(self,documents:List[Document],embeddings:List[List[float]])->List[str]:
+        """
+        Append documents whose vectors were computed by the caller (see EmbeddingPipeline).
+        """
+        self._check_writable()
+
+        if len(documents) == 0:
+            return []
+
+        if self._loaded_vector_store().index.is_trained:
+            return self._add_to_index(documents,embeddings)
+
+        # Ids are assigned now, so callers can record them before the vectors reach the index
+        ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+
+        for doc_id,doc,embedding in zip(ids,documents,np.asarray(embeddings,dtype=np.float32)):
+            self._pending[doc_id] = (Document(id=doc_id,page_content=doc.page_content,metadata=doc.metadata),embedding)
+
+        if len(self._pending) >= self.index_config.training_sample_size:
+            self.flush()
+
+        return ids
+
+    def flush(self):
+        """
+        Train the index on the held-back vectors and add them. Every use of ``vector_store`` (searches,
+        save) calls it first; it raises ValueError when there are still too few vectors to train on (fewer than nlist
+        for IVF), in which case lower nlist or use a flat index.
+        """
+        if not self._pending:
+            return
+
+        documents = [doc for doc,_ in self._pending.values()]
+        embeddings = np.stack([embedding for _,embedding in self._pending.values()])
+
+        train_index(self._loaded_vector_store().index,embeddings,self.index_config)
+        self._pending = {}
+
+        self._add_to_index(documents,embeddings)
+
+    def _add_to_index(self,documents:List[Document],embeddings)->List[str]:
+        texts_embeddings = [(doc.page_content,embedding) for doc,embedding in zip(documents,embeddings)]
+        metadatas = [doc.metadata for doc in documents]
+        ids = [doc.id for doc in documents] if all(doc.id for doc in documents) else None
+
+        ids = self._loaded_vector_store().add_embeddings(texts_embeddings,metadatas=metadatas,ids=ids)
+        self.version += 1
+
+        if self._metadata_index is not None:
+            self._metadata_index.add(documents)
+
+        if self._listeners:
+            added = [Document(id=doc_id,page_content=doc.page_content,metadata=doc.metadata) for doc_id,doc in zip(ids,documents)]
+
+            for listener in self._listeners:
+                listener.documents_added(added)
+
+        return ids
+
+    def is_source_up_to_date(self,source_path:Path,content_hash:str)->bool:
+        source = self.metadata.get("sources",{}).get(source_key(source_path))
+
+        return source is not None and source["sha256"] == content_hash
+
+    def replace_source_documents(self,source_path:Path,documents:List[Document],content_hash:str):
+        """
+        Swap the vectors of a source file for a new set of chunks, recording the
+        content hash and the docstore ids so the next change can remove them again.
+        """
+        self.remove_source(source_path)
+        ids = self.add_documents(documents)
+        self.record_source(source_path,content_hash,ids)
+
+    def record_source(self,source_path:Path,content_hash:str,ids:List[str]):
+        self._check_writable()
+
+        self.metadata.setdefault("sources",{})
+        self.metadata["sources"][source_key(source_path)] = {"sha256":content_hash,"ids":ids}
+
+    def remove_source(self,source_path:Path)->int:
+        self._check_writable()
+
+        source = self.metadata.get("sources",{}).pop(source_key(source_path),None)
+
+        if source is not None:
+            ids = source["ids"]
+        else:
+            # Indexes built before content hashes were recorded only know the source from the chunk metadata
+            ids = self._find_ids_by_source(source_path)
+
+        vector_store = self._loaded_vector_store()
+        indexed_ids = set(vector_store.index_to_docstore_id.values())
+        ids = [doc_id for doc_id in ids if doc_id in indexed_ids or doc_id in self._pending]
+
+        # Chunks shared with other files (see ChunkDeduplicator) only lose this source
+        shared_ids = {doc_id for doc_id in ids if len(document_sources(self._get_document(doc_id))) > 1}
+        for doc_id in shared_ids:
+            self._detach_source(doc_id,source_path)
+
+        ids = [doc_id for doc_id in ids if doc_id not in shared_ids]
+
+        # Held-back chunks never reached the index
+        pending_ids = [doc_id for doc_id in ids if doc_id in self._pending]
+        for doc_id in pending_ids:
+            del self._pending[doc_id]
+
+        if pending_ids:
+            for listener in self._listeners:
+                listener.documents_removed(pending_ids)
+
+        ids = [doc_id for doc_id in ids if doc_id in indexed_ids]
+
+        if ids:
+            if not self.index_config.supports_remove:
+                raise ValueError(f"Index {self.index_config.factory_string()} does not support removing vectors. "
+                                 f"Rebuild the index to re-index {source_path}")
+
+            # FAISS.delete drops the vectors with index.remove_ids and the docstore entries, then
+            # renumbers index_to_docstore_id; IVF ids are renumbered the same way
+            vector_store.delete(ids)
+            compact_ids(vector_store.index)
+            self.version += 1
+            self._metadata_index = None
+
+            for listener in self._listeners:
+                listener.documents_removed(ids)
+
+        return len(ids)
+
+    def add_document_source(self,doc_id:str,source_path:Path):
+        """
+        Record that an indexed chunk also belongs to ``source_path`` (a near-duplicate found in
+        another file), listing every file in ``metadata["sources"]``.
+        """
+        self._check_writable()
+
+        document = self._get_document(doc_id)
+        sources = document_sources(document)
+
+        if source_key(source_path) not in {source_key(source) for source in sources}:
+            self._update_document(doc_id,{**document.metadata,"sources":sources + [str(source_path)]},document)
+
+    def _detach_source(self,doc_id:str,source_path:Path):
+        key = source_key(source_path)
+        document = self._get_document(doc_id)
+        sources = [source for source in document_sources(document) if source_key(source) != key]
+        metadata = {**document.metadata,"sources":sources}
+
+        if metadata.get("source") is not None and source_key(metadata["source"]) == key:
+            metadata["source"] = sources[0]
+
+        self._update_document(doc_id,metadata,document)
+
+    def _update_document(self,doc_id:str,metadata:dict,document:Document):
+        updated = Document(id=doc_id,page_content=document.page_content,metadata=metadata)
+        docstore = self._loaded_vector_store().docstore
+
+        if doc_id in self._pending:
+            self._pending[doc_id] = (updated,self._pending[doc_id][1])
+        elif isinstance(docstore,SQLiteDocstore):
+            docstore.update(doc_id,updated)
+        else:
+            docstore._dict[doc_id] = updated
+
+        self.version += 1
+        self._metadata_index = None
+
+    def _get_document(self,doc_id:str)->Document:
+        if doc_id in self._pending:
+            return self._pending[doc_id][0]
+
+        return self._loaded_vector_store().docstore.search(doc_id)
+
+    def _find_ids_by_source(self,source_path:Path)->List[str]:
+        key = source_key(source_path)
+        documents = list(self._iter_documents()) + [(doc_id,doc) for doc_id,(doc,_) in self._pending.items()]
+        # Chunks store their source as it was given; resolve each distinct spelling once
+        keys = {}
+
+        return [doc_id for doc_id,doc in documents
+                if key in (keys.setdefault(source,source_key(source)) for source in document_sources(doc))]
+
+    def documents(self)->List[Document]:
+        """
+        All indexed documents, in FAISS id order.
+        """
+        index_to_docstore_id = self.vector_store.index_to_docstore_id
+        documents = dict(self._iter_documents())
+
+        return [documents[index_to_docstore_id[position]] for position in range(len(index_to_docstore_id))]
+
+    def _iter_documents(self):
+        docstore = self._loaded_vector_store().docstore
+
+        if isinstance(docstore,SQLiteDocstore):
+            return docstore.items()
+
+        return docstore._dict.items()
+
+    def retrieve(self,query:str,**kwargs):
+        """
+        Return the ``num_documents`` (default 10) chunks closest to ``query``. A dict ``filter``
+        such as {"client": "client3", "page": [1, 2], "has_tables": True} restricts the search
+        itself to the matching chunks (see MetadataIndex); a callable filter is applied by
+        LangChain to the top candidates instead.
+        """
+        num_documents = kwargs.get("num_documents",self._get_num_documents(**kwargs))
+        search_filter = kwargs.get("filter")
+
+        if self.query_cache is None:
+            return [doc for doc,_ in self.search_with_scores(query,num_documents,search_filter)]
+
+        key = QueryResultCache.make_key(query,num_documents,self.version,filters=search_filter,index_id=self.index_id)
+        documents = self.query_cache.get(key)
+
+        if documents is None:
+            documents = [doc for doc,_ in self.search_with_scores(query,num_documents,search_filter)]
+            self.query_cache.put(key,documents)
+
+        return list(documents)
+    
+    def embed_query(self,query:str)->List[float]:
+        return self.embedding_model.embed_query(query)
+
+    def retrieve_by_vector(self,embedding:List[float],**kwargs)->List[Document]:
+        """
+        Like retrieve, for a query the caller has already embedded (results are not cached).
+        """
+        num_documents = kwargs.get("num_documents",self._get_num_documents(**kwargs))
+        return [doc for doc,_ in self.search_by_vector_with_scores(embedding,num_documents,kwargs.get("filter"))]
+
+    def retrieve_many(self,queries:List[str],num_documents:int=10)->List[List[Document]]:
+        """
+        Retrieve for many queries at once: the queries not found in the query cache are embedded
+        with a single embed_documents call and searched with a single index.search. Results
+        are returned in query order.
+        """
+        results = [None] * len(queries)
+        keys = [None] * len(queries)
+
+        if self.query_cache is not None:
+            for position,query in enumerate(queries):
+                keys[position] = QueryResultCache.make_key(query,num_documents,self.version,index_id=self.index_id)
+                cached = self.query_cache.get(keys[position])
+                results[position] = list(cached) if cached is not None else None
+
+        missing = [position for position,documents in enumerate(results) if documents is None]
+
+        if missing:
+            embeddings = self.embedding_model.embed_documents([queries[position] for position in missing])
+            found = self.search_many_by_vector_with_scores(embeddings,num_documents)
+
+            for position,scored_documents in zip(missing,found):
+                results[position] = [doc for doc,_ in scored_documents]
+
+                if self.query_cache is not None:
+                    self.query_cache.put(keys[position],results[position])
+
+        return results
+
+    def search_many_by_vector_with_scores(self,embeddings:List[List[float]],num_documents:int=10)->List[List[tuple]]:
+        if self._is_empty():
+            return [[] for _ in embeddings]
+
+        return search_vector_store_many(self.vector_store,embeddings,num_documents)
+
+    def search_with_scores(self,query:str,num_documents:int=10,filter=None)->List[tuple]:
+        """
+        (document, score) pairs as LangChain returns them: a distance for L2 indexes, a similarity for inner product.
+        """
+        return self.search_by_vector_with_scores(self.embed_query(query),num_documents,filter)
+
+    def search_by_vector_with_scores(self,embedding:List[float],num_documents:int=10,filter=None)->List[tuple]:
+        if self._is_empty():
+            return []
+
+        if not isinstance(filter,dict):
+            return self.vector_store.similarity_search_with_score_by_vector(embedding,num_documents,filter=filter)
+
+        distances,labels = self.search_ids_by_vector(embedding,num_documents,filter)
+
+        return documents_for_ids(self.vector_store,distances,labels)
+
+    def search_ids_by_vector(self,embedding:List[float],num_documents:int=10,filter:dict=None)->tuple:
+        """
+        (distances, FAISS positions) of the closest vectors, optionally restricted by a metadata filter.
+        """
+        if self._is_empty():
+            return np.zeros(0,dtype=np.float32),np.zeros(0,dtype=np.int64)
+
+        query = np.array([embedding],dtype=np.float32)
+        if self.index_config.normalize_vectors:
+            faiss.normalize_L2(query)
+
+        if filter is None:
+            distances,labels = self.vector_store.index.search(query,num_documents)
+        else:
+            positions = self.metadata_index.resolve(filter)
+
+            if len(positions) == 0:
+                return np.zeros(0,dtype=np.float32),np.zeros(0,dtype=np.int64)
+
+            distances,labels = search_subset(self.vector_store.index,self.index_config,query,num_documents,positions)
+
+        found = labels[0] >= 0
+
+        return distances[0][found],labels[0][found]
+
+    def _is_empty(self)->bool:
+        # faiss refuses to search an sq8/IVF/PQ index that was never trained, i.e. one with no vectors yet
+        index = self.vector_store.index
+        return index.ntotal == 0 or not index.is_trained
+
+    @property
+    def metadata_index(self)->MetadataIndex:
+        # Rebuilt from the docstore when vectors were removed; additions are appended as they happen
+        if self._metadata_index is None or self._metadata_index.num_documents != len(self.vector_store.index_to_docstore_id):
+            self._metadata_index = MetadataIndex.build(self.documents())
+
+        return self._metadata_index
+
+    def _get_num_documents(self,**kwargs):
+        # TODO: Implement a better way to get the number of documents?
+        return 10
+
+    def save(self,directory_path:str):
+        self._check_writable()
+
+        os.makedirs(directory_path,exist_ok=True)
+        self.metadata["index"] = self.index_config.to_dict()
+
+        if self.docstore_backend == "sqlite":
+            faiss.write_index(self.vector_store.index,os.path.join(Path(directory_path),"index.faiss"))
+            self.vector_store.docstore.save(Path(directory_path) / DOCSTORE_FILE_NAME)
+            save_index_to_docstore_id(self.vector_store.index_to_docstore_id,directory_path)
+        else:
+            self.vector_store.save_local(directory_path) 
+
+        self._save_metadata(os.path.join(Path(directory_path),"custom_metadata.json"))
+        # Other processes may reload the saved directory; results cached before the save are not reused
+        self.version += 1
+
+    def _save_metadata(self,file_path:Path):
+        with open(file_path,"w") as f:
+            json.dump(self.metadata,f)
+
+    def audit_processed_pdf(self,pdf_path:Path):
+        self._check_writable()
+
+        self.metadata.setdefault("processed_pdfs",[])
+
+        if source_key(pdf_path) not in self.metadata["processed_pdfs"]:
+            self.metadata["processed_pdfs"].append(source_key(pdf_path))
+
+    def audit_splitter(self,text_splitter:RecursiveCharacterTextSplitter):
+        self._check_writable()
+
+        self.metadata.setdefault("text_splitter",{})
+        self.metadata["text_splitter"]["class_name"] = text_splitter.__class__.__name__
+
+        self.metadata["text_splitter"]["params"] = {
+            "chunk_size": text_splitter._chunk_size,
+            "chunk_overlap": text_splitter._chunk_overlap,
+            "length_function": text_splitter._length_function.__name__
+        }
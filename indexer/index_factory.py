@@ -0,0 +1,382 @@
+import faiss
+import json
+import os
+import shutil
+import numpy as np
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+
+INDEX_TYPES = ["flat","ivf_flat","ivf_pq","hnsw","sq8"]
+METRICS = {"l2": faiss.METRIC_L2,"inner_product": faiss.METRIC_INNER_PRODUCT}
+ENCODINGS = {"flat": "Flat","fp16": "SQfp16","sq8": "SQ8"}
+
+
+@dataclass
+class IndexConfig:
+    """
+    Describes which FAISS index backs a FAISSIndexer and how it is trained and searched.
+
+    index_type:
+        flat      exact brute-force search (IndexFlatL2)
+        ivf_flat  inverted file over ``nlist`` clusters, exact vectors per cluster
+        ivf_pq    inverted file with product-quantized vectors (``pq_m`` bytes each at 8 bits)
+        hnsw      graph index, no training needed, does not support removing vectors
+        sq8       exact scan over 8-bit scalar-quantized vectors (same as flat with encoding sq8)
+
+    metric:
+        l2             euclidean distance on the raw embeddings
+        inner_product  cosine similarity: vectors and queries are L2-normalized, then scored by inner product
+
+    encoding:
+        How flat, ivf_flat and hnsw store vectors: float32 (``flat``), float16 (``fp16``, half
+        the size) or 8-bit scalar quantization (``sq8``, a quarter of the size).
+
+    refine:
+        Re-rank the ``refine_k_factor * k`` best candidates of the compressed index against a
+        float32 copy of the vectors. It restores most of the recall lost to compression, but
+        the copy is stored in index.faiss as well and vectors can no longer be removed.
+    """
+    index_type: str = "flat"
+    metric: str = "l2"
+    encoding: str = "flat"
+    refine: bool = False
+    refine_k_factor: int = 4
+    # IVF
+    nlist: int = 100
+    nprobe: int = 8
+    # PQ
+    pq_m: int = 16
+    pq_nbits: int = 8
+    # HNSW
+    hnsw_m: int = 32
+    ef_construction: int = 40
+    ef_search: int = 64
+    # Maximum number of vectors used to train IVF / PQ / SQ indexes
+    training_sample_size: int = 20000
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Index type {self.index_type} not supported. Choose one of {INDEX_TYPES}")
+
+        if self.metric not in METRICS:
+            raise ValueError(f"Metric {self.metric} not supported. Choose one of {list(METRICS)}")
+
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"Encoding {self.encoding} not supported. Choose one of {list(ENCODINGS)}")
+
+        if self.encoding != "flat" and self.index_type in ("ivf_pq","sq8"):
+            raise ValueError(f"Index type {self.index_type} has its own encoding, leave encoding as 'flat'")
+
+    def factory_string(self)->str:
+        codes = ENCODINGS[self.encoding]
+
+        if self.index_type == "flat":
+            factory = codes
+        elif self.index_type == "ivf_flat":
+            factory = f"IVF{self.nlist},{codes}"
+        elif self.index_type == "ivf_pq":
+            factory = f"IVF{self.nlist},PQ{self.pq_m}x{self.pq_nbits}"
+        elif self.index_type == "hnsw":
+            factory = f"HNSW{self.hnsw_m},{codes}"
+        else:
+            factory = "SQ8"
+
+        return f"{factory},RFlat" if self.refine else factory
+
+    @property
+    def faiss_metric(self)->int:
+        return METRICS[self.metric]
+
+    @property
+    def normalize_vectors(self)->bool:
+        return self.metric == "inner_product"
+
+    @property
+    def supports_remove(self)->bool:
+        return self.index_type != "hnsw" and not self.refine
+
+    def to_dict(self)->dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls,config:dict)->"IndexConfig":
+        known_fields = {field.name for field in fields(cls)}
+        return cls(**{key:value for key,value in config.items() if key in known_fields})
+
+
+def build_index(config:IndexConfig,dimension:int)->faiss.Index:
+    index = faiss.index_factory(dimension,config.factory_string(),config.faiss_metric)
+
+    if config.index_type == "hnsw":
+        _base_index(index).hnsw.efConstruction = config.ef_construction
+
+    apply_search_parameters(index,config)
+
+    return index
+
+
+def apply_search_parameters(index:faiss.Index,config:IndexConfig,nprobe:int=None,ef_search:int=None):
+    ivf = _extract_ivf(index)
+
+    if ivf is not None:
+        ivf.nprobe = nprobe if nprobe is not None else config.nprobe
+
+    hnsw_index = _base_index(index)
+
+    if hasattr(hnsw_index,"hnsw"):
+        hnsw_index.hnsw.efSearch = ef_search if ef_search is not None else config.ef_search
+
+    refine_index = faiss.downcast_index(index)
+
+    if hasattr(refine_index,"k_factor"):
+        refine_index.k_factor = config.refine_k_factor
+
+
+def search_subset(index:faiss.Index,config:IndexConfig,queries:np.ndarray,k:int,ids:np.ndarray)->tuple:
+    """
+    Search only the vectors whose ids are in ``ids``, filtering inside the index scan with an
+    IDSelector. Queries must already be normalized for an inner-product index. When an
+    approximate index returns fewer than ``min(k, len(ids))`` results (unvisited IVF clusters,
+    HNSW graph cut off by a selective filter), the subset is searched exhaustively instead.
+    """
+    queries = np.ascontiguousarray(queries,dtype=np.float32)
+    ids = np.ascontiguousarray(ids,dtype=np.int64)
+    selector = faiss.IDSelectorBatch(ids)
+
+    distances,labels = index.search(queries,k,params=_search_parameters(index,config,selector))
+
+    expected = min(k,len(ids))
+    if np.all((labels >= 0).sum(axis=1) >= expected):
+        return distances,labels
+
+    ivf = _extract_ivf(index)
+
+    if ivf is not None:
+        return index.search(queries,k,params=_search_parameters(index,config,selector,nprobe=ivf.nlist))
+
+    # Exact search over the reconstructed subset
+    subset_index = faiss.IndexFlat(index.d,config.faiss_metric)
+    subset_index.add(index.reconstruct_batch(ids))
+    distances,positions = subset_index.search(queries,k)
+    labels = np.where(positions >= 0,ids[np.maximum(positions,0)],-1)
+
+    return distances,labels
+
+
+def reconstruct_vectors(index:faiss.Index,ids:np.ndarray)->np.ndarray:
+    """
+    The stored vectors for ``ids``, as the index encodes them. IVF indexes get a hashtable
+    direct map on first use, which keeps remove_ids working.
+    """
+    ids = np.ascontiguousarray(ids,dtype=np.int64)
+    ivf = _extract_ivf(index)
+
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    return index.reconstruct_batch(ids)
+
+
+def compact_ids(index:faiss.Index):
+    """
+    Renumber the ids stored in an IVF index to 0..ntotal-1, keeping their order.
+
+    Flat indexes shift their codes down on remove_ids, which is what LangChain's FAISS.delete
+    assumes when it renumbers index_to_docstore_id. IVF indexes keep the ids of the remaining
+    vectors instead, and new vectors would be added under ids that are still in use.
+    """
+    ivf = _extract_ivf(index)
+
+    if ivf is None or ivf.ntotal == 0:
+        return
+
+    invlists = ivf.invlists
+    list_ids = [faiss.rev_swig_ptr(invlists.get_ids(list_no),invlists.list_size(list_no)).copy()
+                if invlists.list_size(list_no) > 0 else np.zeros(0,dtype=np.int64) for list_no in range(ivf.nlist)]
+    remaining = np.unique(np.concatenate(list_ids))
+
+    if remaining[-1] == len(remaining) - 1:
+        return
+
+    direct_map_type = ivf.direct_map.type
+    if direct_map_type != faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+
+    for list_no,ids in enumerate(list_ids):
+        if len(ids) == 0:
+            continue
+
+        new_ids = np.searchsorted(remaining,ids).astype(np.int64)
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no),len(ids) * invlists.code_size).copy()
+        invlists.update_entries(list_no,0,len(ids),faiss.swig_ptr(new_ids),faiss.swig_ptr(codes))
+
+    if direct_map_type != faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(direct_map_type)
+
+
+def _search_parameters(index:faiss.Index,config:IndexConfig,selector,nprobe:int=None):
+    base_index = _base_index(index)
+
+    if _extract_ivf(index) is not None:
+        parameters = faiss.SearchParametersIVF(sel=selector,nprobe=nprobe if nprobe is not None else config.nprobe)
+    elif hasattr(base_index,"hnsw"):
+        parameters = faiss.SearchParametersHNSW(sel=selector,efSearch=config.ef_search)
+    else:
+        parameters = faiss.SearchParameters(sel=selector)
+
+    if hasattr(faiss.downcast_index(index),"k_factor"):
+        # A refined index takes the selector through the parameters of its base index
+        refine_parameters = faiss.IndexRefineSearchParameters(k_factor=config.refine_k_factor,base_index_params=parameters)
+        # SWIG does not keep the nested parameters alive on its own
+        refine_parameters.referenced_objects = [parameters,selector]
+        return refine_parameters
+
+    parameters.referenced_objects = [selector]
+    return parameters
+
+
+def train_index(index:faiss.Index,vectors:np.ndarray,config:IndexConfig,seed:int=0):
+    if index.is_trained:
+        return
+
+    vectors = np.array(vectors,dtype=np.float32)
+    if config.normalize_vectors:
+        faiss.normalize_L2(vectors)
+
+    min_training_size = _min_training_size(config)
+
+    if len(vectors) < min_training_size:
+        raise ValueError(f"Index type {config.index_type} needs at least {min_training_size} vectors to train, got {len(vectors)}. "
+                         f"Add more documents in the first batch, lower nlist, or build a flat index and migrate it")
+
+    if len(vectors) > config.training_sample_size:
+        sample_ids = np.random.default_rng(seed).choice(len(vectors),config.training_sample_size,replace=False)
+        vectors = vectors[np.sort(sample_ids)]
+
+    index.train(vectors)
+
+
+def reconstruct_all(index:faiss.Index)->np.ndarray:
+    if index.ntotal == 0:
+        return np.zeros((0,index.d),dtype=np.float32)
+
+    ivf = _extract_ivf(index)
+
+    if ivf is None or ivf.direct_map.type != faiss.DirectMap.NoMap:
+        return index.reconstruct_n(0,index.ntotal)
+
+    # IVF indexes need an id -> list map to reconstruct; it is dropped again
+    # afterwards because remove_ids does not support it
+    ivf.make_direct_map()
+
+    try:
+        return index.reconstruct_n(0,index.ntotal)
+    finally:
+        ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+
+
+def convert_index(index:faiss.Index,config:IndexConfig)->faiss.Index:
+    """
+    Rebuild an index as another type from its stored vectors, keeping the vector order
+    (and therefore the FAISS id to docstore id mapping) unchanged.
+    """
+    vectors = reconstruct_all(index)
+    if config.normalize_vectors:
+        faiss.normalize_L2(vectors)
+
+    new_index = build_index(config,index.d)
+    train_index(new_index,vectors,config)
+
+    if len(vectors) > 0:
+        new_index.add(vectors)
+
+    return new_index
+
+
+def migrate_index_directory(source_directory:Path,target_directory:Path,config:IndexConfig)->faiss.Index:
+    """
+    Convert a saved FAISSIndexer directory into another index type without re-embedding.
+    The docstore (index.pkl) is copied as is and custom_metadata.json records the new config.
+    """
+    source_directory = Path(source_directory)
+    target_directory = Path(target_directory)
+
+    index = faiss.read_index(str(source_directory / "index.faiss"))
+    new_index = convert_index(index,config)
+
+    os.makedirs(target_directory,exist_ok=True)
+    faiss.write_index(new_index,str(target_directory / "index.faiss"))
+
+    for file_name in os.listdir(source_directory):
+        if file_name not in ("index.faiss","custom_metadata.json"):
+            source_path = source_directory / file_name
+
+            if source_path.is_file():
+                shutil.copy2(source_path,target_directory / file_name)
+
+    metadata = {}
+    metadata_path = source_directory / "custom_metadata.json"
+
+    if metadata_path.exists():
+        with open(metadata_path,"r") as f:
+            metadata = json.load(f)
+
+    metadata["index"] = config.to_dict()
+
+    with open(target_directory / "custom_metadata.json","w") as f:
+        json.dump(metadata,f)
+
+    return new_index
+
+
+def recall_at_k(index:faiss.Index,vectors:np.ndarray,queries:np.ndarray,k:int=10,metric:str="l2")->float:
+    """
+    Fraction of the exact top-k neighbors of ``queries`` among ``vectors`` that ``index`` returns.
+    ``index`` must hold ``vectors`` in the same order.
+    """
+    vectors = np.array(vectors,dtype=np.float32)
+    queries = np.array(queries,dtype=np.float32)
+
+    if metric == "inner_product":
+        faiss.normalize_L2(vectors)
+        faiss.normalize_L2(queries)
+
+    k = min(k,len(vectors))
+    exact_index = faiss.IndexFlat(vectors.shape[1],METRICS[metric])
+    exact_index.add(vectors)
+
+    _,exact_ids = exact_index.search(queries,k)
+    _,ids = index.search(queries,k)
+
+    found = sum(len(set(row_ids).intersection(row_exact_ids)) for row_ids,row_exact_ids in zip(ids,exact_ids))
+
+    return found / exact_ids.size
+
+
+def _min_training_size(config:IndexConfig)->int:
+    if config.index_type in ("ivf_flat","ivf_pq"):
+        min_size = config.nlist
+
+        if config.index_type == "ivf_pq":
+            min_size = max(min_size,2 ** config.pq_nbits)
+
+        return min_size
+
+    return 1
+
+
+def _base_index(index:faiss.Index)->faiss.Index:
+    # A refined index wraps the index that does the candidate search
+    index = faiss.downcast_index(index)
+
+    if hasattr(index,"base_index"):
+        return faiss.downcast_index(index.base_index)
+
+    return index
+
+
+def _extract_ivf(index:faiss.Index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
@@ -1,139 +1,169 @@
-import faiss
 import os
+import uuid
 from pathlib import Path
-from typing import List
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
+from typing import Iterable, List
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.api_utils import get_openai_embeddings
-from core.pdf_reader import read_pdf
-import json
+from core.hashing import file_sha256
+from core.pdf_reader import iter_pdf_pages, read_pdf
+from core.table_store import TableStore
+from indexer.dedup import ChunkDeduplicator
+from indexer.embedding_pipeline import EmbeddingPipeline
+from indexer.faiss_indexer import FAISSIndexer
 
 
-class FAISSIndexer():
-    """
-    A simple FAISS indexer using OpenAI embeddings.
-    Supports loading existing databases or creating new ones.
-    """
+class TextChunker():
+    
+    def __init__(self,faiss_indexer:FAISSIndexer,text_splitter:RecursiveCharacterTextSplitter,
+                 embedding_batch_size:int=None,max_concurrent_embeddings:int=4,table_store:TableStore=None,
+                 deduplicator:ChunkDeduplicator=None,page_window:int=None):
+        """
+        Args:
+            embedding_batch_size (int): When set, chunks are streamed to the index in batches of
+                this size instead of being collected and embedded in one pass
+            max_concurrent_embeddings (int): Number of embedding batches in flight when streaming
+            table_store (TableStore): Store the tables of each page there and reference them from the
+                chunks by id (metadata["table_ids"]). Without it, chunks keep the page DataFrames in
+                metadata["tables"]
+            deduplicator (ChunkDeduplicator): Index near-duplicate chunks once. A copy found in another
+                file only adds that file to the indexed chunk's metadata["sources"]. Build it with
+                ChunkDeduplicator.from_faiss_indexer so it covers the whole index
+            page_window (int): When set, pages are parsed in windows of this size while the first
+                ones are already split (and embedded, with embedding_batch_size), instead of
+                parsing the whole PDF first. At most about two windows of pages are held in memory
+        """
+        self.text_splitter = text_splitter
+        self.faiss_indexer = faiss_indexer
+        self.embedding_batch_size = embedding_batch_size
+        self.max_concurrent_embeddings = max_concurrent_embeddings
+        self.table_store = table_store
+        self.deduplicator = deduplicator
+        self.num_duplicate_chunks = 0
+        self.page_window = page_window
     
-    @classmethod
-    def from_small_embedding(cls,embedding_model_name:str="text-embedding-3-small",directory_path:str=None, # type: ignore
-                             dimension:int=1536):
-        embeddings = get_openai_embeddings(model=embedding_model_name,dimensions=dimension)
+    def chunk(self,pdf_path:Path)->bool:
+        """
+        Index a PDF, skipping it when its content hash matches the indexed version.
+        Returns whether the index was changed.
+        """
+        content_hash = file_sha256(pdf_path)
+
+        if self.is_up_to_date(pdf_path,content_hash):
+            return False
+
+        pages = self._read_pages(pdf_path)
+        self.index_chunks(pdf_path,self._iter_chunks(pages),content_hash)
 
-        return cls(embeddings,directory_path)
+        return True
 
+    def is_up_to_date(self,pdf_path:Path,content_hash:str)->bool:
+        return self.faiss_indexer.is_source_up_to_date(pdf_path,content_hash)
 
-    def __init__(self,embedding_model: OpenAIEmbeddings,directory_path:str=None): 
+    def prepare_chunks(self,pdf_path:Path)->List[Document]:
         """
-        Initialize the FAISS indexer.
-        
-        Args:
-            directory_path (str): Directory to store/load the vector database
-            embedding_model (OpenAIEmbeddings): OpenAI embeddings model
-            load_existing (bool): Whether to load an existing vector database
-            index_name (str): Name of the index file (without extension)
+        Parse and split a PDF without touching the index, so it can run in a worker.
         """
-        self.embedding_model = embedding_model
-        self.vector_store = None
+        pages = self._read_pages(pdf_path)
+        return list(self._iter_chunks(pages))
 
-        if directory_path is not None and self._is_index_exists(directory_path):
-            self._load_existing_index(directory_path)
-        else:
-            self._initialize_index()
+    def index_chunks(self,pdf_path:Path,chunks:Iterable[Document],content_hash:str=None):
+        if content_hash is None:
+            content_hash = file_sha256(pdf_path)
 
-        self.metadata = {}
+        if self.deduplicator is None and self.embedding_batch_size is None:
+            self.faiss_indexer.replace_source_documents(pdf_path,list(chunks),content_hash)
+        else:
+            # The previous version goes first, so the new one is not matched against it
+            self.faiss_indexer.remove_source(pdf_path)
+            shared_ids = []
+            new_ids = []
 
-    def _is_index_exists(self,directory_path:str):
-        if not os.path.exists(directory_path):
-            return False
-        
-        for file in os.listdir(directory_path):
-            if file.endswith(".faiss"):
-                return True
-        
-        return False
+            if self.deduplicator is not None:
+                chunks = self._deduplicate(pdf_path,chunks,shared_ids,new_ids)
 
+            try:
+                ids = self._add_chunks(chunks)
+            except Exception:
+                # Chunks that never reached the index must not be matched later
+                if self.deduplicator is not None:
+                    self.deduplicator.documents_removed(new_ids)
+                raise
 
-    def _initialize_index(self):
-        index = faiss.IndexFlatL2(len(self.embedding_model.embed_query("hello world")))
+            for doc_id in shared_ids:
+                self.faiss_indexer.add_document_source(doc_id,pdf_path)
 
-        self.vector_store = FAISS(
-            embedding_function=self.embedding_model,
-            index=index,
-            docstore=InMemoryDocstore(),
-            index_to_docstore_id={},
-        )
+            self.faiss_indexer.record_source(pdf_path,content_hash,ids + shared_ids)
 
-    def _load_existing_index(self,directory_path:str):
-        self.vector_store = FAISS.load_local(directory_path,self.embedding_model,allow_dangerous_deserialization=True)
+        self.faiss_indexer.audit_processed_pdf(pdf_path)
+        self.faiss_indexer.audit_splitter(self.text_splitter)
 
-    def add_documents(self,documents:List[Document]):
-        self.vector_store.add_documents(documents) 
+    def _add_chunks(self,chunks:Iterable[Document])->List[str]:
+        if self.embedding_batch_size is None:
+            return self.faiss_indexer.add_documents(list(chunks))
 
-    def retrieve(self,query:str,**kwargs):
-        num_documents = kwargs.get("num_documents",self._get_num_documents(**kwargs))
-        return self.vector_store.similarity_search(query,num_documents)
-    
-    def _get_num_documents(self,**kwargs):
-        # TODO: Implement a better way to get the number of documents?
-        return 10
+        pipeline = EmbeddingPipeline(self.faiss_indexer,self.embedding_batch_size,self.max_concurrent_embeddings)
+        return pipeline.run(chunks)
 
-    def save(self,directory_path:str):
-        os.makedirs(directory_path,exist_ok=True)
-        self.vector_store.save_local(directory_path) 
-        self._save_metadata(os.path.join(Path(directory_path),"custom_metadata.json"))
+    def _deduplicate(self,pdf_path:Path,chunks:Iterable[Document],shared_ids:List[str],new_ids:List[str]):
+        # Drops near-duplicates, collecting the ids of the indexed chunks this PDF shares in shared_ids
+        for chunk in chunks:
+            signature = self.deduplicator.signature(chunk.page_content)
+            duplicate_id = self.deduplicator.find(signature)
 
-    def _save_metadata(self,file_path:Path):
-        with open(file_path,"w") as f:
-            json.dump(self.metadata,f)
+            if duplicate_id is not None:
+                self.num_duplicate_chunks += 1
 
-    def audit_processed_pdf(self,pdf_path:Path):
-        self.metadata.setdefault("processed_pdfs",[])
-        self.metadata["processed_pdfs"].append(str(pdf_path))
+                if duplicate_id not in new_ids and duplicate_id not in shared_ids:
+                    shared_ids.append(duplicate_id)
+                continue
 
-    def audit_splitter(self,text_splitter:RecursiveCharacterTextSplitter):
-        self.metadata.setdefault("text_splitter",{})
-        self.metadata["text_splitter"]["class_name"] = text_splitter.__class__.__name__
+            # Registered before it is embedded, so repeats within this PDF are caught too
+            doc_id = str(uuid.uuid4())
+            self.deduplicator.add(doc_id,signature)
+            new_ids.append(doc_id)
 
-        self.metadata["text_splitter"]["params"] = {
-            "chunk_size": text_splitter._chunk_size,
-            "chunk_overlap": text_splitter._chunk_overlap,
-            "length_function": text_splitter._length_function.__name__
-        }
+            yield Document(id=doc_id,page_content=chunk.page_content,metadata={**chunk.metadata,"sources":[str(pdf_path)]})
 
+    def _read_pages(self,pdf_path:Path)->Iterable[Document]:
+        if self.page_window is None:
+            pages = read_pdf(pdf_path,format="documents")
+        else:
+            # Lazy: parsing only starts once the chunks are consumed, after the cleanup below
+            pages = iter_pdf_pages(pdf_path,format="documents",window=self.page_window)
 
-class TextChunker():
-    
-    def __init__(self,faiss_indexer:FAISSIndexer,text_splitter:RecursiveCharacterTextSplitter):
-        self.text_splitter = text_splitter
-        self.faiss_indexer = faiss_indexer
-    
-    def chunk(self,pdf_path:Path):
-        pages = read_pdf(pdf_path,format="documents")
-        chunks = self._chunk_text(pages)
+        if self.table_store is not None:
+            # Tables of pages a new version of the PDF no longer has must not linger
+            self.table_store.remove_source(str(pdf_path))
 
-        chunks_doc_processed = []
+        return pages
 
-        for chunk in chunks:
-            # TODO: fix this bug - it is the metadata of the whole page, not the chunk
-            metadata = chunk.metadata
-            metadata["ChunkSummary"] = self._get_chunk_summary(chunk)
-            metadata["Keywords"] = self._get_keywords(chunk)
-            metadata["FigureId"] = self._get_figure_id(chunk)
+    def _iter_chunks(self,pages:Iterable[Document]):
+        # Split page by page so streaming consumers can start before the whole document is split
+        for page in pages:
+            if self.table_store is not None:
+                page = self._store_tables(page)
 
-            chunks_doc_processed.append(Document(page_content=chunk.page_content,metadata=metadata))
+            for chunk in self._chunk_text([page]):
+                # Each chunk gets its own copy of the page metadata
+                metadata = dict(chunk.metadata)
+                metadata["ChunkSummary"] = self._get_chunk_summary(chunk)
+                metadata["Keywords"] = self._get_keywords(chunk)
+                metadata["FigureId"] = self._get_figure_id(chunk)
 
-        self.faiss_indexer.add_documents(chunks_doc_processed)
-        self.faiss_indexer.audit_processed_pdf(pdf_path)
-        self.faiss_indexer.audit_splitter(self.text_splitter)
+                yield Document(page_content=chunk.page_content,metadata=metadata)
     
+    def _store_tables(self,page:Document)->Document:
+        # The splitter deep-copies the page metadata into every chunk, so only table ids go there
+        metadata = dict(page.metadata)
+        tables = metadata.pop("tables",[])
+        metadata["table_ids"] = self.table_store.put_page_tables(metadata["source"],metadata["page"],tables)
+
+        return Document(page_content=page.page_content,metadata=metadata)
+
     def _chunk_text(self,pages):
         return self.text_splitter.split_documents(pages)
     
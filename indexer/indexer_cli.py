@@ -4,10 +4,17 @@ import glob
 from pathlib import Path
 
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Insert the repository root first, so "indexer" resolves to the package rather than indexer/indexer.py
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.pdf_reader import PDF_PARSERS
+from core.table_store import TableStore
 from core.text_splitter import get_text_splitter
 from indexer import TextChunker,FAISSIndexer
+from indexer.dedup import ChunkDeduplicator
+from indexer.index_factory import ENCODINGS, INDEX_TYPES, METRICS, IndexConfig
+from indexer.parallel_ingest import ParallelIngestor
+from retrieval.sparse_retriever import SparseRetriever
 
 
 if __name__ == "__main__":
@@ -15,6 +22,24 @@ if __name__ == "__main__":
     parser.add_argument("--directory", type=str, help="Path to the directory containing PDF files to index. Example: 'data'")
     parser.add_argument("--pdf-path", type=str, help="Path to a single PDF file to index. Example: 'data/report.pdf'")
     parser.add_argument("--faiss-indexer-directory", type=str, required=True, help="Path to the FAISS indexer directory. Example: 'vectordb_indexes/faiss_indexer'")
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, default="flat", help="FAISS index type for a new index. Existing indexes keep their type (see migrate_index_cli.py)")
+    parser.add_argument("--metric", type=str, choices=list(METRICS), default="l2", help="Distance of a new index. inner_product normalizes the vectors (cosine similarity)")
+    parser.add_argument("--nlist", type=int, default=IndexConfig.nlist, help="Number of IVF clusters of a new ivf_flat / ivf_pq index. Training needs at least this many chunks")
+    parser.add_argument("--nprobe", type=int, default=None, help=f"Number of IVF clusters searched per query (default {IndexConfig.nprobe} for a new index, else the saved value)")
+    parser.add_argument("--encoding", type=str, choices=list(ENCODINGS), default="flat", help="Vector encoding of a new flat / ivf_flat / hnsw index: float32, float16 or 8-bit scalar quantization")
+    parser.add_argument("--refine", action="store_true", help="Re-rank candidates of a compressed index against exact float32 vectors (vectors can no longer be removed)")
+    parser.add_argument("--docstore", type=str, choices=["memory","sqlite"], default=None, help="Docstore backend for a new index (default memory). Existing indexes keep their backend (see convert_docstore_cli.py)")
+    parser.add_argument("--embedding-cache", type=str, default=None, help="Path to a local embedding cache, so unchanged chunks are not re-embedded. Example: '.cache/embeddings.sqlite'")
+    parser.add_argument("--embedding-batch-size", type=int, default=None, help="Stream chunks to the index in embedding batches of this size instead of embedding each PDF in one pass. Example: 64")
+    parser.add_argument("--embedding-concurrency", type=int, default=4, help="Number of embedding batches in flight when --embedding-batch-size is set")
+    parser.add_argument("--sparse-index", action="store_true", help="Also build the BM25 index of all indexed chunks and save it next to the FAISS index")
+    parser.add_argument("--pdf-parser", type=str, choices=PDF_PARSERS, default=None, help="'hybrid' extracts text locally and only sends pages with tables or images to LlamaParse. Defaults to REPORTS_PDF_PARSER, else llama_parse")
+    parser.add_argument("--page-window", type=int, default=None, help="Parse each PDF in windows of this many pages and start splitting and embedding as they arrive (with --embedding-batch-size) instead of after the whole PDF. Example: 8")
+    parser.add_argument("--recursive-splitter", action="store_true", help="Split with RecursiveCharacterTextSplitter as before the encode-once splitter became the default. The default packs chunks closer to the chunk size, so a re-indexed PDF gets new chunk boundaries while unchanged PDFs keep their old chunks")
+    parser.add_argument("--dedup", action="store_true", help="Index near-duplicate chunks (shared boilerplate across policies) once, listing all their files in metadata['sources']")
+    parser.add_argument("--dedup-threshold", type=float, default=0.9, help="Estimated Jaccard similarity of word shingles from which two chunks count as duplicates")
+    parser.add_argument("--workers", type=int, default=1, help="Number of workers parsing and splitting PDFs in parallel when indexing a directory. Example: 8")
+    parser.add_argument("--executor", type=str, choices=["process","thread"], default="process", help="Worker pool type used when --workers is greater than 1")
 
     args = parser.parse_args()
 
@@ -25,13 +50,29 @@ if __name__ == "__main__":
     if args.pdf_path is not None and args.directory is not None:
         raise ValueError("Cannot specify both --pdf-path and --directory. Use one or the other.")
 
+    if args.pdf_parser is not None:
+        # Through the environment, so parallel workers parse the same way
+        os.environ["REPORTS_PDF_PARSER"] = args.pdf_parser
+
     faiss_indexer_directory = Path(args.faiss_indexer_directory)
     if not faiss_indexer_directory.exists():
         os.makedirs(faiss_indexer_directory)
 
-    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_indexer_directory)
-    text_splitter = get_text_splitter()
-    text_chunker = TextChunker(faiss_indexer,text_splitter)
+    faiss_indexer = FAISSIndexer.from_small_embedding(directory_path=faiss_indexer_directory,embedding_cache_path=args.embedding_cache,
+                                                      index_config=IndexConfig(index_type=args.index_type,metric=args.metric,
+                                                                               encoding=args.encoding,refine=args.refine,
+                                                                               nlist=args.nlist),
+                                                      docstore_backend=args.docstore)
+    if args.nprobe is not None:
+        faiss_indexer.set_search_parameters(nprobe=args.nprobe)
+    text_splitter = get_text_splitter(encode_once=not args.recursive_splitter)
+    deduplicator = ChunkDeduplicator.from_faiss_indexer(faiss_indexer,threshold=args.dedup_threshold) if args.dedup else None
+    text_chunker = TextChunker(faiss_indexer,text_splitter,
+                               embedding_batch_size=args.embedding_batch_size,
+                               max_concurrent_embeddings=args.embedding_concurrency,
+                               table_store=TableStore(faiss_indexer_directory),
+                               deduplicator=deduplicator,
+                               page_window=args.page_window)
 
     if args.pdf_path is not None:
         # Handle single PDF file
@@ -40,7 +81,8 @@ if __name__ == "__main__":
             raise FileNotFoundError(f"PDF file not found at {pdf_path}")
         
         print(f"Processing single PDF: {pdf_path}")
-        text_chunker.chunk(pdf_path)
+        if not text_chunker.chunk(pdf_path):
+            print(f"Skipping unchanged PDF: {pdf_path}")
     
     elif args.directory is not None:
         # Handle directory of PDF files
@@ -61,11 +103,28 @@ if __name__ == "__main__":
         
         print(f"Found {len(pdf_files)} PDF files in {directory_path}")
         
-        # Process each PDF file
-        for pdf_file in pdf_files:
-            pdf_path = Path(pdf_file)
-            print(f"Processing PDF: {pdf_path}")
-            text_chunker.chunk(pdf_path)
+        if args.workers > 1:
+            print(f"Processing with {args.workers} {args.executor} workers")
+            ingestor = ParallelIngestor(text_chunker,workers=args.workers,executor=args.executor)
+            report = ingestor.ingest([Path(pdf_file) for pdf_file in pdf_files])
+            print(report)
+        else:
+            # Process each PDF file
+            for pdf_file in pdf_files:
+                pdf_path = Path(pdf_file)
+                print(f"Processing PDF: {pdf_path}")
+                if not text_chunker.chunk(pdf_path):
+                    print(f"Skipping unchanged PDF: {pdf_path}")
     
     text_chunker.save(faiss_indexer_directory)
+
+    if args.sparse_index:
+        SparseRetriever(faiss_indexer.documents()).save(faiss_indexer_directory)
+        print(f"Saved BM25 index to {faiss_indexer_directory}")
+
+    if args.dedup:
+        print(f"Skipped {text_chunker.num_duplicate_chunks} near-duplicate chunks")
+
+    if args.embedding_cache is not None:
+        print(f"Embedding cache: {faiss_indexer.embedding_model.cache_info()}")
     print("Indexing completed successfully!")
\ No newline at end of file
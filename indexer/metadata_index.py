@@ -0,0 +1,138 @@
+import re
+import numpy as np
+from collections import defaultdict
+from pathlib import Path, PurePath, PureWindowsPath
+from typing import Dict, Iterable, List, Set
+
+from langchain_core.documents import Document
+
+FILTER_FIELDS = ["source","file_name","client","page","has_tables"]
+
+_CLIENT_PATTERN = re.compile(r"(client\d+)",re.IGNORECASE)
+
+
+def document_filter_values(document:Document)->Dict[str,object]:
+    """
+    The filterable values of a chunk: its source path, the source file name, the client
+    the file belongs to (``client3`` in ``client3_report3_MenoraPolicy.pdf``), the page and
+    whether the chunk carries tables.
+    """
+    metadata = document.metadata
+    values = {}
+
+    source = metadata.get("source")
+    if source is not None:
+        source = str(source)
+        # Sources indexed on Windows keep their backslashes
+        file_name = PureWindowsPath(source).name if "\\" in source else PurePath(source).name
+        values["source"] = source
+        values["file_name"] = file_name
+
+        client = _CLIENT_PATTERN.search(file_name)
+        if client is not None:
+            values["client"] = client.group(1).lower()
+
+    if metadata.get("page") is not None:
+        values["page"] = int(metadata["page"])
+
+    values["has_tables"] = bool(metadata.get("tables")) or bool(metadata.get("table_ids"))
+
+    return values
+
+
+def source_key(source_path)->str:
+    """
+    The key a source file is recorded under: its resolved path, so the same file given as a
+    relative or an absolute path is recognized.
+    """
+    return str(Path(source_path).resolve())
+
+
+def document_sources(document:Document)->List[str]:
+    """
+    All sources of a chunk: ``metadata["sources"]`` for a chunk shared by several files
+    (see ChunkDeduplicator), else its single source.
+    """
+    sources = document.metadata.get("sources")
+
+    if sources:
+        return [str(source) for source in sources]
+
+    source = document.metadata.get("source")
+
+    return [str(source)] if source is not None else []
+
+
+def document_filter_entries(document:Document)->Set[tuple]:
+    """
+    The (field, value) pairs a chunk is indexed under. A shared chunk matches the source,
+    file name and client of every file it belongs to.
+    """
+    entries = set(document_filter_values(document).items())
+
+    for source in document_sources(document)[1:]:
+        values = document_filter_values(Document(page_content="",metadata={"source":source}))
+        entries.update((field,value) for field,value in values.items() if field != "has_tables")
+
+    return entries
+
+
+class MetadataIndex():
+    """
+    Inverted index from (field, value) to the FAISS positions of the chunks that have it.
+
+    A filter maps each field to a value or a list of accepted values; fields are combined
+    with AND, the values of one field with OR. Unknown fields raise a ValueError.
+    """
+
+    def __init__(self):
+        self._positions = defaultdict(list)
+        self.num_documents = 0
+
+    @classmethod
+    def build(cls,documents:Iterable[Document])->"MetadataIndex":
+        index = cls()
+        index.add(documents)
+        return index
+
+    def add(self,documents:Iterable[Document]):
+        for document in documents:
+            for entry in document_filter_entries(document):
+                self._positions[entry].append(self.num_documents)
+
+            self.num_documents += 1
+
+    def resolve(self,metadata_filter:Dict[str,object])->np.ndarray:
+        """
+        Return the sorted FAISS positions matching ``metadata_filter``.
+        """
+        matched = None
+
+        for field,accepted in metadata_filter.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Filter field {field} not supported. Choose from {FILTER_FIELDS}")
+
+            accepted = accepted if isinstance(accepted,(list,tuple,set)) else [accepted]
+            positions = [np.asarray(self._positions.get((field,self._normalize(field,value)),[]),dtype=np.int64)
+                         for value in accepted]
+            field_positions = np.unique(np.concatenate(positions)) if positions else np.zeros(0,dtype=np.int64)
+
+            matched = field_positions if matched is None else np.intersect1d(matched,field_positions,assume_unique=True)
+
+        if matched is None:
+            return np.arange(self.num_documents,dtype=np.int64)
+
+        return matched
+
+    @staticmethod
+    def _normalize(field:str,value)->object:
+        if field == "page":
+            return int(value)
+
+        if field == "has_tables":
+            return bool(value)
+
+        if field == "client":
+            return str(value).lower()
+
+        return str(value)
@@ -0,0 +1,67 @@
+import argparse
+import os
+import time
+from pathlib import Path
+
+import sys
+# Insert the repository root first, so "indexer" resolves to the package rather than indexer/indexer.py
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+
+from indexer.index_factory import ENCODINGS, INDEX_TYPES, METRICS, IndexConfig, migrate_index_directory, recall_at_k, reconstruct_all
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a saved FAISS index into another index type without re-embedding")
+    parser.add_argument("--source-directory", type=str, required=True, help="Existing FAISS indexer directory. Example: 'vectordb_indexes/faiss_indexer_insurance'")
+    parser.add_argument("--target-directory", type=str, required=True, help="Directory to write the converted index to. Example: 'vectordb_indexes/faiss_indexer_insurance_hnsw'")
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, required=True, help="Index type to convert to")
+    parser.add_argument("--metric", type=str, choices=list(METRICS), default="l2", help="Distance to search with. inner_product normalizes the vectors (cosine similarity)")
+    parser.add_argument("--encoding", type=str, choices=list(ENCODINGS), default="flat", help="Vector encoding for flat / ivf_flat / hnsw: float32, float16 or 8-bit scalar quantization")
+    parser.add_argument("--refine", action="store_true", help="Re-rank candidates against exact float32 vectors kept next to the compressed ones")
+    parser.add_argument("--refine-k-factor", type=int, default=IndexConfig.refine_k_factor, help="Number of candidates re-ranked per requested result")
+    parser.add_argument("--recall-queries", type=int, default=200, help="Number of stored vectors used as queries to measure recall@10 of the converted index (0 to skip)")
+    parser.add_argument("--nlist", type=int, default=IndexConfig.nlist, help="Number of IVF clusters")
+    parser.add_argument("--nprobe", type=int, default=IndexConfig.nprobe, help="Number of IVF clusters visited per query")
+    parser.add_argument("--pq-m", type=int, default=IndexConfig.pq_m, help="Number of PQ sub-quantizers (must divide the vector dimension)")
+    parser.add_argument("--pq-nbits", type=int, default=IndexConfig.pq_nbits, help="Bits per PQ sub-quantizer code")
+    parser.add_argument("--hnsw-m", type=int, default=IndexConfig.hnsw_m, help="Number of HNSW neighbors per node")
+    parser.add_argument("--ef-search", type=int, default=IndexConfig.ef_search, help="HNSW candidate list size at search time")
+    parser.add_argument("--training-sample-size", type=int, default=IndexConfig.training_sample_size, help="Maximum number of vectors used for training")
+
+    args = parser.parse_args()
+
+    source_directory = Path(args.source_directory)
+    if not (source_directory / "index.faiss").exists():
+        raise FileNotFoundError(f"No index.faiss found in {source_directory}")
+
+    if Path(args.target_directory).resolve() == source_directory.resolve():
+        raise ValueError("Target directory must differ from the source directory")
+
+    config = IndexConfig(
+        index_type=args.index_type,
+        metric=args.metric,
+        encoding=args.encoding,
+        refine=args.refine,
+        refine_k_factor=args.refine_k_factor,
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        pq_m=args.pq_m,
+        pq_nbits=args.pq_nbits,
+        hnsw_m=args.hnsw_m,
+        ef_search=args.ef_search,
+        training_sample_size=args.training_sample_size,
+    )
+
+    start = time.perf_counter()
+    index = migrate_index_directory(source_directory,Path(args.target_directory),config)
+    print(f"Converted {index.ntotal} vectors to {config.factory_string()} in {time.perf_counter() - start:.1f}s")
+    print(f"Size: {os.path.getsize(source_directory / 'index.faiss') / 1e6:.1f} MB -> "
+          f"{os.path.getsize(Path(args.target_directory) / 'index.faiss') / 1e6:.1f} MB")
+
+    if args.recall_queries > 0 and index.ntotal > 0:
+        vectors = reconstruct_all(faiss.read_index(str(source_directory / "index.faiss")))
+        query_ids = np.random.default_rng(0).choice(len(vectors),min(args.recall_queries,len(vectors)),replace=False)
+        print(f"Recall@10 against exact {config.metric} search: {recall_at_k(index,vectors,vectors[query_ids],k=10,metric=config.metric):.3f}")
@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+from core.hashing import file_sha256
+from core.table_store import TableStore
+from indexer.indexer import TextChunker
+
+
+@dataclass
+class IngestReport:
+    num_files: int = 0
+    num_chunks: int = 0
+    elapsed_seconds: float = 0.0
+    skipped_files: List[str] = field(default_factory=list)
+    failed_files: List[str] = field(default_factory=list)
+
+    @property
+    def files_per_second(self)->float:
+        return self.num_files / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def chunks_per_second(self)->float:
+        return self.num_chunks / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def __str__(self)->str:
+        return (f"Indexed {self.num_files} files ({self.num_chunks} chunks) in {self.elapsed_seconds:.1f}s - "
+                f"{self.files_per_second:.2f} files/s, {self.chunks_per_second:.1f} chunks/s, "
+                f"{len(self.skipped_files)} unchanged, {len(self.failed_files)} failed")
+
+
+def _prepare_pdf_chunks(text_splitter:TextSplitter,pdf_path:Path,table_store:TableStore=None)->tuple[List[Document],float]:
+    # Runs inside the worker: the chunker gets no indexer since workers never write to it.
+    # Tables are written by the worker; each PDF owns its own table files
+    start = time.perf_counter()
+    chunks = TextChunker(None,text_splitter,table_store=table_store).prepare_chunks(pdf_path)
+
+    return chunks,time.perf_counter() - start
+
+
+class ParallelIngestor():
+    """
+    Fans parsing and splitting out to a worker pool while the calling thread stays the
+    single writer of the FAISS index (embedding, ``add_documents`` and auditing).
+    """
+
+    def __init__(self,text_chunker:TextChunker,workers:int=4,executor:str="process"):
+        if executor not in ("process","thread"):
+            raise ValueError(f"Executor {executor} not supported")
+
+        self.text_chunker = text_chunker
+        self.workers = workers
+        self.executor = executor
+
+    def ingest(self,pdf_paths:List[Path],verbose:bool=True)->IngestReport:
+        report = IngestReport()
+        start = time.perf_counter()
+
+        content_hashes = {}
+
+        for pdf_path in pdf_paths:
+            content_hash = file_sha256(pdf_path)
+
+            if self.text_chunker.is_up_to_date(pdf_path,content_hash):
+                report.skipped_files.append(str(pdf_path))
+            else:
+                content_hashes[pdf_path] = content_hash
+
+        if verbose and report.skipped_files:
+            print(f"Skipping {len(report.skipped_files)} unchanged files")
+
+        with self._create_executor() as pool:
+            futures = {
+                pool.submit(_prepare_pdf_chunks,self.text_chunker.text_splitter,pdf_path,self.text_chunker.table_store): pdf_path
+                for pdf_path in content_hashes
+            }
+
+            for done_index,future in enumerate(as_completed(futures),start=1):
+                pdf_path = futures[future]
+
+                try:
+                    chunks,prepare_seconds = future.result()
+                except Exception as e:
+                    report.failed_files.append(str(pdf_path))
+
+                    if verbose:
+                        print(f"[{done_index}/{len(futures)}] {pdf_path}: failed - {e}")
+
+                    continue
+
+                index_start = time.perf_counter()
+                self.text_chunker.index_chunks(pdf_path,chunks,content_hashes[pdf_path])
+                index_seconds = time.perf_counter() - index_start
+
+                report.num_files += 1
+                report.num_chunks += len(chunks)
+
+                if verbose:
+                    print(f"[{done_index}/{len(futures)}] {pdf_path}: {len(chunks)} chunks "
+                          f"(parse+split {prepare_seconds:.1f}s, index {index_seconds:.1f}s)")
+
+        report.elapsed_seconds = time.perf_counter() - start
+
+        return report
+
+    def _create_executor(self)->Executor:
+        if self.executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers)
+
+        return ProcessPoolExecutor(max_workers=self.workers)
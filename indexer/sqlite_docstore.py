@@ -0,0 +1,249 @@
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+DOCSTORE_FILE_NAME = "docstore.sqlite"
+INDEX_TO_DOCSTORE_ID_FILE_NAME = "index_to_docstore_id.json"
+
+
+class SQLiteDocstore(Docstore,AddableMixin):
+    """
+    Docstore kept in a SQLite file and fetched one document at a time.
+
+    Unlike the pickled InMemoryDocstore, opening it reads nothing but the file header,
+    so load time and resident memory do not grow with the corpus. Recently fetched
+    documents are kept in a small LRU cache. Without a path the store lives in memory
+    until it is saved.
+
+    Like the pickled docstore, the file at ``path`` only changes on save(): the first
+    write copies it to a private working file next to it, and save() swaps the new
+    version in with an atomic rename. A crash before save() leaves the saved index
+    consistent, and readers keep the version they opened.
+    """
+
+    def __init__(self,path:Union[str,Path]=None,cache_size:int=256,read_only:bool=False):
+        self.path = Path(path) if path is not None else None
+        self.cache_size = cache_size
+        self.read_only = read_only
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._working_path = None
+        self._working_copy_finalizer = None
+
+        if self.path is not None and (read_only or self.path.exists()):
+            # SQLite reads through the OS page cache, which read-only processes share
+            self._connection = sqlite3.connect(f"file:{self.path}?mode=ro",uri=True,check_same_thread=False)
+            self._is_writable = False
+        else:
+            self._connection = sqlite3.connect(":memory:",check_same_thread=False)
+            self._create_table()
+            self._is_writable = self.path is None
+
+    def add(self,texts:Dict[str,Document])->None:
+        with self._lock:
+            self._ensure_writable()
+            ids = list(texts.keys())
+            overlapping = self._existing_ids(ids)
+
+            if overlapping:
+                raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+
+            self._connection.executemany(
+                "INSERT INTO documents (id, document) VALUES (?, ?)",
+                [(doc_id,pickle.dumps(doc)) for doc_id,doc in texts.items()],
+            )
+            self._connection.commit()
+
+    def delete(self,ids:List)->None:
+        with self._lock:
+            self._ensure_writable()
+            missing = set(ids).difference(self._existing_ids(ids))
+
+            if missing:
+                raise ValueError(f"Tried to delete ids that does not exist: {missing}")
+
+            self._connection.executemany("DELETE FROM documents WHERE id = ?",[(doc_id,) for doc_id in ids])
+            self._connection.commit()
+
+            for doc_id in ids:
+                self._cache.pop(doc_id,None)
+
+    def update(self,doc_id:str,document:Document)->None:
+        with self._lock:
+            self._ensure_writable()
+            self._connection.execute("UPDATE documents SET document = ? WHERE id = ?",(pickle.dumps(document),doc_id))
+            self._connection.commit()
+            self._cache.pop(doc_id,None)
+
+    def search(self,search:str)->Union[str,Document]:
+        document = self._get(search)
+
+        if document is None:
+            return f"ID {search} not found."
+
+        return document
+
+    def __contains__(self,doc_id:str)->bool:
+        with self._lock:
+            return doc_id in self._cache or len(self._existing_ids([doc_id])) > 0
+
+    def __len__(self)->int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def items(self)->Iterator[Tuple[str,Document]]:
+        """
+        Iterate over every document. This reads the whole store, so keep it off the query path.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT id, document FROM documents").fetchall()
+
+        for doc_id,document in rows:
+            yield doc_id,pickle.loads(document)
+
+    def save(self,path:Union[str,Path]):
+        path = Path(path)
+
+        with self._lock:
+            self._connection.commit()
+
+            if self._working_path is None and self.path is not None and self.path.exists() and self.path.resolve() == path.resolve():
+                # Nothing was written since the file was opened
+                return
+
+            # Write to a temporary file first so readers never see a partial docstore
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            target = sqlite3.connect(str(tmp_path))
+
+            try:
+                self._connection.backup(target)
+            finally:
+                target.close()
+
+            os.replace(tmp_path,path)
+
+    def close(self):
+        with self._lock:
+            if self._working_copy_finalizer is not None:
+                self._working_copy_finalizer()
+            else:
+                self._connection.close()
+
+    def cache_info(self)->dict:
+        return {"cached_documents": len(self._cache),"cache_size": self.cache_size}
+
+    def _get(self,doc_id:str)->Optional[Document]:
+        with self._lock:
+            if doc_id in self._cache:
+                self._cache.move_to_end(doc_id)
+                return self._cache[doc_id]
+
+            row = self._connection.execute("SELECT document FROM documents WHERE id = ?",(doc_id,)).fetchone()
+
+            if row is None:
+                return None
+
+            document = pickle.loads(row[0])
+
+            if self.cache_size > 0:
+                self._cache[doc_id] = document
+
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+            return document
+
+    def _create_table(self):
+        self._connection.execute("CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, document BLOB NOT NULL)")
+        self._connection.commit()
+
+    def _ensure_writable(self):
+        if self.read_only:
+            raise PermissionError(f"SQLiteDocstore at {self.path} is opened read-only")
+
+        if self._is_writable:
+            return
+
+        # Copy the saved file (or start empty) into a working file in the same directory
+        self._working_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{id(self)}.work")
+        working_connection = sqlite3.connect(str(self._working_path),check_same_thread=False)
+        self._connection.backup(working_connection)
+        self._connection.close()
+
+        self._connection = working_connection
+        self._create_table()
+        self._is_writable = True
+        self._working_copy_finalizer = weakref.finalize(self,_discard_working_copy,working_connection,self._working_path)
+
+    def _existing_ids(self,ids:List[str])->List[str]:
+        existing = []
+
+        # Stay below SQLite's limit on bound parameters per statement
+        for start in range(0,len(ids),500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._connection.execute(f"SELECT id FROM documents WHERE id IN ({placeholders})",batch).fetchall()
+            existing.extend(row[0] for row in rows)
+
+        return existing
+
+
+def _discard_working_copy(connection:sqlite3.Connection,working_path:Path):
+    connection.close()
+    working_path.unlink(missing_ok=True)
+
+
+def save_index_to_docstore_id(index_to_docstore_id:Dict[int,str],directory_path:Path):
+    # FAISS ids are contiguous positions, so the mapping is stored as a plain list
+    docstore_ids = [index_to_docstore_id[position] for position in range(len(index_to_docstore_id))]
+
+    with open(Path(directory_path) / INDEX_TO_DOCSTORE_ID_FILE_NAME,"w") as f:
+        json.dump(docstore_ids,f)
+
+
+def load_index_to_docstore_id(directory_path:Path)->Dict[int,str]:
+    with open(Path(directory_path) / INDEX_TO_DOCSTORE_ID_FILE_NAME,"r") as f:
+        return dict(enumerate(json.load(f)))
+
+
+def convert_pickle_docstore(directory_path:Path,target_directory_path:Path=None)->int:
+    """
+    Convert the index.pkl written by FAISS.save_local into a SQLite docstore plus an
+    id mapping file. The FAISS index file is copied when converting into another
+    directory. index.pkl is left in place. Returns the number of converted documents.
+    """
+    directory_path = Path(directory_path)
+    target_directory_path = Path(target_directory_path) if target_directory_path is not None else directory_path
+
+    with open(directory_path / "index.pkl","rb") as f:
+        docstore,index_to_docstore_id = pickle.load(f)
+
+    os.makedirs(target_directory_path,exist_ok=True)
+
+    sqlite_path = target_directory_path / DOCSTORE_FILE_NAME
+    if sqlite_path.exists():
+        os.remove(sqlite_path)
+
+    sqlite_docstore = SQLiteDocstore()
+    sqlite_docstore.add(dict(docstore._dict))
+    sqlite_docstore.save(sqlite_path)
+    sqlite_docstore.close()
+
+    save_index_to_docstore_id(index_to_docstore_id,target_directory_path)
+
+    if target_directory_path.resolve() != directory_path.resolve():
+        for file_name in os.listdir(directory_path):
+            if file_name != "index.pkl" and (directory_path / file_name).is_file():
+                shutil.copy2(directory_path / file_name,target_directory_path / file_name)
+
+    return len(docstore._dict)
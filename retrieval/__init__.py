@@ -1,3 +1,4 @@
 from .dense_retriever import DenseRetriever
 from .sparse_retriever import SparseRetriever
 from .hybrid_retriever import HybridRetriever
+from .threshold_retriever import ThresholdRetriever
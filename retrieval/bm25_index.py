@@ -0,0 +1,276 @@
+import json
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+BM25_INDEX_FILE_NAME = "bm25_index.npz"
+
+
+class BM25Index:
+    """
+    Inverted index with precomputed BM25 (Okapi) postings.
+
+    Each term owns a contiguous slice of ``doc_ids`` / ``weights`` (CSR layout, sliced by
+    ``indptr``), where a weight is the full BM25 contribution of the term to the document.
+    A query therefore only touches the postings of its terms. Scores are identical to
+    ``rank_bm25.BM25Okapi`` with the same parameters, including its idf floor of
+    ``epsilon * average idf`` for terms found in more than half of the documents.
+    """
+
+    def __init__(self, vocabulary: dict, indptr: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray,
+                 num_documents: int, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.num_documents = num_documents
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._matrix = None
+
+    @classmethod
+    def build(cls, tokenized_corpus: Iterable[Sequence[str]], k1: float = 1.5, b: float = 0.75,
+              epsilon: float = 0.25) -> "BM25Index":
+        """
+        Build the index in one pass over ``tokenized_corpus``, which can be a generator: only the
+        postings and document lengths are kept, not the token lists.
+        """
+        # Terms are numbered in order of first appearance, like the dicts rank_bm25 averages over
+        vocabulary = {}
+        postings = []
+        doc_lengths = []
+        for doc_id, tokens in enumerate(tokenized_corpus):
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, frequency))
+
+        num_documents = len(doc_lengths)
+        doc_lengths = np.array(doc_lengths, dtype=np.float64)
+        average_length = doc_lengths.sum() / num_documents if num_documents > 0 else 0.0
+
+        idf = cls._idf([len(term_postings) for term_postings in postings], num_documents, epsilon)
+
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(term_postings) for term_postings in postings])
+        doc_ids = np.empty(indptr[-1], dtype=np.int32)
+        weights = np.empty(indptr[-1], dtype=np.float64)
+
+        for term_id, term_postings in enumerate(postings):
+            start, end = indptr[term_id], indptr[term_id + 1]
+            term_doc_ids = np.array([doc_id for doc_id, _ in term_postings], dtype=np.int32)
+            frequencies = np.array([frequency for _, frequency in term_postings], dtype=np.float64)
+            length_norm = k1 * (1 - b + b * doc_lengths[term_doc_ids] / average_length)
+
+            doc_ids[start:end] = term_doc_ids
+            weights[start:end] = idf[term_id] * (frequencies * (k1 + 1) / (frequencies + length_norm))
+
+        return cls(vocabulary, indptr, doc_ids, weights, num_documents, k1=k1, b=b, epsilon=epsilon)
+
+    @staticmethod
+    def _idf(document_frequencies: List[int], num_documents: int, epsilon: float) -> np.ndarray:
+        idf = np.array([math.log(num_documents - frequency + 0.5) - math.log(frequency + 0.5)
+                        for frequency in document_frequencies], dtype=np.float64)
+
+        if len(idf) > 0:
+            # Same floor as BM25Okapi, summed in the same order so ties resolve identically
+            average_idf = sum(idf.tolist()) / len(idf)
+            idf[idf < 0] = epsilon * average_idf
+
+        return idf
+
+    def __len__(self) -> int:
+        return self.num_documents
+
+    def score_candidates(self, query_tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the documents containing at least one query term and their BM25 scores,
+        ordered by document id. All other documents score 0.
+        """
+        term_ids = [self.vocabulary[token] for token in query_tokens if token in self.vocabulary]
+
+        if not term_ids:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+
+        postings = [(self.doc_ids[self.indptr[term_id]:self.indptr[term_id + 1]],
+                     self.weights[self.indptr[term_id]:self.indptr[term_id + 1]]) for term_id in term_ids]
+        doc_ids = np.unique(np.concatenate([term_doc_ids for term_doc_ids, _ in postings]))
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+
+        # Term at a time, in query order, so the sums match rank_bm25 to the last bit
+        for term_doc_ids, term_weights in postings:
+            scores[np.searchsorted(doc_ids, term_doc_ids)] += term_weights
+
+        return doc_ids, scores
+
+    def matching_terms(self, query_tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the documents containing at least one distinct query term and how many they contain.
+        """
+        term_ids = {self.vocabulary[token] for token in query_tokens if token in self.vocabulary}
+
+        if not term_ids:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+
+        doc_ids = np.concatenate([self.doc_ids[self.indptr[term_id]:self.indptr[term_id + 1]] for term_id in term_ids])
+
+        return np.unique(doc_ids, return_counts=True)
+
+    def top_k(self, query_tokens: Sequence[str], k: int, tie_break: str = "overlap") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the ``k`` best document ids and their scores, in the order a stable descending
+        sort of every document's score would give (ties in document order). With
+        ``tie_break="overlap"``, if every document scores the same, documents are ordered by
+        the number of distinct query terms they contain.
+        """
+        candidates, scores = self.score_candidates(query_tokens)
+
+        return self._rank(candidates, scores, query_tokens, k, tie_break)
+
+    def top_k_many(self, tokenized_queries: Sequence[Sequence[str]], k: int,
+                   tie_break: str = "overlap") -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        ``top_k`` for a batch of queries, scored as one sparse (queries x terms) @ (terms x documents)
+        product. Scores equal ``top_k``'s up to floating-point summation order.
+        """
+        if len(tokenized_queries) == 0:
+            return []
+
+        scores = (self._query_matrix(tokenized_queries) @ self.matrix).tocsr()
+        scores.sort_indices()
+
+        return [
+            self._rank(scores.indices[scores.indptr[row]:scores.indptr[row + 1]],
+                       scores.data[scores.indptr[row]:scores.indptr[row + 1]],
+                       query_tokens, k, tie_break)
+            for row, query_tokens in enumerate(tokenized_queries)
+        ]
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """
+        BM25 weights as a (terms x documents) matrix; the postings already are its CSR layout.
+        """
+        if self._matrix is None:
+            self._matrix = sparse.csr_matrix((self.weights, self.doc_ids, self.indptr),
+                                             shape=(len(self.indptr) - 1, self.num_documents))
+        return self._matrix
+
+    def _query_matrix(self, tokenized_queries: Sequence[Sequence[str]]) -> sparse.csr_matrix:
+        # A repeated query term counts once per occurrence, as in rank_bm25
+        rows, columns = [], []
+        for row, query_tokens in enumerate(tokenized_queries):
+            for token in query_tokens:
+                if token in self.vocabulary:
+                    rows.append(row)
+                    columns.append(self.vocabulary[token])
+
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)),
+                                 shape=(len(tokenized_queries), len(self.indptr) - 1))
+
+    def _rank(self, candidates: np.ndarray, scores: np.ndarray, query_tokens: Sequence[str], k: int,
+              tie_break: str) -> Tuple[np.ndarray, np.ndarray]:
+        if tie_break not in ("overlap", "score"):
+            raise ValueError(f"Tie break {tie_break} not supported. Choose 'overlap' or 'score'")
+
+        k = min(k, self.num_documents)
+
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        if tie_break == "overlap" and self._all_scores_equal(candidates, scores):
+            return self._top_k_by_overlap(query_tokens, k, scores[0] if len(candidates) == self.num_documents else 0.0)
+
+        positive = scores > 0
+        ranked = self._sorted_desc(candidates[positive], scores[positive], k)
+
+        if len(ranked[0]) < k:
+            zero_ids = self._zero_score_ids(candidates, scores, k - len(ranked[0]))
+            ranked = (np.r_[ranked[0], zero_ids], np.r_[ranked[1], np.zeros(len(zero_ids))])
+
+        if len(ranked[0]) < k:
+            negative = scores < 0
+            rest = self._sorted_desc(candidates[negative], scores[negative], k - len(ranked[0]))
+            ranked = (np.r_[ranked[0], rest[0]], np.r_[ranked[1], rest[1]])
+
+        return ranked[0].astype(np.int64), ranked[1]
+
+    def _all_scores_equal(self, candidates: np.ndarray, scores: np.ndarray) -> bool:
+        if len(candidates) < self.num_documents:
+            return bool(np.all(scores == 0))
+
+        return bool(scores.max() == scores.min())
+
+    def _top_k_by_overlap(self, query_tokens: Sequence[str], k: int, score: float) -> Tuple[np.ndarray, np.ndarray]:
+        doc_ids, counts = self.matching_terms(query_tokens)
+        order = np.argsort(-counts, kind="stable")[:k]
+        ranked = doc_ids[order].astype(np.int64)
+
+        if len(ranked) < k:
+            ranked = np.r_[ranked, self._first_ids_not_in(doc_ids, k - len(ranked))]
+
+        return ranked, np.full(len(ranked), score, dtype=np.float64)
+
+    @staticmethod
+    def _sorted_desc(doc_ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(scores) > k:
+            # Keep every document tied with the k-th score, so ties still resolve by document id
+            threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= threshold
+            doc_ids, scores = doc_ids[keep], scores[keep]
+
+        # doc_ids are ascending, so a stable sort on -score breaks ties by document id
+        order = np.argsort(-scores, kind="stable")[:k]
+
+        return doc_ids[order], scores[order]
+
+    def _zero_score_ids(self, candidates: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        return self._first_ids_not_in(candidates[scores != 0], k)
+
+    def _first_ids_not_in(self, excluded: np.ndarray, k: int) -> np.ndarray:
+        # Walks at most k + len(excluded) ids instead of the whole corpus
+        limit = min(self.num_documents, k + len(excluded))
+        ids = np.setdiff1d(np.arange(limit), excluded, assume_unique=True)
+
+        return ids[:k]
+
+    def save(self, directory_path: Path):
+        directory_path = Path(directory_path)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+
+        np.savez(
+            directory_path / BM25_INDEX_FILE_NAME,
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            terms=np.array(json.dumps(terms)),
+            params=np.array([self.num_documents, self.k1, self.b, self.epsilon], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, directory_path: Path) -> "BM25Index":
+        with np.load(Path(directory_path) / BM25_INDEX_FILE_NAME) as data:
+            terms = json.loads(str(data["terms"]))
+            num_documents, k1, b, epsilon = data["params"].tolist()
+
+            return cls(
+                {term: term_id for term_id, term in enumerate(terms)},
+                data["indptr"],
+                data["doc_ids"],
+                data["weights"],
+                int(num_documents),
+                k1=k1,
+                b=b,
+                epsilon=epsilon,
+            )
+
+    @staticmethod
+    def exists(directory_path: Path) -> bool:
+        return (Path(directory_path) / BM25_INDEX_FILE_NAME).exists()
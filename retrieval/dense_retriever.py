@@ -1,15 +1,131 @@
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from core.query_cache import QueryResultCache
+from indexer.faiss_indexer import documents_for_ids, search_vector_store_ids, search_vector_store_many
+from retrieval.mmr import mmr_rerank
+
+SEARCH_TYPES = ["similarity", "mmr"]
 
 
 class DenseRetriever:
-    def __init__(self, faiss_index: FAISS):
-        self.faiss_index = faiss_index
+    """
+    Dense retrieval over a LangChain FAISS vector store or a FAISSIndexer.
+
+    With a ``query_cache``, results are cached per normalized query and k. Entries are keyed
+    by the FAISSIndexer's ``index_id`` and version, so a query cache needs a FAISSIndexer: a
+    bare LangChain store has no version that tracks its changes.
+
+    ``search_type="mmr"`` fetches ``fetch_k`` candidates and re-ranks them with maximal
+    marginal relevance over the vectors stored in the index, so diversity needs no extra
+    embedding calls.
+    """
+
+    def __init__(self, faiss_index, query_cache: QueryResultCache = None, search_type: str = "similarity",
+                 fetch_k: int = 20, lambda_mult: float = 0.5):
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"Search type {search_type} not supported. Choose from {SEARCH_TYPES}")
+        if isinstance(faiss_index, FAISS):
+            if query_cache is not None:
+                raise ValueError("A query cache needs a DenseRetriever built on a FAISSIndexer, whose version tracks index changes")
+            self.faiss_indexer = None
+            self._faiss_index = faiss_index
+        else:
+            self.faiss_indexer = faiss_index
+            self._faiss_index = None
+        self.query_cache = query_cache
+        self.search_type = search_type
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
 
-    def retrieve(self, query: str, k: int = 5):
+    @property
+    def faiss_index(self) -> FAISS:
+        if self.faiss_indexer is not None:
+            return self.faiss_indexer.vector_store
+        return self._faiss_index
+
+    def _is_empty(self) -> bool:
         try:
             index = getattr(self.faiss_index, "index", None)
             if index is not None and getattr(index, "ntotal", 0) <= 0:
-                return []
+                return True
         except Exception:
             pass
-        return self.faiss_index.similarity_search(query, k=k)
+        return False
+
+    def _cached(self, kind: str, query: str, k: int, search, filter=None):
+        if self.query_cache is None:
+            return search()
+        if self.search_type == "mmr":
+            kind = f"{kind}:mmr:{self.fetch_k}:{self.lambda_mult}"
+        key = QueryResultCache.make_key(query, k, self.faiss_indexer.version, filters=filter, kind=kind,
+                                        index_id=self.faiss_indexer.index_id)
+        results = self.query_cache.get(key)
+        if results is None:
+            results = search()
+            self.query_cache.put(key, results)
+        return list(results)
+
+    def retrieve(self, query: str, k: int = 5, filter: dict = None):
+        """
+        Return the ``k`` closest chunks. A metadata ``filter`` (e.g. {"source": ..., "page": 3})
+        needs a FAISSIndexer, which restricts the FAISS scan itself to the matching chunks.
+        """
+        if self._is_empty():
+            return []
+        if filter is None and self.search_type == "similarity":
+            return self._cached("documents", query, k, lambda: self.faiss_index.similarity_search(query, k=k))
+        return [doc for doc, _ in self.retrieve_with_scores(query, k=k, filter=filter)]
+
+    def retrieve_many(self, queries: list[str], k: int = 5):
+        """
+        Retrieve for a batch of queries with one embedding call and one FAISS search, in query order.
+        """
+        if self._is_empty():
+            return [[] for _ in queries]
+        if self.search_type == "mmr":
+            embeddings = self._embedding_model().embed_documents(list(queries))
+            return [[doc for doc, _ in self._mmr_search(embedding, k)] for embedding in embeddings]
+        if self.faiss_indexer is not None:
+            return self.faiss_indexer.retrieve_many(queries, num_documents=k)
+        embeddings = self._embedding_model().embed_documents(list(queries))
+        return [[doc for doc, _ in results] for results in search_vector_store_many(self.faiss_index, embeddings, k)]
+
+    def retrieve_with_scores(self, query: str, k: int = 5, filter: dict = None):
+        """
+        Return (document, similarity) pairs, best first. Distances are negated so that a
+        higher score is always better, whatever the index metric.
+        """
+        if self._is_empty():
+            return []
+        return self._cached("scores", query, k, lambda: self._search_with_scores(query, k, filter), filter=filter)
+
+    def _search_with_scores(self, query: str, k: int, filter: dict = None):
+        if self.search_type == "mmr":
+            results = self._mmr_search(self._embedding_model().embed_query(query), k, filter)
+        elif filter is None:
+            results = self.faiss_index.similarity_search_with_score(query, k=k)
+        elif self.faiss_indexer is not None:
+            results = self.faiss_indexer.search_with_scores(query, k, filter)
+        else:
+            raise ValueError("Metadata filters need a DenseRetriever built on a FAISSIndexer")
+        if getattr(self.faiss_index, "distance_strategy", None) == DistanceStrategy.MAX_INNER_PRODUCT:
+            return [(doc, float(score)) for doc, score in results]
+        return [(doc, -float(score)) for doc, score in results]
+
+    def _embedding_model(self):
+        if self.faiss_indexer is not None:
+            return self.faiss_indexer.embedding_model
+        return self.faiss_index.embedding_function
+
+    def _mmr_search(self, embedding, k: int, filter: dict = None):
+        fetch_k = max(k, self.fetch_k)
+        if self.faiss_indexer is not None:
+            distances, labels = self.faiss_indexer.search_ids_by_vector(embedding, fetch_k, filter)
+        elif filter is not None:
+            raise ValueError("Metadata filters need a DenseRetriever built on a FAISSIndexer")
+        else:
+            distances, labels = search_vector_store_ids(self.faiss_index, [embedding], fetch_k)
+            distances, labels = distances[0], labels[0]
+
+        distances, labels = mmr_rerank(self.faiss_index.index, embedding, distances, labels, k, self.lambda_mult)
+        return documents_for_ids(self.faiss_index, distances, labels)
@@ -1,14 +1,116 @@
-from typing import List
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Tuple
 from langchain_core.documents import Document
+from core.hashing import text_sha256
 from retrieval.dense_retriever import DenseRetriever
 from retrieval.sparse_retriever import SparseRetriever
 
+FUSION_METHODS = ["rrf", "weighted"]
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_default_executor() -> Executor:
+    """
+    Thread pool shared by every HybridRetriever that is not given one; each query uses one
+    worker for the dense search while the calling thread runs the sparse one.
+    """
+    global _default_executor
+
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retriever")
+
+    return _default_executor
+
+
 class HybridRetriever:
-    def __init__(self, dense: DenseRetriever, sparse: SparseRetriever):
+    """
+    Runs dense and sparse retrieval concurrently and fuses the two rankings.
+
+    fusion:
+        rrf       reciprocal-rank fusion, sum of 1 / (rrf_k + rank) over both rankings
+        weighted  min-max normalized scores of each ranking, mixed with ``dense_weight``
+
+    A chunk returned by both backends appears once, keyed by its docstore id or, for
+    documents without one, by a hash of its content.
+
+    The dense search runs on ``executor``, which the caller owns, or on a pool shared by
+    all retrievers (see get_default_executor).
+    """
+
+    def __init__(self, dense: DenseRetriever, sparse: SparseRetriever, fusion: str = "rrf", rrf_k: int = 60,
+                 dense_weight: float = 0.5, executor: Executor = None):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Fusion {fusion} not supported. Choose one of {FUSION_METHODS}")
+
         self.dense = dense
         self.sparse = sparse
-    def retrieve(self, query: str, k_dense: int = 5, k_sparse: int = 5) -> List[Document]:
-        dense_results = self.dense.retrieve(query, k=k_dense)
-        sparse_results = self.sparse.retrieve(query, k=k_sparse)
-        results = {id(doc): doc for doc in dense_results + sparse_results}
-        return list(results.values())
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self._executor = executor if executor is not None else get_default_executor()
+
+    def retrieve(self, query: str, k_dense: int = 5, k_sparse: int = 5, k: int = None) -> List[Document]:
+        return [doc for doc, _ in self.retrieve_with_scores(query, k_dense=k_dense, k_sparse=k_sparse, k=k)]
+
+    def retrieve_with_scores(self, query: str, k_dense: int = 5, k_sparse: int = 5,
+                             k: int = None) -> List[Tuple[Document, float]]:
+        """
+        Return up to ``k`` fused results (all distinct results if ``k`` is None), best first.
+        """
+        # Both backends release the GIL in their numeric kernels, so latency is about max(dense, sparse)
+        dense_future = self._executor.submit(self.dense.retrieve_with_scores, query, k_dense)
+        sparse_results = self.sparse.retrieve_with_scores(query, k_sparse)
+        dense_results = dense_future.result()
+
+        fused = self._fuse([dense_results, sparse_results], [self.dense_weight, 1 - self.dense_weight])
+
+        return fused[:k] if k is not None else fused
+
+    def _fuse(self, rankings: List[List[Tuple[Document, float]]], weights: List[float]) -> List[Tuple[Document, float]]:
+        documents = []
+        scores = []
+        # Docstore id and content hash both point at the position of the first copy of a chunk
+        positions = {}
+
+        for ranking, weight in zip(rankings, weights):
+            if self.fusion == "rrf":
+                ranking_scores = [1 / (self.rrf_k + rank) for rank in range(1, len(ranking) + 1)]
+            else:
+                ranking_scores = [weight * score for score in self._normalize([score for _, score in ranking])]
+
+            for (doc, _), score in zip(ranking, ranking_scores):
+                keys = self._document_keys(doc)
+                position = next((positions[key] for key in keys if key in positions), None)
+
+                if position is None:
+                    position = len(documents)
+                    documents.append(doc)
+                    scores.append(0.0)
+
+                scores[position] += score
+                for key in keys:
+                    positions.setdefault(key, position)
+
+        # sorted is stable: equal fused scores keep dense-first, rank order
+        ranked = sorted(range(len(documents)), key=lambda position: scores[position], reverse=True)
+        return [(documents[position], scores[position]) for position in ranked]
+
+    @staticmethod
+    def _normalize(scores: List[float]) -> List[float]:
+        if not scores:
+            return []
+        low, high = min(scores), max(scores)
+        if high == low:
+            return [1.0 for _ in scores]
+        return [(score - low) / (high - low) for score in scores]
+
+    @staticmethod
+    def _document_keys(doc: Document) -> List[str]:
+        keys = ["content:" + text_sha256(doc.page_content)]
+        if doc.id:
+            keys.insert(0, "id:" + doc.id)
+        return keys
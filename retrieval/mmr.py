@@ -0,0 +1,61 @@
+import numpy as np
+
+from indexer.index_factory import reconstruct_vectors
+
+
+def maximal_marginal_relevance(query_vector, candidate_vectors, k: int, lambda_mult: float = 0.5) -> list[int]:
+    """
+    Greedy MMR selection over ``candidate_vectors``. Returns up to ``k`` candidate positions in
+    selection order.
+
+    Similarities are cosine, as in LangChain's ``maximal_marginal_relevance``. The query and
+    pairwise similarity matrices are computed once; each step then updates the best similarity
+    of every candidate to the selected set with one vector op.
+    """
+    candidates = _normalize_rows(candidate_vectors)
+    if len(candidates) == 0 or k <= 0:
+        return []
+
+    query = _normalize_rows(np.reshape(query_vector, (1, -1)))[0]
+    query_similarity = candidates @ query
+    pairwise_similarity = candidates @ candidates.T
+
+    # The first pick is the candidate closest to the query, whatever lambda_mult is
+    best = int(np.argmax(query_similarity))
+    selected = [best]
+    available = np.ones(len(candidates), dtype=bool)
+    available[best] = False
+    redundancy = pairwise_similarity[:, best].copy()
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise_similarity[:, best])
+
+    return selected
+
+
+def mmr_rerank(index, query_vector, distances, labels, k: int, lambda_mult: float = 0.5):
+    """
+    Re-rank the (distances, labels) of a FAISS search with MMR, using the vectors stored in
+    ``index`` rather than re-embedding the candidate chunks.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    found = labels >= 0
+    distances, labels = np.asarray(distances)[found], labels[found]
+    if len(labels) == 0:
+        return distances, labels
+
+    selected = maximal_marginal_relevance(query_vector, reconstruct_vectors(index, labels), k, lambda_mult)
+
+    return distances[selected], labels[selected]
+
+
+def _normalize_rows(vectors) -> np.ndarray:
+    vectors = np.array(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -1,26 +1,105 @@
-from rank_bm25 import BM25Okapi
+import pickle
+from pathlib import Path
+from typing import Iterable
 from langchain_core.documents import Document
 import re
 
+from retrieval.bm25_index import BM25Index
+
+SPARSE_DOCUMENTS_FILE_NAME = "bm25_documents.pkl"
+
+
 class SparseRetriever:
-    def __init__(self, corpus: list[Document]):
-        self.corpus = corpus
-        self.tokenized = [self._tokenize(doc.page_content) for doc in corpus]
-        self.bm25 = BM25Okapi(self.tokenized)
+    def __init__(self, corpus: list[Document], index: BM25Index = None):
+        self.corpus = list(corpus)
+        self._index = index
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "SparseRetriever":
+        """
+        Build the retriever while consuming ``documents``, e.g. pages from ``iter_pdf_pages`` or
+        chunks as they are split, tokenizing each one as it arrives.
+        """
+        corpus = []
+
+        def tokenized_corpus():
+            for doc in documents:
+                corpus.append(doc)
+                yield cls._tokenize(doc.page_content)
+
+        index = BM25Index.build(tokenized_corpus())
+        return cls(corpus, index=index)
+
+    @classmethod
+    def from_faiss_indexer(cls, faiss_indexer) -> "SparseRetriever":
+        """
+        Build the retriever over the chunks of a FAISSIndexer's docstore and keep it in sync with
+        the indexer's later additions and removals. A BM25 index saved next to the FAISS index is
+        reused when it covers exactly the same chunks.
+        """
+        corpus = faiss_indexer.documents()
+        index = None
+
+        directory_path = faiss_indexer.directory_path
+        if directory_path is not None and cls.exists(directory_path):
+            saved = cls.load(directory_path)
+            if [(doc.id, doc.page_content) for doc in saved.corpus] == [(doc.id, doc.page_content) for doc in corpus]:
+                index = saved.index
+
+        retriever = cls(corpus, index=index)
+        faiss_indexer.add_listener(retriever)
+        return retriever
 
-    def _tokenize(self, text: str) -> list[str]:
+    @property
+    def index(self) -> BM25Index:
+        # BM25 weights depend on corpus-wide statistics, so changes rebuild the index on next use
+        if self._index is None:
+            self._index = BM25Index.build(self._tokenize(doc.page_content) for doc in self.corpus)
+        return self._index
+
+    def documents_added(self, documents: list[Document]):
+        self.corpus.extend(documents)
+        self._index = None
+
+    def documents_removed(self, ids: list[str]):
+        removed = set(ids)
+        self.corpus = [doc for doc in self.corpus if doc.id not in removed]
+        self._index = None
+
+    @staticmethod
+    def _tokenize(text: str) -> list[str]:
         return re.findall(r"\w+", text.lower())
 
-    def retrieve(self, query: str, k: int = 5):
-        query_tokens = self._tokenize(query)
-        scores = self.bm25.get_scores(query_tokens)
-        ranked = list(zip(self.corpus, self.tokenized, scores))
-        # If BM25 yields ties everywhere, break ties by overlap count
-        if ranked and max(s for _, _, s in ranked) == min(s for _, _, s in ranked):
-            ranked.sort(
-                key=lambda x: len(set(query_tokens) & set(x[1])),
-                reverse=True,
-            )
-        else:
-            ranked.sort(key=lambda x: x[2], reverse=True)
-        return [doc for doc, _, _ in ranked[:k]]
+    def retrieve(self, query: str, k: int = 5, tie_break: str = "overlap"):
+        return [doc for doc, _ in self.retrieve_with_scores(query, k=k, tie_break=tie_break)]
+
+    def retrieve_with_scores(self, query: str, k: int = 5, tie_break: str = "overlap") -> list[tuple[Document, float]]:
+        # Only the postings of the query terms are scored; if BM25 yields ties everywhere,
+        # tie_break="overlap" breaks them by overlap count
+        doc_ids, scores = self.index.top_k(self._tokenize(query), k, tie_break=tie_break)
+        return [(self.corpus[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
+
+    def retrieve_many(self, queries: list[str], k: int = 5, tie_break: str = "overlap") -> list[list[Document]]:
+        """
+        Retrieve for a batch of queries (evaluation sets, replayed logs) with one sparse matrix product.
+        """
+        ranked = self.index.top_k_many([self._tokenize(query) for query in queries], k, tie_break=tie_break)
+        return [[self.corpus[doc_id] for doc_id in doc_ids] for doc_ids, _ in ranked]
+
+    def save(self, directory_path: Path):
+        """
+        Save the BM25 postings and the corpus, e.g. next to a FAISS index directory.
+        """
+        self.index.save(directory_path)
+        with open(Path(directory_path) / SPARSE_DOCUMENTS_FILE_NAME, "wb") as f:
+            pickle.dump(self.corpus, f)
+
+    @classmethod
+    def load(cls, directory_path: Path) -> "SparseRetriever":
+        with open(Path(directory_path) / SPARSE_DOCUMENTS_FILE_NAME, "rb") as f:
+            corpus = pickle.load(f)
+        return cls(corpus, index=BM25Index.load(directory_path))
+
+    @staticmethod
+    def exists(directory_path: Path) -> bool:
+        return BM25Index.exists(directory_path) and (Path(directory_path) / SPARSE_DOCUMENTS_FILE_NAME).exists()
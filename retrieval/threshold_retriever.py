@@ -0,0 +1,53 @@
+from typing import Optional
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from indexer.faiss_indexer import documents_for_ids, search_vector_store_ids
+from retrieval.dense_retriever import SEARCH_TYPES
+from retrieval.mmr import mmr_rerank
+
+
+class ThresholdRetriever(BaseRetriever):
+    """
+    LangChain retriever that embeds the query once, fetches ``fetch_k`` scored candidates in
+    one FAISS search, drops those beyond ``score_threshold`` and returns the best ``k`` of the
+    rest, re-ranked with MMR over the stored vectors when ``search_type="mmr"``.
+
+    The threshold is a distance (smaller is better) for L2 stores and a similarity (larger is
+    better) for inner-product stores, as ``similarity_search_with_score`` reports them.
+    """
+
+    vectorstore: FAISS
+    k: int = 4
+    fetch_k: int = 20
+    score_threshold: Optional[float] = None
+    search_type: str = "similarity"
+    lambda_mult: float = 0.5
+
+    def model_post_init(self, __context) -> None:
+        if self.search_type not in SEARCH_TYPES:
+            raise ValueError(f"Search type {self.search_type} not supported. Choose from {SEARCH_TYPES}")
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return [doc for doc, _ in self.retrieve_with_scores(query)]
+
+    def retrieve_with_scores(self, query: str) -> list[tuple]:
+        embedding = self.vectorstore.embedding_function.embed_query(query)
+        distances, labels = search_vector_store_ids(self.vectorstore, [embedding], max(self.k, self.fetch_k))
+        distances, labels = distances[0], labels[0]
+
+        if self.score_threshold is not None:
+            if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+                keep = distances >= self.score_threshold
+            else:
+                keep = distances <= self.score_threshold
+            distances, labels = distances[keep], labels[keep]
+
+        if self.search_type == "mmr":
+            distances, labels = mmr_rerank(self.vectorstore.index, embedding, distances, labels, self.k, self.lambda_mult)
+
+        return documents_for_ids(self.vectorstore, distances[:self.k], labels[:self.k])
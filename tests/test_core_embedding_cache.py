@@ -0,0 +1,44 @@
+from pathlib import Path
+import sys
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: list = []
+
+    def embed_documents(self,texts):
+        self.calls.append(list(texts))
+        return super().embed_documents(texts)
+
+
+def test_cached_embeddings_only_embeds_misses(tmp_path):
+    backend = CountingEmbeddings(size=8,calls=[])
+    cache_path = tmp_path / "embeddings.sqlite"
+    embeddings = CachedEmbeddings(backend,cache_path,model="fake",dimensions=8)
+
+    first = embeddings.embed_documents(["policy","claim","policy"])
+    second = embeddings.embed_documents(["claim","report"])
+
+    assert backend.calls == [["policy","claim"],["report"]]
+    assert np.allclose(first[1],second[0])
+    assert embeddings.cache_info()["hits"] == 2
+    assert embeddings.cache_info()["misses"] == 3
+
+    # A new process reuses the vectors on disk
+    reopened = CachedEmbeddings(CountingEmbeddings(size=8,calls=[]),cache_path,model="fake",dimensions=8)
+    assert np.allclose(reopened.embed_query("report"),second[1])
+    assert reopened.cache_info() == {"hits":1,"misses":0,"hit_rate":1.0,"entries":3}
+
+
+def test_cached_embeddings_keyed_by_model_and_dimensions(tmp_path):
+    cache_path = tmp_path / "embeddings.sqlite"
+    CachedEmbeddings(CountingEmbeddings(size=8,calls=[]),cache_path,model="fake",dimensions=8).embed_query("policy")
+
+    other_dimensions = CachedEmbeddings(CountingEmbeddings(size=4,calls=[]),cache_path,model="fake",dimensions=4)
+    assert len(other_dimensions.embed_query("policy")) == 4
+    assert other_dimensions.cache_info()["misses"] == 1
@@ -0,0 +1,79 @@
+import os
+import time
+from pathlib import Path
+import sys
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core import pdf_reader
+from core.parse_cache import ParseCache
+
+
+def _fake_pages():
+    table = pd.DataFrame({"Item":["Laptop","Phone"],"Amount":[1200,800]})
+    return [{"text":"Page one","tables":[]},{"text":"Page two <table></table>","tables":[table]}]
+
+
+def test_parse_cache_round_trip(tmp_path):
+    cache = ParseCache(directory=tmp_path)
+    key = ParseCache.make_key("digest",{"result_type":"markdown"},"documents")
+
+    assert cache.get(key) is None
+
+    cache.put(key,_fake_pages(),source_name="report.pdf",format="documents")
+    pages = cache.get(key)
+
+    assert [page["text"] for page in pages] == ["Page one","Page two <table></table>"]
+    assert len(pages[1]["tables"]) == 1
+    assert list(pages[1]["tables"][0]["Item"]) == ["Laptop","Phone"]
+
+
+def test_parse_cache_key_depends_on_options_and_format():
+    key = ParseCache.make_key("digest",{"result_type":"markdown"},"documents")
+
+    assert key != ParseCache.make_key("other",{"result_type":"markdown"},"documents")
+    assert key != ParseCache.make_key("digest",{"result_type":"text"},"documents")
+    assert key != ParseCache.make_key("digest",{"result_type":"markdown"},"text")
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(directory=tmp_path)
+
+    for key in ["a","b","c"]:
+        cache.put(key,_fake_pages())
+
+    # Make "a" the most recently used entry
+    now = time.time()
+    os.utime(tmp_path / "a.json",(now + 10,now + 10))
+
+    # Entry sizes can differ by a few bytes (timestamps), so leave room for the largest
+    entry_size = max(entry["size_bytes"] for entry in cache.entries())
+    evicted = cache.prune(max_size_bytes=entry_size)
+
+    assert sorted(evicted) == ["b","c"]
+    assert [entry["key"] for entry in cache.entries()] == ["a"]
+
+
+def test_read_pdf_warm_call_skips_parser(tmp_path,monkeypatch):
+    calls = []
+
+    def fake_parse_pages(path,result_type,extract_tables):
+        calls.append(path)
+        return _fake_pages()
+
+    monkeypatch.setattr(pdf_reader,"_parse_pages",fake_parse_pages)
+    cache = ParseCache(directory=tmp_path)
+    pdf_path = Path("tests/data/report.pdf")
+
+    cold = pdf_reader.read_pdf(pdf_path,cache=cache)
+    warm = pdf_reader.read_pdf(pdf_path,cache=cache)
+
+    assert len(calls) == 1
+    assert [doc.page_content for doc in warm] == [doc.page_content for doc in cold]
+    assert warm[1].metadata["page"] == 2
+    assert warm[1].metadata["source"] == str(pdf_path)
+    assert isinstance(warm[1].metadata["tables"][0],pd.DataFrame)
+
+    pdf_reader.read_pdf(pdf_path,format="text",cache=cache)
+    assert len(calls) == 2
@@ -0,0 +1,75 @@
+from pathlib import Path
+import sys
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core import pdf_reader
+from core.parse_cache import ParseCache
+
+
+class StandInParser:
+    """Offline stand-in for LlamaParse on the escalated pages."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self,path,page_indices):
+        self.calls.append(list(page_indices))
+        table = pd.DataFrame({"Service":["Ambulance helicopter evacuation"],"Cost (NIS)":[6500]})
+        return [{"text":f"Remote page {page_index + 1} <table></table>","tables":[table]} for page_index in page_indices]
+
+
+def _fail_remote_parse(*args,**kwargs):
+    raise AssertionError("the whole file must not be sent to LlamaParse")
+
+
+def test_hybrid_escalates_only_table_pages(tmp_path,monkeypatch):
+    monkeypatch.setattr(pdf_reader,"_parse_pages",_fail_remote_parse)
+    remote_parser = StandInParser()
+    pdf_path = Path("tests/data/event_report_2_extended.pdf")
+
+    pages = pdf_reader.read_pdf(pdf_path,cache=ParseCache(directory=tmp_path),parser="hybrid",remote_parser=remote_parser)
+
+    assert remote_parser.calls == [[1]]
+    assert len(pages) == 2
+    assert "Negev Desert" in pages[0].page_content
+    assert pages[0].metadata == {"source":str(pdf_path),"page":1,"tables":[]}
+    assert pages[1].page_content == "Remote page 2 <table></table>"
+    assert list(pages[1].metadata["tables"][0]["Cost (NIS)"]) == [6500]
+
+    # Warm calls skip both parsers
+    pdf_reader.read_pdf(pdf_path,cache=ParseCache(directory=tmp_path),parser="hybrid",remote_parser=remote_parser)
+    assert remote_parser.calls == [[1]]
+
+
+def test_hybrid_plain_text_pdf_stays_local(monkeypatch):
+    monkeypatch.setattr(pdf_reader,"_parse_pages",_fail_remote_parse)
+    monkeypatch.setenv("REPORTS_PDF_PARSER","hybrid")
+
+    text = pdf_reader.read_pdf(Path("tests/data/report.pdf"),format="text",use_cache=False)
+
+    assert len(text) > 0
+
+
+def test_parser_is_part_of_the_cache_key(tmp_path,monkeypatch):
+    calls = []
+
+    def fake_parse_pages(path,result_type,extract_tables,target_pages=None):
+        calls.append(target_pages)
+        return [{"text":"LlamaParse page","tables":[]} for _ in range(2)]
+
+    monkeypatch.setattr(pdf_reader,"_parse_pages",fake_parse_pages)
+    cache = ParseCache(directory=tmp_path)
+    pdf_path = Path("tests/data/event_report_2_extended.pdf")
+
+    full = pdf_reader.read_pdf(pdf_path,cache=cache)
+    hybrid = pdf_reader.read_pdf(pdf_path,cache=cache,parser="hybrid",remote_parser=StandInParser())
+
+    assert calls == [None]
+    assert full[0].page_content == "LlamaParse page"
+    assert "Negev Desert" in hybrid[0].page_content
+
+    with pytest.raises(ValueError):
+        pdf_reader.read_pdf(pdf_path,cache=cache,parser="ocr")
@@ -0,0 +1,94 @@
+from pathlib import Path
+import sys
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core import pdf_reader
+from core.parse_cache import ParseCache
+
+
+class StandInParser:
+    """Offline stand-in for LlamaParse on the escalated pages."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self,path,page_indices):
+        self.calls.append(list(page_indices))
+        table = pd.DataFrame({"Service":["Ambulance helicopter evacuation"],"Cost (NIS)":[6500]})
+        return [{"text":f"Remote page {page_index + 1} <table></table>","tables":[table]} for page_index in page_indices]
+
+
+def _fail_remote_parse(*args,**kwargs):
+    raise AssertionError("the whole file must not be sent to LlamaParse")
+
+
+class WindowParser:
+    """Offline stand-in for LlamaParse, parsing the target pages of each window."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self,path,result_type,extract_tables,target_pages=None):
+        self.calls.append(list(target_pages))
+        return [{"text":f"Page {page_index + 1}","tables":[]} for page_index in target_pages]
+
+
+def test_iter_pdf_pages_parses_in_windows(tmp_path,monkeypatch):
+    parse_pages = WindowParser()
+    monkeypatch.setattr(pdf_reader,"_parse_pages",parse_pages)
+    cache = ParseCache(directory=tmp_path)
+    pdf_path = Path("tests/data/report.pdf")
+
+    pages = list(pdf_reader.iter_pdf_pages(pdf_path,cache=cache,window=3))
+
+    assert parse_pages.calls == [[0,1,2],[3]]
+    assert [page.page_content for page in pages] == ["Page 1","Page 2","Page 3","Page 4"]
+    assert pages[3].metadata == {"source":str(pdf_path),"page":4,"tables":[]}
+
+    # The streamed parse fills the same cache entry read_pdf uses
+    assert [page.page_content for page in pdf_reader.read_pdf(pdf_path,cache=cache)] == [page.page_content for page in pages]
+    assert parse_pages.calls == [[0,1,2],[3]]
+
+
+def test_iter_pdf_pages_matches_read_pdf(tmp_path,monkeypatch):
+    monkeypatch.setattr(pdf_reader,"_parse_pages",_fail_remote_parse)
+    pdf_path = Path("tests/data/event_report_2_extended.pdf")
+    remote_parser = StandInParser()
+
+    streamed = list(pdf_reader.iter_pdf_pages(pdf_path,cache=ParseCache(directory=tmp_path / "stream"),parser="hybrid",
+                                              remote_parser=remote_parser,window=1))
+    parsed = pdf_reader.read_pdf(pdf_path,cache=ParseCache(directory=tmp_path / "read"),parser="hybrid",remote_parser=StandInParser())
+
+    assert remote_parser.calls == [[1]]
+    assert [page.page_content for page in streamed] == [page.page_content for page in parsed]
+    assert list(streamed[1].metadata["tables"][0]["Cost (NIS)"]) == [6500]
+
+    text = pdf_reader.read_pdf(Path("tests/data/report.pdf"),format="text",use_cache=False,parser="hybrid")
+    pages = pdf_reader.iter_pdf_pages(Path("tests/data/report.pdf"),format="text",use_cache=False,parser="hybrid",window=2)
+    assert "\n\n".join(page.page_content for page in pages) == text
+
+
+def test_abandoned_stream_is_not_cached(tmp_path,monkeypatch):
+    monkeypatch.setattr(pdf_reader,"_parse_pages",WindowParser())
+    cache = ParseCache(directory=tmp_path)
+
+    pages = pdf_reader.iter_pdf_pages(Path("tests/data/report.pdf"),cache=cache,window=1)
+    assert next(pages).page_content == "Page 1"
+    pages.close()
+
+    assert cache.entries() == []
+
+
+def test_parse_errors_reach_the_consumer(monkeypatch):
+    def failing_remote_parser(path,page_indices):
+        raise RuntimeError("LlamaParse job failed")
+
+    pages = pdf_reader.iter_pdf_pages(Path("tests/data/event_report_2_extended.pdf"),use_cache=False,parser="hybrid",
+                                      remote_parser=failing_remote_parser,window=1)
+
+    assert "Negev Desert" in next(pages).page_content
+    with pytest.raises(RuntimeError):
+        next(pages)
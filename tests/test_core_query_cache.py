@@ -0,0 +1,109 @@
+from pathlib import Path
+import sys
+import time
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.query_cache import QueryResultCache
+from indexer.faiss_indexer import FAISSIndexer
+from retrieval.dense_retriever import DenseRetriever
+
+
+class CountingQueryEmbeddings(DeterministicFakeEmbedding):
+    queries: list = []
+
+    def embed_query(self,text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def _indexer(query_cache:QueryResultCache)->FAISSIndexer:
+    indexer = FAISSIndexer(CountingQueryEmbeddings(size=8,queries=[]),query_cache=query_cache)
+    indexer.add_documents([
+        Document(page_content="Insurance policy 123",metadata={"source":"policy.pdf"}),
+        Document(page_content="Claim filed March 2025",metadata={"source":"claim.pdf"}),
+    ])
+    # Building the index probes the embedding dimension
+    indexer.embedding_model.queries.clear()
+
+    return indexer
+
+
+def test_query_cache_lru_and_ttl():
+    cache = QueryResultCache(max_entries=2,ttl_seconds=0.05)
+    cache.put("a",1)
+    cache.put("b",2)
+    assert cache.get("a") == 1
+    cache.put("c",3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    time.sleep(0.1)
+    assert cache.get("c") is None
+    assert cache.stats() == {"hits":2,"misses":2,"hit_rate":0.5,"evictions":1,"expirations":1,"entries":1}
+
+
+def test_faiss_indexer_retrieve_is_cached_until_the_index_changes():
+    cache = QueryResultCache()
+    indexer = _indexer(cache)
+
+    first = indexer.retrieve("Claim filed  March 2025",num_documents=1)
+    second = indexer.retrieve(" claim filed march 2025",num_documents=1)
+
+    assert first == second
+    assert len(indexer.embedding_model.queries) == 1
+    assert cache.stats()["hits"] == 1
+
+    indexer.retrieve("Claim filed March 2025",num_documents=2)
+    assert len(indexer.embedding_model.queries) == 2
+
+    indexer.add_documents([Document(page_content="Claim filed March 2025, second copy",metadata={"source":"copy.pdf"})])
+    indexer.retrieve("Claim filed March 2025",num_documents=1)
+    assert len(indexer.embedding_model.queries) == 3
+
+
+def test_dense_retriever_cache_follows_indexer_version():
+    cache = QueryResultCache()
+    indexer = _indexer(None)
+    retriever = DenseRetriever(indexer,query_cache=cache)
+
+    assert retriever.retrieve("policy",k=1) == retriever.retrieve("Policy",k=1)
+    assert len(indexer.embedding_model.queries) == 1
+
+    indexer.remove_source("policy.pdf")
+    assert retriever.retrieve("policy",k=1)[0].page_content == "Claim filed March 2025"
+    assert len(indexer.embedding_model.queries) == 2
+
+
+def test_indexers_sharing_a_cache_keep_their_results_apart():
+    cache = QueryResultCache()
+    policies = FAISSIndexer(DeterministicFakeEmbedding(size=8),query_cache=cache)
+    policies.add_documents([Document(page_content="Insurance policy 123",metadata={"source":"policy.pdf"})])
+    claims = FAISSIndexer(DeterministicFakeEmbedding(size=8),query_cache=cache)
+    claims.add_documents([Document(page_content="Claim filed March 2025",metadata={"source":"claim.pdf"})])
+
+    assert policies.version == claims.version
+    assert policies.retrieve("policy",num_documents=1)[0].page_content == "Insurance policy 123"
+    assert claims.retrieve("policy",num_documents=1)[0].page_content == "Claim filed March 2025"
+    assert DenseRetriever(claims,query_cache=cache).retrieve("policy",k=1)[0].page_content == "Claim filed March 2025"
+
+
+def test_dense_retriever_cache_sees_remove_then_add_with_the_same_count():
+    cache = QueryResultCache()
+    indexer = _indexer(None)
+    retriever = DenseRetriever(indexer,query_cache=cache)
+
+    assert retriever.retrieve("Insurance policy 123",k=1)[0].page_content == "Insurance policy 123"
+
+    indexer.remove_source("policy.pdf")
+    indexer.add_documents([Document(page_content="Insurance policy 456",metadata={"source":"policy.pdf"})])
+
+    assert indexer.vector_store.index.ntotal == 2
+    assert retriever.retrieve("Insurance policy 123",k=1)[0].page_content != "Insurance policy 123"
+
+    with pytest.raises(ValueError):
+        DenseRetriever(indexer.vector_store,query_cache=cache)
@@ -0,0 +1,38 @@
+from pathlib import Path
+import sys
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.table_store import TableStore
+
+
+def test_table_store_round_trip(tmp_path):
+    store = TableStore(tmp_path)
+    items = pd.DataFrame({"Item":["Laptop","Phone"],"Price":[1200,800]})
+    header_less = pd.DataFrame([["Deductible","500"],["Premium","120"]])
+    grouped = pd.DataFrame([[1,2]],columns=pd.MultiIndex.from_tuples([("Cost","Min"),("Cost","Max")]))
+    mixed = pd.DataFrame({"Value":[1,"n/a"]})
+
+    table_ids = store.put_page_tables("pdfs/report.pdf",2,[items,header_less,grouped,mixed])
+
+    assert table_ids == [TableStore.make_table_id("pdfs/report.pdf",2,position) for position in range(4)]
+    pd.testing.assert_frame_equal(store.get(table_ids[0]),items)
+    assert list(store.get(table_ids[1]).columns) == ["0","1"]
+    assert list(store.get(table_ids[2]).columns) == [("Cost","Min"),("Cost","Max")]
+    assert list(store.get(table_ids[3])["Value"]) == ["1","n/a"]
+    assert store.put_page_tables("pdfs/report.pdf",3,[]) == []
+
+
+def test_table_store_remove_source(tmp_path):
+    store = TableStore(tmp_path)
+    table = pd.DataFrame({"Item":["Laptop"]})
+    store.put_page_tables("a.pdf",1,[table,table])
+    store.put_page_tables("b.pdf",1,[table])
+
+    assert store.remove_source("a.pdf") == 2
+    assert store.table_ids() == [TableStore.make_table_id("b.pdf",1,0)]
+
+    with pytest.raises(KeyError):
+        store.get(TableStore.make_table_id("a.pdf",1,0))
@@ -0,0 +1,77 @@
+from pathlib import Path
+import random
+import sys
+import pytest
+import tiktoken
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.text_splitter import _SEPARATORS, EncodeOnceTextSplitter, _token_offsets, get_encoding, get_text_splitter
+
+
+class ByteEncoding(tiktoken.Encoding):
+    """One token per byte, so it needs no download and token counts add up exactly across pieces."""
+
+    encode_calls = 0
+
+    def __init__(self):
+        super().__init__("bytes",pat_str=r"\s+|\S+",mergeable_ranks={bytes([i]):i for i in range(256)},special_tokens={})
+
+    def encode(self,text,**kwargs):
+        ByteEncoding.encode_calls += 1
+        return super().encode(text,**kwargs)
+
+
+def _report_like_text(seed:int)->str:
+    rng = random.Random(seed)
+    words = ["policy","claim","insurance","the","of","luggage","Madrid","x" * 400]
+    separators = ["\n## ","\n### ","\n- ","\n* ","\n\n","\n"," "," "," "," "]
+
+    return "".join(rng.choice(separators) + rng.choice(words) for _ in range(300))
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap",[(300,50),(100,30),(20,5)])
+def test_encode_once_splitter_matches_recursive_splitter(chunk_size,chunk_overlap):
+    encoding = ByteEncoding()
+    recursive = RecursiveCharacterTextSplitter(chunk_size=chunk_size,chunk_overlap=chunk_overlap,separators=_SEPARATORS,
+                                               length_function=lambda text:len(encoding.encode(text)))
+    encode_once = EncodeOnceTextSplitter(chunk_size=chunk_size,chunk_overlap=chunk_overlap,encoding=encoding)
+
+    for seed in range(3):
+        text = _report_like_text(seed)
+        expected = recursive.split_text(text)
+
+        ByteEncoding.encode_calls = 0
+        assert encode_once.split_text(text) == expected
+        assert ByteEncoding.encode_calls == 1
+
+
+def test_token_offsets_match_decode_with_offsets():
+    encoding = ByteEncoding()
+
+    for text in ["héllo wörld 日本 😀 x","","abc\ud800def"]:
+        tokens = encoding.encode(text)
+        assert _token_offsets(encoding,text,tokens).tolist() == encoding.decode_with_offsets(tokens)[1]
+
+
+def test_get_text_splitter_keeps_audited_attributes():
+    text_splitter = get_text_splitter(chunk_size=120)
+
+    assert isinstance(text_splitter,EncodeOnceTextSplitter)
+    assert (text_splitter._chunk_size,text_splitter._chunk_overlap) == (120,50)
+    assert text_splitter._length_function.__name__ == "tiktoken_len"
+    assert isinstance(get_text_splitter(encode_once=False),RecursiveCharacterTextSplitter)
+
+
+def test_encode_once_chunks_fit_cl100k():
+    try:
+        encoding = get_encoding()
+    except Exception:
+        pytest.skip("cl100k_base encoding is not available offline")
+
+    text = _report_like_text(0)
+    chunks = EncodeOnceTextSplitter(chunk_size=100,chunk_overlap=20).split_text(text)
+
+    # Re-encoding a chunk on its own can merge a token differently at its edges
+    assert all(len(encoding.encode(chunk)) <= 102 for chunk in chunks)
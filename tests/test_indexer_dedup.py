@@ -0,0 +1,76 @@
+from pathlib import Path
+import sys
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer import indexer as indexer_module
+from indexer.dedup import ChunkDeduplicator
+from indexer.faiss_indexer import FAISSIndexer
+from indexer.indexer import TextChunker
+
+BOILERPLATE = ("The insurer will not be liable for any loss arising from war, invasion, act of foreign enemy, "
+               "hostilities or warlike operations, civil war, rebellion, revolution or insurrection. ") * 2
+
+
+def test_near_duplicates_share_a_bucket():
+    deduplicator = ChunkDeduplicator(threshold=0.8)
+    deduplicator.add("original",deduplicator.signature(BOILERPLATE))
+
+    assert deduplicator.find(deduplicator.signature(BOILERPLATE.upper().replace(" ","  "))) == "original"
+    assert deduplicator.find(deduplicator.signature(BOILERPLATE.replace("war,","war or terrorism,",1))) == "original"
+    assert deduplicator.find(deduplicator.signature("Luggage lost on a flight from Toronto to Madrid")) is None
+
+    deduplicator.remove("original")
+    assert deduplicator.find(deduplicator.signature(BOILERPLATE)) is None
+    assert len(deduplicator) == 0
+
+
+def _fake_read_pdf(pdf_path,format="documents"):
+    client = pdf_path.stem
+    return [Document(page_content=f"Policy of {client}: luggage and medical cover up to {len(client)}000 USD.",
+                     metadata={"source":str(pdf_path),"page":1}),
+            Document(page_content=BOILERPLATE,metadata={"source":str(pdf_path),"page":2}),
+            Document(page_content=BOILERPLATE,metadata={"source":str(pdf_path),"page":3})]
+
+
+@pytest.mark.parametrize("embedding_batch_size",[None,2])
+def test_text_chunker_indexes_shared_chunks_once(tmp_path,monkeypatch,embedding_batch_size):
+    monkeypatch.setattr(indexer_module,"read_pdf",_fake_read_pdf)
+
+    faiss_indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    text_chunker = TextChunker(faiss_indexer,RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=0),
+                               embedding_batch_size=embedding_batch_size,
+                               deduplicator=ChunkDeduplicator.from_faiss_indexer(faiss_indexer))
+
+    first_path = tmp_path / "client1_TourCare.pdf"
+    second_path = tmp_path / "client2_TourCare.pdf"
+    for pdf_path in (first_path,second_path):
+        pdf_path.write_text(pdf_path.stem)
+        assert text_chunker.chunk(pdf_path)
+
+    # Two own chunks plus one boilerplate chunk, instead of six
+    assert faiss_indexer.vector_store.index.ntotal == 3
+    assert text_chunker.num_duplicate_chunks == 3
+
+    shared = faiss_indexer.retrieve(BOILERPLATE,num_documents=1,filter={"client":"client2"})[0]
+    assert shared.page_content == BOILERPLATE.strip()
+    assert shared.metadata["sources"] == [str(first_path),str(second_path)]
+
+    # Removing one file keeps the chunk for the other
+    faiss_indexer.remove_source(first_path)
+    assert faiss_indexer.vector_store.index.ntotal == 2
+    shared = faiss_indexer.retrieve(BOILERPLATE,num_documents=1,filter={"client":"client2"})[0]
+    assert (shared.metadata["source"],shared.metadata["sources"]) == (str(second_path),[str(second_path)])
+
+    # Re-indexing the first file attaches it to the surviving chunk again
+    assert text_chunker.chunk(first_path)
+    assert faiss_indexer.vector_store.index.ntotal == 3
+
+    faiss_indexer.remove_source(second_path)
+    faiss_indexer.remove_source(first_path)
+    assert faiss_indexer.vector_store.index.ntotal == 0
+    assert len(text_chunker.deduplicator) == 0
@@ -0,0 +1,228 @@
+from pathlib import Path
+import sys
+import json
+import warnings
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer.faiss_indexer import FAISSIndexer
+from indexer.metadata_index import source_key
+from indexer.index_factory import INDEX_TYPES, IndexConfig, build_index, convert_index, migrate_index_directory, recall_at_k, train_index
+
+
+def _documents(num_documents:int):
+    return [Document(page_content=f"claim number {i} filed by client {i % 7}",metadata={"source":f"claim_{i}.pdf"})
+            for i in range(num_documents)]
+
+
+@pytest.mark.parametrize("index_type",INDEX_TYPES)
+def test_index_types_find_exact_match(index_type):
+    vectors = np.random.default_rng(0).random((400,16),dtype=np.float32)
+    config = IndexConfig(index_type=index_type,nlist=4,nprobe=4,pq_m=4,pq_nbits=6)
+
+    index = build_index(config,16)
+    train_index(index,vectors,config)
+    index.add(vectors)
+    _,ids = index.search(vectors[:5],1)
+
+    assert list(ids[:,0]) == [0,1,2,3,4]
+
+
+def test_ivf_training_needs_enough_vectors():
+    config = IndexConfig(index_type="ivf_flat",nlist=16)
+    index = build_index(config,8)
+
+    with pytest.raises(ValueError):
+        train_index(index,np.zeros((4,8),dtype=np.float32),config)
+
+
+def test_faiss_indexer_with_ivf_index(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=IndexConfig(index_type="ivf_flat",nlist=4,nprobe=4))
+    indexer.add_documents(_documents(100))
+
+    assert indexer.retrieve("claim number 42 filed by client 0",num_documents=1)[0].page_content == "claim number 42 filed by client 0"
+
+    indexer.save(tmp_path)
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=16),tmp_path)
+
+    assert reloaded.index_config.index_type == "ivf_flat"
+    assert reloaded.vector_store.index.ntotal == 100
+
+
+def test_migrate_flat_directory_to_hnsw(tmp_path):
+    flat_directory = tmp_path / "flat"
+    hnsw_directory = tmp_path / "hnsw"
+
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16))
+    indexer.add_documents(_documents(50))
+    indexer.save(flat_directory)
+
+    migrate_index_directory(flat_directory,hnsw_directory,IndexConfig(index_type="hnsw"))
+
+    with open(hnsw_directory / "custom_metadata.json") as f:
+        assert json.load(f)["index"]["index_type"] == "hnsw"
+
+    migrated = FAISSIndexer(DeterministicFakeEmbedding(size=16),hnsw_directory)
+    query = "claim number 7 filed by client 0"
+
+    assert migrated.retrieve(query,num_documents=1)[0].page_content == query
+    assert np.allclose(convert_index(migrated.vector_store.index,IndexConfig()).reconstruct(3),indexer.vector_store.index.reconstruct(3))
+
+
+@pytest.mark.parametrize("encoding",["fp16","sq8"])
+def test_compressed_encodings_keep_recall(encoding):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000,32),dtype=np.float32)
+    queries = rng.standard_normal((50,32),dtype=np.float32)
+    config = IndexConfig(metric="inner_product",encoding=encoding)
+
+    index = build_index(config,32)
+    train_index(index,vectors,config)
+    normalized = vectors / np.linalg.norm(vectors,axis=1,keepdims=True)
+    index.add(normalized)
+
+    assert recall_at_k(index,vectors,queries / np.linalg.norm(queries,axis=1,keepdims=True),k=10,metric="inner_product") > 0.8
+
+
+def test_refine_reranks_against_exact_vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000,32),dtype=np.float32)
+    queries = rng.standard_normal((50,32),dtype=np.float32)
+    recalls = {}
+
+    for refine in (False,True):
+        config = IndexConfig(index_type="ivf_pq",nlist=8,nprobe=8,pq_m=4,pq_nbits=6,refine=refine,refine_k_factor=8)
+        index = build_index(config,32)
+        train_index(index,vectors,config)
+        index.add(vectors)
+        recalls[refine] = recall_at_k(index,vectors,queries,k=10)
+
+    assert not IndexConfig(refine=True).supports_remove
+    assert recalls[True] > recalls[False]
+    assert recalls[True] > 0.8
+
+
+def test_faiss_indexer_with_inner_product_sq8(tmp_path):
+    config = IndexConfig(metric="inner_product",encoding="sq8")
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=config)
+    indexer.add_documents(_documents(50))
+
+    query = "claim number 7 filed by client 0"
+    assert np.isclose(np.linalg.norm(indexer.vector_store.index.reconstruct(0)),1.0,atol=0.05)
+    assert indexer.retrieve(query,num_documents=1)[0].page_content == query
+
+    indexer.save(tmp_path)
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=16),tmp_path)
+
+    assert reloaded.index_config.metric == "inner_product"
+    assert reloaded.vector_store._normalize_L2
+    assert reloaded.retrieve(query,num_documents=1)[0].page_content == query
+    assert reloaded.remove_source("claim_7.pdf") == 1
+
+
+def test_encoding_rejected_for_index_types_with_own_codes():
+    with pytest.raises(ValueError):
+        IndexConfig(index_type="ivf_pq",encoding="sq8")
+
+
+_REMOVABLE_CONFIGS = [config for config in
+                      [IndexConfig(index_type=index_type,encoding=encoding,nlist=4,nprobe=4,pq_m=16,pq_nbits=4)
+                       for index_type in INDEX_TYPES for encoding in ["flat","fp16","sq8"]
+                       if encoding == "flat" or index_type in ("flat","ivf_flat","hnsw")]
+                      if config.supports_remove]
+
+
+@pytest.mark.parametrize("config",_REMOVABLE_CONFIGS,ids=lambda config: config.factory_string())
+def test_remove_then_add_keeps_ids_consistent(config):
+    def documents(name,source):
+        return [Document(page_content=f"{name} text {i}",metadata={"source":source}) for i in range(40)]
+
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=config)
+    indexer.replace_source_documents("a.pdf",documents("alpha","a.pdf"),"a1")
+    indexer.replace_source_documents("b.pdf",documents("beta","b.pdf"),"b1")
+    # Trains the index, so the removal below goes through remove_ids
+    indexer.flush()
+    # Re-indexing a.pdf removes its vectors, then adds new ones
+    indexer.replace_source_documents("a.pdf",documents("gamma","a.pdf"),"a2")
+
+    assert indexer.vector_store.index.ntotal == 80
+
+    for name,source in [("beta","b.pdf"),("gamma","a.pdf")]:
+        for i in range(0,40,5):
+            query = f"{name} text {i}"
+            assert indexer.retrieve(query,num_documents=1)[0].page_content == query
+            assert [doc.page_content for doc in indexer.retrieve(query,num_documents=1,filter={"source":source})] == [query]
+
+
+def test_ivf_trains_once_enough_vectors_arrived_across_batches(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),
+                           index_config=IndexConfig(index_type="ivf_flat",nlist=16,nprobe=16,training_sample_size=40))
+    documents = _documents(50)
+
+    # Batches smaller than nlist are held back instead of failing to train
+    for start in range(0,30,10):
+        ids = indexer.add_documents(documents[start:start + 10])
+        assert len(ids) == 10
+
+    assert len(indexer._pending) == 30
+
+    indexer.add_documents(documents[30:40])
+    assert len(indexer._pending) == 0
+    assert indexer.vector_store.index.ntotal == 40
+
+    indexer.add_documents(documents[40:])
+    assert indexer.vector_store.index.ntotal == 50
+    assert indexer.retrieve("claim number 12 filed by client 5",num_documents=1)[0].page_content == "claim number 12 filed by client 5"
+
+
+def test_held_back_vectors_follow_source_changes_and_flush_on_save(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=IndexConfig(index_type="sq8"))
+    documents = _documents(20)
+
+    indexer.replace_source_documents("a.pdf",documents[:10],"a1")
+    indexer.replace_source_documents("a.pdf",documents[10:15],"a2")
+    indexer.replace_source_documents("b.pdf",documents[15:],"b1")
+    assert len(indexer._pending) == 10
+
+    indexer.save(tmp_path)
+
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=16),tmp_path)
+    assert sorted(doc.page_content for doc in reloaded.documents()) == sorted(doc.page_content for doc in documents[10:])
+    assert reloaded.metadata["sources"][source_key("a.pdf")]["ids"] == indexer.metadata["sources"][source_key("a.pdf")]["ids"]
+    assert set(reloaded.vector_store.index_to_docstore_id.values()) == {doc.id for doc in reloaded.documents()}
+
+
+def test_too_few_vectors_for_ivf_fail_on_first_search():
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=IndexConfig(index_type="ivf_flat",nlist=16))
+    indexer.add_documents(_documents(5))
+
+    with pytest.raises(ValueError):
+        indexer.retrieve("claim number 1",num_documents=1)
+
+
+@pytest.mark.parametrize("index_type",[index_type for index_type in INDEX_TYPES if index_type != "flat"])
+def test_new_index_returns_no_results(index_type):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=IndexConfig(index_type=index_type,nlist=4,pq_m=4))
+    embedding = indexer.embed_query("alpha")
+
+    assert indexer.retrieve("alpha") == []
+    assert indexer.retrieve("alpha",filter={"source":"claim_1.pdf"}) == []
+    assert indexer.retrieve_by_vector(embedding) == []
+    assert indexer.retrieve_many(["alpha","beta"]) == [[],[]]
+    assert len(indexer.search_ids_by_vector(embedding)[1]) == 0
+
+
+def test_inner_product_index_builds_and_loads_without_warnings(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=IndexConfig(metric="inner_product"))
+        indexer.add_documents(_documents(10))
+        indexer.save(tmp_path)
+        reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=16),tmp_path)
+
+        assert reloaded.vector_store._normalize_L2
+        assert reloaded.retrieve("claim number 3 filed by client 3",num_documents=1)[0].page_content == "claim number 3 filed by client 3"
@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 from pathlib import Path
@@ -7,7 +8,10 @@ import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from indexer import indexer as indexer_module
 from indexer.indexer import FAISSIndexer,TextChunker
+from indexer.metadata_index import source_key
+from langchain_core.embeddings import DeterministicFakeEmbedding
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 def test_faiss_indexer():
@@ -34,4 +38,193 @@ def test_text_chunker_chunk():
     text_chunker = TextChunker(faiss_indexer,text_splitter)
 
     pdf_path = Path("tests/data/report.pdf")
-    text_chunker.chunk(pdf_path)
\ No newline at end of file
+    text_chunker.chunk(pdf_path)
+
+
+def test_text_chunker_reindexes_only_changed_pdfs(tmp_path,monkeypatch):
+    def fake_read_pdf(pdf_path,format="documents"):
+        text = pdf_path.read_text()
+        return [Document(page_content=text,metadata={"source":str(pdf_path),"page":1})]
+
+    monkeypatch.setattr(indexer_module,"read_pdf",fake_read_pdf)
+
+    faiss_indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    text_chunker = TextChunker(faiss_indexer,RecursiveCharacterTextSplitter(chunk_size=300,chunk_overlap=50))
+
+    policy_path = tmp_path / "policy.pdf"
+    claim_path = tmp_path / "claim.pdf"
+    policy_path.write_text("Policy covers theft")
+    claim_path.write_text("Claim filed March 2025")
+
+    assert text_chunker.chunk(policy_path)
+    assert text_chunker.chunk(claim_path)
+    assert not text_chunker.chunk(policy_path)
+    assert faiss_indexer.vector_store.index.ntotal == 2
+
+    policy_path.write_text("Policy covers theft and fire")
+
+    assert text_chunker.chunk(policy_path)
+    assert faiss_indexer.vector_store.index.ntotal == 2
+
+    contents = sorted(doc.page_content for doc in faiss_indexer.vector_store.docstore._dict.values())
+    assert contents == ["Claim filed March 2025","Policy covers theft and fire"]
+
+    # Hashes and ids survive a save/load round trip
+    text_chunker.save(tmp_path / "index")
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path / "index")
+    reloaded_chunker = TextChunker(reloaded,text_chunker.text_splitter)
+
+    assert not reloaded_chunker.chunk(claim_path)
+    claim_path.write_text("Claim filed April 2025")
+    assert reloaded_chunker.chunk(claim_path)
+    assert reloaded.vector_store.index.ntotal == 2
+
+
+def test_text_chunker_recognizes_a_source_given_as_another_path(tmp_path,monkeypatch):
+    def fake_read_pdf(pdf_path,format="documents"):
+        return [Document(page_content=pdf_path.read_text(),metadata={"source":str(pdf_path),"page":1})]
+
+    monkeypatch.setattr(indexer_module,"read_pdf",fake_read_pdf)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "policy.pdf").write_text("Policy covers theft")
+
+    faiss_indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    text_chunker = TextChunker(faiss_indexer,RecursiveCharacterTextSplitter(chunk_size=300,chunk_overlap=50))
+
+    assert text_chunker.chunk(Path("data/policy.pdf"))
+    assert not text_chunker.chunk(tmp_path / "data" / "policy.pdf")
+
+    (tmp_path / "data" / "policy.pdf").write_text("Policy covers theft and fire")
+    assert text_chunker.chunk(tmp_path / "data" / "policy.pdf")
+    assert [doc.page_content for doc in faiss_indexer.documents()] == ["Policy covers theft and fire"]
+
+    # Indexes saved with sources recorded as given are still matched
+    text_chunker.save(tmp_path / "index")
+    with open(tmp_path / "index" / "custom_metadata.json") as f:
+        metadata = json.load(f)
+    metadata["sources"] = {"data/policy.pdf": entry for entry in metadata["sources"].values()}
+    with open(tmp_path / "index" / "custom_metadata.json","w") as f:
+        json.dump(metadata,f)
+
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path / "index")
+    assert not TextChunker(reloaded,text_chunker.text_splitter).chunk(tmp_path / "data" / "policy.pdf")
+    assert reloaded.remove_source("./data/../data/policy.pdf") == 1
+
+
+def test_text_chunker_streams_embedding_batches(tmp_path,monkeypatch):
+    def fake_read_pdf(pdf_path,format="documents"):
+        return [Document(page_content=f"page {page} " + "word " * 40,metadata={"source":str(pdf_path),"page":page})
+                for page in range(1,6)]
+
+    batch_sizes = []
+
+    class RecordingEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self,texts):
+            batch_sizes.append(len(texts))
+            return super().embed_documents(texts)
+
+    monkeypatch.setattr(indexer_module,"read_pdf",fake_read_pdf)
+
+    faiss_indexer = FAISSIndexer(RecordingEmbedding(size=8))
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=60,chunk_overlap=0)
+    text_chunker = TextChunker(faiss_indexer,text_splitter,embedding_batch_size=4,max_concurrent_embeddings=2)
+
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_text("report")
+
+    assert text_chunker.chunk(pdf_path)
+
+    num_chunks = sum(len(text_splitter.split_documents([page])) for page in fake_read_pdf(pdf_path))
+    assert faiss_indexer.vector_store.index.ntotal == num_chunks
+    assert max(batch_sizes) == 4
+    assert sum(batch_sizes) == num_chunks
+    assert len(faiss_indexer.metadata["sources"][source_key(pdf_path)]["ids"]) == num_chunks
+
+
+def test_text_chunker_stores_tables_by_id(tmp_path,monkeypatch):
+    import pandas as pd
+    from core.table_store import TableStore
+
+    table = pd.DataFrame({"Item":["Laptop","Phone"],"Price":[1200,800]})
+
+    def fake_read_pdf(pdf_path,format="documents"):
+        return [Document(page_content="word " * 80,metadata={"source":str(pdf_path),"page":1,"tables":[table]}),
+                Document(page_content="plain page",metadata={"source":str(pdf_path),"page":2,"tables":[]})]
+
+    monkeypatch.setattr(indexer_module,"read_pdf",fake_read_pdf)
+
+    table_store = TableStore(tmp_path / "index")
+    text_chunker = TextChunker(None,RecursiveCharacterTextSplitter(chunk_size=60,chunk_overlap=0),table_store=table_store)
+    chunks = text_chunker.prepare_chunks(tmp_path / "report.pdf")
+
+    first_page = [chunk for chunk in chunks if chunk.metadata["page"] == 1]
+    assert len(first_page) > 1
+    assert all("tables" not in chunk.metadata for chunk in chunks)
+    assert all(chunk.metadata["table_ids"] == first_page[0].metadata["table_ids"] for chunk in first_page)
+    assert chunks[-1].metadata["table_ids"] == []
+    assert len({id(chunk.metadata) for chunk in chunks}) == len(chunks)
+
+    pd.testing.assert_frame_equal(table_store.get(first_page[0].metadata["table_ids"][0]),table)
+
+
+class OfflineEmbedding(DeterministicFakeEmbedding):
+    """Fails on any embedding call, standing in for a backend that is not reachable."""
+
+    model: str = "text-embedding-3-small"
+
+    def embed_query(self,text):
+        raise AssertionError("unexpected embedding call")
+
+    def embed_documents(self,texts):
+        raise AssertionError("unexpected embedding call")
+
+
+def test_faiss_indexer_construction_is_offline_and_lazy(tmp_path):
+    indexer = FAISSIndexer(OfflineEmbedding(size=1536))
+
+    assert not indexer.is_loaded
+    assert indexer.vector_store.index.d == 1536
+    assert indexer.vector_store.index.ntotal == 0
+
+    writer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    writer.add_documents([Document(page_content="Claim filed March 2025",metadata={"source":"claim.pdf"})])
+    writer.save(tmp_path)
+
+    reader = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path)
+
+    assert not reader.is_loaded
+    assert "construct_seconds" in reader.timings
+
+    results = reader.retrieve("claim",num_documents=1)
+
+    assert reader.is_loaded
+    assert results[0].page_content == "Claim filed March 2025"
+    assert "load_index_seconds" in reader.timings
+
+
+def test_text_chunker_embeds_pages_while_parsing(tmp_path,monkeypatch):
+    events = []
+
+    def fake_iter_pdf_pages(pdf_path,format="documents",window=8):
+        for page in range(1,6):
+            events.append(f"parsed {page}")
+            yield Document(page_content=f"page {page} " + "word " * 40,metadata={"source":str(pdf_path),"page":page})
+
+    class RecordingEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self,texts):
+            events.append("embedded")
+            return super().embed_documents(texts)
+
+    monkeypatch.setattr(indexer_module,"iter_pdf_pages",fake_iter_pdf_pages)
+
+    faiss_indexer = FAISSIndexer(RecordingEmbedding(size=8))
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=60,chunk_overlap=0)
+    text_chunker = TextChunker(faiss_indexer,text_splitter,embedding_batch_size=2,max_concurrent_embeddings=1,page_window=2)
+
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_text("report")
+
+    assert text_chunker.chunk(pdf_path)
+    assert events.index("embedded") < events.index("parsed 5")
+    assert faiss_indexer.vector_store.index.ntotal == sum(len(text_splitter.split_documents([page])) for page in fake_iter_pdf_pages(pdf_path))
@@ -0,0 +1,64 @@
+from pathlib import Path
+import sys
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer.faiss_indexer import FAISSIndexer
+from indexer.index_factory import IndexConfig
+from indexer.metadata_index import document_filter_values
+from retrieval.dense_retriever import DenseRetriever
+
+
+def _documents():
+    return [
+        Document(page_content=f"client {client} report page {page} chunk {chunk}",
+                 metadata={"source":f"pdfs\\insurance\\client{client}_report{client}_Policy.pdf","page":page,
+                           "tables":["table"] if chunk == 0 else []})
+        for client in range(1,5) for page in range(1,6) for chunk in range(5)
+    ]
+
+
+def test_document_filter_values():
+    values = document_filter_values(_documents()[0])
+
+    assert values == {"source":"pdfs\\insurance\\client1_report1_Policy.pdf","file_name":"client1_report1_Policy.pdf",
+                      "client":"client1","page":1,"has_tables":True}
+
+
+@pytest.mark.parametrize("index_config",[
+    IndexConfig(),
+    IndexConfig(index_type="ivf_flat",nlist=8,nprobe=1),
+    IndexConfig(index_type="hnsw",hnsw_m=4,ef_search=4),
+    IndexConfig(encoding="sq8",refine=True),
+])
+def test_filtered_retrieve_returns_k_results_from_the_subset(index_config):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16),index_config=index_config)
+    indexer.add_documents(_documents())
+
+    results = indexer.retrieve("client 2 report page 3 chunk 4",num_documents=8,filter={"client":"client3","page":[2,4]})
+
+    assert len(results) == 8
+    assert all("client3_" in doc.metadata["source"] and doc.metadata["page"] in (2,4) for doc in results)
+
+    with_tables = indexer.retrieve("client 2 report page 3 chunk 4",num_documents=50,filter={"has_tables":True})
+    assert len(with_tables) == 20
+
+
+def test_filter_follows_additions_and_removals():
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=16))
+    indexer.add_documents(_documents())
+    retriever = DenseRetriever(indexer)
+
+    assert len(retriever.retrieve("client 1",k=100,filter={"file_name":"client1_report1_Policy.pdf"})) == 25
+
+    indexer.remove_source("pdfs\\insurance\\client1_report1_Policy.pdf")
+    indexer.add_documents([Document(page_content="late chunk",metadata={"source":"client1_addendum.pdf","page":1})])
+
+    assert retriever.retrieve("client 1",k=100,filter={"client":"client1"})[0].page_content == "late chunk"
+    assert len(retriever.retrieve("client 1",k=100,filter={"client":"client1"})) == 1
+
+    with pytest.raises(ValueError):
+        indexer.retrieve("client 1",filter={"author":"someone"})
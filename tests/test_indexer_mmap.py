@@ -0,0 +1,68 @@
+from pathlib import Path
+import sys
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer.faiss_indexer import FAISSIndexer
+from indexer.index_factory import IndexConfig
+
+
+def _documents():
+    return [
+        Document(page_content="Insurance policy 123",metadata={"source":"policy.pdf","page":1}),
+        Document(page_content="Claim filed March 2025",metadata={"source":"claim.pdf","page":1}),
+        Document(page_content="Claim approved April 2025",metadata={"source":"claim.pdf","page":2}),
+    ]
+
+
+def _saved_index(directory:Path,docstore_backend:str,index_type:str="flat")->Path:
+    # IVF needs at least nlist training vectors
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8),index_config=IndexConfig(index_type=index_type,nlist=1,nprobe=1,pq_m=2,pq_nbits=1),
+                           docstore_backend=docstore_backend)
+    indexer.add_documents(_documents())
+    indexer.save(directory)
+
+    return directory
+
+
+@pytest.mark.parametrize("docstore_backend",["memory","sqlite"])
+@pytest.mark.parametrize("index_type",["flat","sq8","hnsw","ivf_flat","ivf_pq"])
+def test_mmap_index_retrieves_documents(tmp_path,docstore_backend,index_type):
+    directory = _saved_index(tmp_path,docstore_backend,index_type)
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8),directory,mmap=True)
+
+    assert indexer.mode == "mmap (read-only)"
+    assert "mmap" in repr(indexer)
+    assert indexer.retrieve("Claim filed March 2025",num_documents=1)[0].page_content == "Claim filed March 2025"
+    assert indexer.vector_store.index.ntotal == 3
+
+
+def test_mmap_with_pickled_docstore_warns(tmp_path):
+    directory = _saved_index(tmp_path,"memory")
+
+    with pytest.warns(UserWarning,match="pickled docstore"):
+        FAISSIndexer(DeterministicFakeEmbedding(size=8),directory,mmap=True).vector_store
+
+
+def test_mmap_index_refuses_writes(tmp_path):
+    directory = _saved_index(tmp_path,"sqlite")
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8),directory,mmap=True)
+
+    with pytest.raises(PermissionError,match="mmap"):
+        indexer.add_documents(_documents())
+
+    with pytest.raises(PermissionError,match="mmap"):
+        indexer.remove_source("claim.pdf")
+
+    with pytest.raises(PermissionError,match="mmap"):
+        indexer.save(directory)
+
+    assert FAISSIndexer(DeterministicFakeEmbedding(size=8),directory).vector_store.index.ntotal == 3
+
+
+def test_mmap_needs_existing_index(tmp_path):
+    with pytest.raises(ValueError):
+        FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path / "missing",mmap=True)
@@ -0,0 +1,47 @@
+from pathlib import Path
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer import indexer as indexer_module
+from indexer.indexer import FAISSIndexer,TextChunker
+from indexer.parallel_ingest import ParallelIngestor
+
+
+def _fake_read_pdf(pdf_path,format="documents"):
+    if pdf_path.name == "broken.pdf":
+        raise ValueError("cannot parse")
+
+    return [Document(page_content=f"{pdf_path.stem} page {page}",metadata={"source":str(pdf_path),"page":page})
+            for page in (1,2)]
+
+
+def test_parallel_ingest_single_writer(tmp_path,monkeypatch):
+    monkeypatch.setattr(indexer_module,"read_pdf",_fake_read_pdf)
+
+    faiss_indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    text_chunker = TextChunker(faiss_indexer,RecursiveCharacterTextSplitter(chunk_size=300,chunk_overlap=50))
+    pdf_paths = [tmp_path / f"report_{i}.pdf" for i in range(5)] + [tmp_path / "broken.pdf"]
+
+    for i,pdf_path in enumerate(pdf_paths):
+        pdf_path.write_bytes(f"pdf {i}".encode())
+
+    ingestor = ParallelIngestor(text_chunker,workers=3,executor="thread")
+    report = ingestor.ingest(pdf_paths,verbose=False)
+
+    assert report.num_files == 5
+    assert report.num_chunks == 10
+    assert report.failed_files == [str(tmp_path / "broken.pdf")]
+    assert faiss_indexer.vector_store.index.ntotal == 10
+    assert sorted(faiss_indexer.metadata["processed_pdfs"]) == sorted(str(path) for path in pdf_paths[:5])
+
+    # A second run only retries the file that failed
+    report = ingestor.ingest(pdf_paths,verbose=False)
+
+    assert len(report.skipped_files) == 5
+    assert report.num_files == 0
+    assert faiss_indexer.vector_store.index.ntotal == 10
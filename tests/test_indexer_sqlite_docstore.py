@@ -0,0 +1,90 @@
+from pathlib import Path
+import sys
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from indexer.faiss_indexer import FAISSIndexer
+from indexer.sqlite_docstore import SQLiteDocstore, convert_pickle_docstore
+
+
+def _documents():
+    return [
+        Document(page_content="Insurance policy 123",metadata={"source":"policy.pdf","page":1}),
+        Document(page_content="Claim filed March 2025",metadata={"source":"claim.pdf","page":1}),
+        Document(page_content="Claim approved April 2025",metadata={"source":"claim.pdf","page":2}),
+    ]
+
+
+def test_sqlite_docstore_add_search_delete(tmp_path):
+    docstore = SQLiteDocstore(tmp_path / "docstore.sqlite",cache_size=1)
+    docstore.add({"a":_documents()[0],"b":_documents()[1]})
+
+    assert docstore.search("a").page_content == "Insurance policy 123"
+    assert docstore.search("b").metadata == {"source":"claim.pdf","page":1}
+    assert docstore.cache_info()["cached_documents"] == 1
+    assert docstore.search("missing") == "ID missing not found."
+
+    with pytest.raises(ValueError):
+        docstore.add({"a":_documents()[2]})
+
+    docstore.delete(["a"])
+
+    assert "a" not in docstore
+    assert len(docstore) == 1
+
+
+def test_faiss_indexer_with_sqlite_docstore(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8),docstore_backend="sqlite")
+    indexer.add_documents(_documents())
+    indexer.save(tmp_path)
+
+    assert (tmp_path / "docstore.sqlite").exists()
+    assert not (tmp_path / "index.pkl").exists()
+
+    reloaded = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path)
+
+    assert reloaded.docstore_backend == "sqlite"
+    assert reloaded.retrieve("Claim filed March 2025",num_documents=1)[0].page_content == "Claim filed March 2025"
+    assert reloaded.remove_source("claim.pdf") == 2
+    assert reloaded.vector_store.index.ntotal == 1
+
+    reloaded.save(tmp_path)
+    assert len(SQLiteDocstore(tmp_path / "docstore.sqlite")) == 1
+
+
+def test_convert_pickle_docstore(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    indexer.add_documents(_documents())
+    indexer.save(tmp_path / "pickled")
+
+    assert convert_pickle_docstore(tmp_path / "pickled",tmp_path / "sqlite") == 3
+
+    converted = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path / "sqlite")
+
+    assert converted.docstore_backend == "sqlite"
+    assert converted.retrieve("Insurance policy 123",num_documents=1)[0].page_content == "Insurance policy 123"
+
+
+def test_saved_sqlite_docstore_only_changes_on_save(tmp_path):
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8),docstore_backend="sqlite")
+    indexer.add_documents(_documents())
+    indexer.save(tmp_path)
+
+    writer = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path)
+    assert writer.remove_source("claim.pdf") == 2
+
+    # Without save(), another process still loads the last saved version, documents included
+    reader = FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path)
+    assert len(reader.documents()) == 3
+    assert reader.retrieve("Claim filed March 2025",num_documents=1)[0].page_content == "Claim filed March 2025"
+
+    writer.save(tmp_path)
+    writer.vector_store.docstore.close()
+
+    assert [doc.page_content for doc in FAISSIndexer(DeterministicFakeEmbedding(size=8),tmp_path).documents()] == ["Insurance policy 123"]
+    # The reader keeps the version it opened
+    assert len(reader.documents()) == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["custom_metadata.json","docstore.sqlite","index.faiss","index_to_docstore_id.json"]
@@ -0,0 +1,34 @@
+from pathlib import Path
+import os
+import subprocess
+import sys
+
+LEGACY_ROOT = Path(__file__).parent.parent / "_mid_ex_old" / "src_mid_ex"
+
+# Run the way qna_grid_search.py does: from src_mid_ex, with only the legacy tree importable
+BUILD_WITH_EMBEDDING_CACHE = """
+import sys
+from pathlib import Path
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import tools.tools_project.qna.qna_core as qna_core
+
+qna_core.OpenAIEmbeddings = lambda model: DeterministicFakeEmbedding(size=8)
+texts = ["Insurance policy 123 covers water damage.", "Claim filed March 2025 for a broken phone."]
+tool = qna_core.build_qna_tool(texts, token_based=False, chunk_size=60, chunk_overlap=0,
+                               embedding_cache_path=Path(sys.argv[1]), use_multiquery=False, top_k=1, fetch_k=2)
+
+print(type(tool.vectorstore.embeddings).__name__, tool.vectorstore.embeddings.misses)
+print(type(tool.retriever).__module__, tool.retriever.search_type)
+print(tool.retriever.invoke("Claim filed March 2025 for a broken phone.")[0].page_content)
+"""
+
+
+def test_build_qna_tool_with_embedding_cache_from_legacy_root(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    env["OPENAI_API_KEY"] = "test"
+    result = subprocess.run([sys.executable, "-c", BUILD_WITH_EMBEDDING_CACHE, str(tmp_path / "embeddings.sqlite")],
+                            cwd=LEGACY_ROOT, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["CachedEmbeddings 2", "retrieval.threshold_retriever mmr",
+                                        "Claim filed March 2025 for a broken phone."]
@@ -0,0 +1,86 @@
+from pathlib import Path
+import sys
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.needle_agent.needle import NeedleAgent
+from agents.needle_agent.semantic_cache import SemanticAnswerCache
+from indexer.faiss_indexer import FAISSIndexer
+
+
+class TableEmbeddings(Embeddings):
+    """Embeds known texts to fixed vectors, so paraphrases can be made close on purpose."""
+
+    dimensions = 3
+    vectors = {
+        "Alex from Canada lost his luggage": [1.0,0.0,0.0],
+        "Maria's car was stolen in Madrid": [0.0,1.0,0.0],
+        "What happened to Alex from Canada?": [0.9,0.1,0.0],
+        "What happened to Alex, the Canadian client?": [0.89,0.12,0.0],
+        "Who had a car stolen?": [0.1,0.9,0.1],
+    }
+
+    def embed_documents(self,texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self,text):
+        return self.vectors[text]
+
+
+class CountingChatModel(FakeListChatModel):
+    calls: int = 0
+
+    def invoke(self,*args,**kwargs):
+        self.calls += 1
+        return super().invoke(*args,**kwargs)
+
+
+def _agent(semantic_cache:SemanticAnswerCache)->NeedleAgent:
+    indexer = FAISSIndexer(TableEmbeddings())
+    indexer.add_documents([
+        Document(page_content="Alex from Canada lost his luggage",metadata={"source":"alex.pdf"}),
+        Document(page_content="Maria's car was stolen in Madrid",metadata={"source":"maria.pdf"}),
+    ])
+    llm = CountingChatModel(responses=["Alex lost his luggage.","Maria's car was stolen."])
+
+    return NeedleAgent(indexer,llm,semantic_cache=semantic_cache)
+
+
+def test_paraphrase_reuses_cached_answer():
+    cache = SemanticAnswerCache(threshold=0.99)
+    agent = _agent(cache)
+
+    first = agent.answer("What happened to Alex from Canada?")
+    paraphrase = agent.answer("What happened to Alex, the Canadian client?")
+    other = agent.answer("Who had a car stolen?")
+
+    assert first["answer"] == paraphrase["answer"] == "Alex lost his luggage."
+    assert other["answer"] == "Maria's car was stolen."
+    assert agent.llm.calls == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_changed_chunks_are_not_served_from_cache():
+    cache = SemanticAnswerCache(threshold=0.99)
+    agent = _agent(cache)
+
+    agent.answer("What happened to Alex from Canada?")
+    agent.faiss_indexer.remove_source("maria.pdf")
+    agent.answer("What happened to Alex from Canada?")
+
+    assert agent.llm.calls == 2
+    assert cache.stats()["chunk_mismatches"] == 1
+
+
+def test_semantic_cache_evicts_least_recently_hit():
+    cache = SemanticAnswerCache(threshold=0.99,max_entries=1)
+    cache.put("a",[1.0,0.0],["chunk-1"],"answer a")
+    cache.put("b",[0.0,1.0],["chunk-2"],"answer b")
+
+    assert cache.lookup([1.0,0.0],["chunk-1"]) is None
+    assert cache.lookup([0.0,1.0],["chunk-2"]).answer == "answer b"
+    assert cache.stats()["evictions"] == 1
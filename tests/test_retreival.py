@@ -45,3 +45,264 @@ def test_hybrid_retriever():
     results = hybrid.retrieve("policy", k_dense=1, k_sparse=1)
     assert len(results) > 0
     assert any("policy" in r.page_content for r in results)
+
+
+def _legacy_sparse_ranking(docs, query, k):
+    # Ranking of the original rank_bm25 based SparseRetriever
+    import re
+    from rank_bm25 import BM25Okapi
+
+    tokenize = lambda text: re.findall(r"\w+", text.lower())
+    tokenized = [tokenize(doc.page_content) for doc in docs]
+    query_tokens = tokenize(query)
+    ranked = list(zip(docs, tokenized, BM25Okapi(tokenized).get_scores(query_tokens)))
+    if max(s for _, _, s in ranked) == min(s for _, _, s in ranked):
+        ranked.sort(key=lambda x: len(set(query_tokens) & set(x[1])), reverse=True)
+    else:
+        ranked.sort(key=lambda x: x[2], reverse=True)
+    return [doc.page_content for doc, _, _ in ranked[:k]]
+
+
+def test_sparse_retriever_matches_rank_bm25():
+    import random
+
+    rng = random.Random(0)
+    for _ in range(300):
+        docs = [Document(page_content=f"doc{i} " + " ".join(f"w{rng.randrange(8)}" for _ in range(rng.randint(0, 6))))
+                for i in range(rng.randint(1, 12))]
+        query = " ".join(f"w{rng.randrange(10)}" for _ in range(rng.randint(0, 6)))
+        k = rng.randint(1, len(docs) + 1)
+
+        results = [doc.page_content for doc in SparseRetriever(docs).retrieve(query, k=k)]
+        assert results == _legacy_sparse_ranking(docs, query, k)
+
+
+def test_sparse_retriever_save_load(tmp_path):
+    docs = [
+        Document(page_content="Insurance policy 123"),
+        Document(page_content="Claim filed March 2025"),
+        Document(page_content="Claim approved April 2025"),
+    ]
+    SparseRetriever(docs).save(tmp_path)
+
+    assert SparseRetriever.exists(tmp_path)
+    loaded = SparseRetriever.load(tmp_path)
+    assert [doc.page_content for doc in loaded.retrieve("claim approved", k=2)] == \
+        [doc.page_content for doc in SparseRetriever(docs).retrieve("claim approved", k=2)]
+
+
+def test_sparse_retriever_retrieve_many_matches_retrieve():
+    import random
+
+    rng = random.Random(1)
+    docs = [Document(page_content=" ".join(f"w{rng.randrange(30)}" for _ in range(rng.randint(1, 10)))) for _ in range(200)]
+    queries = [" ".join(f"w{rng.randrange(35)}" for _ in range(rng.randint(0, 5))) for _ in range(100)]
+    retriever = SparseRetriever(docs)
+
+    for tie_break in ("overlap", "score"):
+        batched = retriever.retrieve_many(queries, k=7, tie_break=tie_break)
+        assert batched == [retriever.retrieve(query, k=7, tie_break=tie_break) for query in queries]
+
+
+def test_sparse_retriever_tie_break_by_score():
+    docs = [
+        Document(page_content="Insurance policy 123"),
+        Document(page_content="Claim filed March 2025"),
+    ]
+    retriever = SparseRetriever(docs)
+
+    # Both documents score 0 on a two-document corpus; only the overlap tie break prefers the match
+    assert retriever.retrieve("Claim", k=1)[0].page_content == "Claim filed March 2025"
+    assert retriever.retrieve("Claim", k=1, tie_break="score")[0].page_content == "Insurance policy 123"
+
+
+def test_hybrid_retriever_fuses_and_dedupes():
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    docs = [
+        Document(page_content="Insurance policy 123", metadata={"source": "policy.pdf"}),
+        Document(page_content="Claim filed March 2025", metadata={"source": "claim.pdf"}),
+        Document(page_content="Claim approved April 2025", metadata={"source": "claim.pdf"}),
+    ]
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    indexer.add_documents(docs)
+
+    for fusion in ("rrf", "weighted"):
+        hybrid = HybridRetriever(DenseRetriever(indexer.vector_store), SparseRetriever(docs), fusion=fusion)
+        results = hybrid.retrieve("Claim filed March 2025", k_dense=3, k_sparse=3)
+
+        # Both backends return all three chunks; each appears once, the exact match first
+        assert sorted(doc.page_content for doc in results) == sorted(doc.page_content for doc in docs)
+        assert results[0].page_content == "Claim filed March 2025"
+        assert len(hybrid.retrieve("Claim filed March 2025", k_dense=3, k_sparse=3, k=2)) == 2
+
+
+def test_hybrid_retrievers_share_an_executor():
+    from concurrent.futures import ThreadPoolExecutor
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    docs = [Document(page_content="Insurance policy 123"), Document(page_content="Claim filed March 2025")]
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    indexer.add_documents(docs)
+
+    first = HybridRetriever(DenseRetriever(indexer.vector_store), SparseRetriever(docs))
+    second = HybridRetriever(DenseRetriever(indexer.vector_store), SparseRetriever(docs))
+    assert first._executor is second._executor
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        hybrid = HybridRetriever(DenseRetriever(indexer.vector_store), SparseRetriever(docs), executor=executor)
+        assert hybrid.retrieve("Claim filed March 2025", k_dense=1, k_sparse=1)[0].page_content == "Claim filed March 2025"
+
+
+def test_sparse_retriever_from_faiss_indexer_stays_in_sync(tmp_path):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    indexer = FAISSIndexer(DeterministicFakeEmbedding(size=8))
+    indexer.add_documents([
+        Document(page_content="Insurance policy 123", metadata={"source": "policy.pdf"}),
+        Document(page_content="Claim filed March 2025", metadata={"source": "claim.pdf"}),
+    ])
+    sparse = SparseRetriever.from_faiss_indexer(indexer)
+
+    assert [doc.id for doc in sparse.corpus] == list(indexer.vector_store.index_to_docstore_id.values())
+
+    indexer.add_documents([Document(page_content="Burglary reported in July", metadata={"source": "burglary.pdf"})])
+    assert sparse.retrieve("burglary", k=1)[0].page_content == "Burglary reported in July"
+
+    indexer.remove_source("claim.pdf")
+    assert [doc.page_content for doc in sparse.corpus] == ["Insurance policy 123", "Burglary reported in July"]
+
+    indexer.save(tmp_path)
+    SparseRetriever(indexer.documents()).save(tmp_path)
+    reloaded = SparseRetriever.from_faiss_indexer(FAISSIndexer(DeterministicFakeEmbedding(size=8), tmp_path))
+    assert reloaded.retrieve("policy", k=1)[0].page_content == "Insurance policy 123"
+
+
+def test_retrieve_many_embeds_and_searches_once():
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from core.query_cache import QueryResultCache
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        batches: list = []
+
+        def embed_documents(self, texts):
+            self.batches.append(list(texts))
+            return super().embed_documents(texts)
+
+    docs = [Document(page_content=f"Claim number {n} filed", metadata={"source": f"claim{n}.pdf"}) for n in range(20)]
+    indexer = FAISSIndexer(CountingEmbedding(size=8), query_cache=QueryResultCache())
+    indexer.add_documents(docs)
+    queries = [doc.page_content for doc in docs[::-1]]
+    indexer.embedding_model.batches.clear()
+
+    results = DenseRetriever(indexer).retrieve_many(queries, k=3)
+
+    assert indexer.embedding_model.batches == [queries]
+    assert [[doc.page_content for doc in found] for found in results] == \
+        [[doc.page_content for doc in DenseRetriever(indexer.vector_store).retrieve(query, k=3)] for query in queries]
+    assert [found[0].page_content for found in results] == queries
+
+    # Cached queries are not embedded again; only the new one is
+    indexer.retrieve_many(queries[:2] + ["Claim number 3 filed twice"], num_documents=3)
+    assert indexer.embedding_model.batches[-1] == ["Claim number 3 filed twice"]
+
+    plain = DenseRetriever(indexer.vector_store).retrieve_many(queries[:2], k=1)
+    assert [found[0].page_content for found in plain] == queries[:2]
+
+
+def test_mmr_matches_langchain_selection():
+    import numpy as np
+    from langchain_community.vectorstores.utils import maximal_marginal_relevance as langchain_mmr
+    from retrieval.mmr import maximal_marginal_relevance
+
+    rng = np.random.default_rng(0)
+    candidates = rng.normal(size=(200, 32)).astype(np.float32)
+    query = rng.normal(size=32).astype(np.float32)
+
+    for lambda_mult in (0.0, 0.5, 1.0):
+        assert maximal_marginal_relevance(query, candidates, 10, lambda_mult) == \
+            langchain_mmr(query, list(candidates), lambda_mult=lambda_mult, k=10)
+
+
+def test_dense_retriever_mmr_skips_near_duplicates():
+    from langchain_core.embeddings import Embeddings
+    from indexer.index_factory import IndexConfig
+
+    class TableEmbeddings(Embeddings):
+        dimensions = 3
+        vectors = {
+            "Claim filed March 2025": [1.0, 0.0, 0.0],
+            "Claim filed in March 2025": [0.99, 0.01, 0.0],
+            "Policy renewed in March": [0.7, 0.7, 0.0],
+            "Burglary reported in July": [0.0, 0.0, 1.0],
+            "March claim": [1.0, 0.0, 0.05],
+        }
+
+        def embed_documents(self, texts):
+            return [self.vectors[text] for text in texts]
+
+        def embed_query(self, text):
+            return self.vectors[text]
+
+    texts = list(TableEmbeddings.vectors)[:4]
+    for index_config in (IndexConfig(), IndexConfig(index_type="ivf_flat", nlist=1, nprobe=1)):
+        indexer = FAISSIndexer(TableEmbeddings(), index_config=index_config)
+        indexer.add_documents([Document(page_content=text, metadata={"source": "claims.pdf"}) for text in texts])
+
+        similar = DenseRetriever(indexer).retrieve("March claim", k=2)
+        diverse = DenseRetriever(indexer, search_type="mmr", fetch_k=3, lambda_mult=0.3).retrieve("March claim", k=2)
+
+        assert [doc.page_content for doc in similar] == ["Claim filed March 2025", "Claim filed in March 2025"]
+        assert [doc.page_content for doc in diverse] == ["Claim filed March 2025", "Policy renewed in March"]
+
+    plain = DenseRetriever(indexer.vector_store, search_type="mmr", fetch_k=3, lambda_mult=0.3).retrieve_many(["March claim"], k=2)
+    assert [doc.page_content for doc in plain[0]] == ["Claim filed March 2025", "Policy renewed in March"]
+
+    # Building a direct map for reconstruction keeps removal working on IVF
+    indexer.remove_source("claims.pdf")
+    assert indexer.vector_store.index.ntotal == 0
+
+
+def test_threshold_retriever_embeds_and_searches_once():
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from retrieval.threshold_retriever import ThresholdRetriever
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        queries: list = []
+
+        def embed_query(self, text):
+            self.queries.append(text)
+            return super().embed_query(text)
+
+    docs = [Document(page_content=f"Claim number {n} filed", metadata={"source": f"claim{n}.pdf"}) for n in range(30)]
+    indexer = FAISSIndexer(CountingEmbedding(size=8))
+    indexer.add_documents(docs)
+    vector_store = indexer.vector_store
+    scored = vector_store.similarity_search_with_score("Claim number 7 filed", k=10)
+    threshold = scored[4][1]
+    vector_store.embedding_function.queries.clear()
+
+    retriever = ThresholdRetriever(vectorstore=vector_store, k=8, fetch_k=10, score_threshold=threshold)
+    results = retriever.invoke("Claim number 7 filed")
+
+    assert vector_store.embedding_function.queries == ["Claim number 7 filed"]
+    assert [doc.page_content for doc in results] == [doc.page_content for doc, _ in scored[:5]]
+
+    diverse = ThresholdRetriever(vectorstore=vector_store, k=3, fetch_k=10, score_threshold=threshold,
+                                 search_type="mmr").invoke("Claim number 7 filed")
+    assert diverse[0].page_content == "Claim number 7 filed"
+    assert {doc.page_content for doc in diverse} <= {doc.page_content for doc, _ in scored[:5]}
+    assert len(diverse) == 3
+
+
+def test_sparse_retriever_from_documents():
+    docs = [
+        Document(page_content="Insurance policy 123"),
+        Document(page_content="Claim filed March 2025"),
+        Document(page_content="Policy renewal claim"),
+    ]
+    streamed = SparseRetriever.from_documents(doc for doc in docs)
+    built = SparseRetriever(docs)
+
+    assert streamed.corpus == docs
+    assert streamed.retrieve_with_scores("policy claim", k=3) == built.retrieve_with_scores("policy claim", k=3)
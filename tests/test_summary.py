@@ -1,10 +1,17 @@
+import itertools
 import pathlib
+import random
 import sys
 
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
 from core.api_utils import get_llm_langchain_openai
 from core.text_splitter import get_text_splitter
+from agents.summary_agent import summary as summary_module
 from agents.summary_agent.summary import SummaryAgent
 
 
@@ -27,3 +34,53 @@ def test_insurance_report_iterative():
     assert len(summary) > 0
 
 
+def test_summarize_pages_streams_chunks():
+    texts = ["Policy holder: Dana Levi.\n\nCoverage starts in March.", "Claim filed for a broken phone.\n\nAmount: 800 NIS."]
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=0)
+    llm = FakeListChatModel(responses=["partial"] * 4 + ["summary"])
+    summary_agent = SummaryAgent(text_splitter, llm)
+
+    chunks = list(summary_agent._iter_chunks(Document(page_content=text) for text in texts))
+    assert chunks == text_splitter.split_text("\n\n".join(texts))
+
+    summary = summary_agent.summarize_pages([Document(page_content=text) for text in texts], "map_reduce")
+    assert summary == "summary"
+
+
+def test_streamed_chunks_cover_pages_with_overlap_and_blank_lines():
+    rng = random.Random(0)
+    # Numbered words, so each chunk can only be found at its own place in the joined text
+    words = (f"{word}{i}" for i, word in enumerate(itertools.cycle(["policy", "claim", "premium", "of"])))
+
+    for _ in range(200):
+        paragraphs = lambda: rng.choice(["\n\n", "\n\n\n", " \n\n "]).join(
+            " ".join(itertools.islice(words, rng.randint(1, 12))) for _ in range(rng.randint(1, 5)))
+        texts = [rng.choice(["", "\n", " "]) + paragraphs() + rng.choice(["", "\n\n", " "]) for _ in range(rng.randint(1, 6))]
+        texts.insert(rng.randint(0, len(texts)), "\n\n")
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=rng.choice([60, 120]), chunk_overlap=rng.choice([0, 20]))
+        joined = "\n\n".join(texts)
+
+        chunks = list(SummaryAgent(text_splitter, None)._iter_chunks(Document(page_content=text) for text in texts))
+
+        # Every chunk is a piece of the joined text, in order, and no text is left out
+        covered = [False] * len(joined)
+        position = 0
+        for chunk in chunks:
+            assert len(chunk) <= text_splitter._chunk_size
+            start = joined.find(chunk, position)
+            assert start >= 0
+            covered[start:start + len(chunk)] = [True] * len(chunk)
+            position = start + 1
+        assert all(covered[i] or char.isspace() for i, char in enumerate(joined))
+
+
+def test_summarize_single_pdf_streams_pages_only_with_a_page_window(monkeypatch):
+    calls = []
+    monkeypatch.setattr(summary_module, "read_pdf", lambda path, format: calls.append("read_pdf") or "Claim filed.")
+    monkeypatch.setattr(summary_module, "iter_pdf_pages",
+                        lambda path, format, window: calls.append(("iter_pdf_pages", window)) or iter([Document(page_content="Claim filed.")]))
+    summary_agent = SummaryAgent(RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=0), FakeListChatModel(responses=["partial", "summary"]))
+
+    assert summary_agent.summarize_single_pdf(pathlib.Path("report.pdf"), "map_reduce") == "summary"
+    assert summary_agent.summarize_single_pdf(pathlib.Path("report.pdf"), "map_reduce", page_window=4) == "summary"
+    assert calls == ["read_pdf", ("iter_pdf_pages", 4)]
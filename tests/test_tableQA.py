@@ -44,3 +44,18 @@ async def test_tableqa_without_table(monkeypatch):
     agent = TableQAgent(retriever=retriever)
     result = await agent.handle("Which row has the max value?")
     assert result == "No relevant table found in the documents."
+
+
+@pytest.mark.asyncio
+async def test_tableqa_loads_stored_tables(tmp_path):
+    import pandas as pd
+    from core.table_store import TableStore
+
+    table_store = TableStore(tmp_path)
+    table_ids = table_store.put_page_tables("report.pdf", 1, [pd.DataFrame({"Name": ["Alice", "Bob"], "Salary": [5000, 7000]})])
+    docs = [Document(page_content="Salaries of the team", metadata={"table_ids": table_ids})]
+
+    agent = TableQAgent(retriever=MockRetriever(docs), table_store=table_store)
+    result = await agent.handle("Who has the highest salary?")
+
+    assert "Alice" in result and "7000" in result